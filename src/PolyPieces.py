@@ -1,9 +1,31 @@
 '''piecewise polynomial functions
 '''
+import bisect
+import functools
+import heapq
 import numbers
+import operator
 from fractions import Fraction
-from Polynomial import Polynomial
 import sys
+import weakref
+try:
+	from Polynomial import Polynomial
+	from SparsePolynomial import SparsePolynomial
+	import comb_tables
+	import conv_kernels
+	import fft_conv
+	import modular_conv
+except ImportError:
+	from .Polynomial import Polynomial
+	from .SparsePolynomial import SparsePolynomial
+	from . import comb_tables
+	from . import conv_kernels
+	from . import fft_conv
+	from . import modular_conv
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 
 def _newVarName(usedVarNames, baseName='t'):
@@ -15,30 +37,162 @@ def _newVarName(usedVarNames, baseName='t'):
 	return varName
 
 
+def _shiftedPoly(poly, d):
+	'''polynomial p(x+d) for given polynomial p(x)'''
+	if d == 0: return poly
+	return poly.shifted(d)
+
+
+def _half(v):
+	return v/2 if isinstance(v, float) else Fraction(v, 2)
+
+
+def _samePieces(snapshot, pieces):
+	'''whether the list pieces still holds exactly the pieces of the tuple snapshot (by identity)'''
+	return snapshot is not None and len(snapshot) == len(pieces) and all(map(operator.is_, snapshot, pieces))
+
+
 class PolyPiece:
-	'''polynomial over interval'''
-	def __init__(self, poly, interval=None):
+	'''polynomial over interval.
+
+	   The polynomial can be stored in local coordinates t = x - shift (see argument origin):
+	   None stores it in global coordinates (shift = 0), 'left' relative to the left endpoint
+	   and 'mid' relative to the midpoint of the interval. Local coordinates keep coefficients
+	   small for intervals far away from 0. The attribute poly always gives the polynomial
+	   in global coordinates, polyLocal the stored polynomial.
+
+	   >>> pp = PolyPiece(Polynomial([-1000, 1]), [1000, 1001], origin='left')
+	   >>> pp.polyLocal, pp.shift
+	   (<Polynomial 'x'>, 1000)
+	   >>> pp.poly
+	   <Polynomial 'x - 1000'>
+	   >>> pp.eval(Fraction(2001, 2))
+	   Fraction(1, 2)
+	'''
+	ORIGINS = (None, 'left', 'mid')
+	# compute the bivariate integrand of convolutions with SparsePolynomial instead of nested polynomials
+	sparseConv = False
+	# use the cached degree specialized kernels of conv_kernels for pieces with number coefficients
+	kernelConv = True
+	# shared instances of interned poly pieces (see intern)
+	_internTable = weakref.WeakValueDictionary()
+
+	def __init__(self, poly, interval=None, origin=None):
 		if interval is None:
 			if isinstance(poly, PolyPiece):
-				self.poly = poly.poly
 				self.interval = poly.interval
+				self._setLocal(poly.polyLocal, poly.shift, poly.origin if origin is None else origin)
 			else:
 				try:
 					poly,interval = poly
 					PolyPiece(poly, interval) # check if arguments are valid
-					self.poly = poly if isinstance(poly,Polynomial) else Polynomial(poly)
-					self.interval = interval
 				except Exception:
 					raise TypeError("PolyPiece cannot be constructed from '%s'" % [poly])
+				self.interval = interval
+				self._setLocal(poly if isinstance(poly,Polynomial) else Polynomial(poly), 0, origin)
 		elif len(interval) == 2 and all([isinstance(n, numbers.Real) for n in interval]):
 			if  interval[1] < interval[0]:
 				raise ValueError("cannot create PolyPiece: invalid interval '%s'" % interval)
-			self.poly = poly if isinstance(poly, Polynomial) else Polynomial(poly)
 			self.interval = interval
+			self._setLocal(poly if isinstance(poly, Polynomial) else Polynomial(poly), 0, origin)
 		else:
 			raise TypeError("cannot create PolyPiece, this is not an interval of reals: '%s'" % interval)
 
 
+	@staticmethod
+	def fromLocal(polyLocal, interval, origin='left', shift=None):
+		'''create poly piece from polynomial given in local coordinates t = x - shift.
+		   If no shift is given, it is determined by origin.
+
+		   >>> pp = PolyPiece.fromLocal(Polynomial([0, 1]), [2, 4], origin='mid', shift=2)
+		   >>> pp.polyLocal, pp.shift
+		   (<Polynomial 'x + 1'>, 3)
+		'''
+		if origin not in PolyPiece.ORIGINS:
+			raise ValueError("invalid origin '%s', expected one of %s" % (origin, PolyPiece.ORIGINS))
+		pp = PolyPiece.__new__(PolyPiece)
+		pp.interval = interval
+		polyLocal = polyLocal if isinstance(polyLocal, Polynomial) else Polynomial(polyLocal)
+		if shift is None: shift = PolyPiece._originShift(interval, origin)
+		pp._setLocal(polyLocal, shift, origin)
+		return pp
+
+
+	@staticmethod
+	def _originShift(interval, origin):
+		'''numeric local origin of interval for given origin mode
+		   (infinite interval ends fall back to the finite end or 0)'''
+		if origin is None: return 0
+		a,b = interval
+		aFinite,bFinite = [abs(v) != float('inf') for v in interval]
+		if origin == 'mid' and aFinite and bFinite:
+			x0 = _half(a+b)
+		elif aFinite:
+			x0 = a
+		else:
+			x0 = b if bFinite else 0
+		if isinstance(x0, Fraction) and x0.denominator == 1: x0 = x0.numerator
+		return x0
+
+
+	def _setLocal(self, polyLocal, shift, origin):
+		if origin not in PolyPiece.ORIGINS:
+			raise ValueError("invalid origin '%s', expected one of %s" % (origin, PolyPiece.ORIGINS))
+		self.origin = origin
+		self.shift = PolyPiece._originShift(self.interval, origin)
+		self.polyLocal = _shiftedPoly(polyLocal, self.shift - shift)
+
+
+	def polyAt(self, shift):
+		'''polynomial of this piece in coordinates t = x - shift'''
+		return _shiftedPoly(self.polyLocal, shift - self.shift)
+
+
+	@property
+	def poly(self):
+		return self.polyLocal if self.shift == 0 else self.polyAt(0)
+
+	@poly.setter
+	def poly(self, poly):
+		self._setLocal(poly if isinstance(poly, Polynomial) else Polynomial(poly), 0, self.origin)
+
+
+	def withOrigin(self, origin):
+		'''return poly piece stored relative to another origin
+
+		   >>> pp = PolyPiece(Polynomial([0, 0, 1]), [3, 5]).withOrigin('left')
+		   >>> pp.polyLocal
+		   <Polynomial 'x^2 + 6x + 9'>
+		   >>> pp.withOrigin(None).polyLocal
+		   <Polynomial 'x^2'>
+		'''
+		return PolyPiece.fromLocal(self.polyLocal, self.interval, origin, self.shift)
+
+
+	def eval(self, x0):
+		'''evaluate polynomial of this piece at x0 (interval is not checked)'''
+		return self.polyLocal.eval(x0 - self.shift if self.shift != 0 else x0)
+
+
+	def evalMulti(self, points):
+		'''evaluate polynomial of this piece at several points (interval is not checked)'''
+		if self.shift != 0:
+			points = [x0-self.shift for x0 in points]
+		return self.polyLocal.evalMulti(points)
+
+
+	def intDef(self, interval=None):
+		'''definite integral of the piece's polynomial over given interval (default: the piece's interval)
+
+		   >>> PolyPiece(Polynomial([0, 1]), [1000, 1001], origin='left').intDef()
+		   Fraction(2001, 2)
+		'''
+		lower,upper = self.interval if interval is None else interval
+		if self.shift != 0:
+			lower,upper = lower-self.shift, upper-self.shift
+		return self.polyLocal.intDef([lower, upper])
+
+
 	@staticmethod
 	def _convLimits(intv1, intv2, xPoly):
 		a1, b1 = intv1
@@ -103,7 +257,9 @@ class PolyPiece:
 
 
 	@staticmethod
-	def _convPolys(tIntervals, f, g, xIdPoly):
+	def _convPolys(tIntervals, f, g, xIdPoly, sparse=False):
+		if sparse:
+			return PolyPiece._convPolys_sparse(tIntervals, f, g, xIdPoly)
 		zName = max(f.varName, g.varName, xIdPoly.varName) + '0'
 		fz = Polynomial(f.coeffs, varName=zName) # "computes" f(z)
 		x_z = Polynomial([xIdPoly,-1], varName=zName) # computes the polynomial x-z
@@ -112,6 +268,25 @@ class PolyPiece:
 		return convPolys
 
 
+	@staticmethod
+	def _convPolys_sparse(tIntervals, f, g, xIdPoly):
+		"""compute convolution pieces with the bivariate integrand f(z)*g(x-z) in sparse representation
+		(f and g must be univariate polynomials with number coefficients)
+		"""
+		xName = xIdPoly.varName
+		zName = xName + '0'
+		fz = SparsePolynomial.fromCoeffs(f.coeffs, zName) # "computes" f(z)
+		x_z = SparsePolynomial.symbol(xName) - SparsePolynomial.symbol(zName)
+		g_xz = SparsePolynomial.fromCoeffs(g.coeffs, zName).subs({zName: x_z})
+		F = (fz*g_xz).intIndef(zName)
+		convPolys = []
+		for lower,upper in tIntervals:
+			p = (F.subs({zName: upper}) - F.subs({zName: lower})).toPolynomial()
+			if p.deg() <= 0: p.varName = xName
+			convPolys.append(p)
+		return convPolys
+
+
 	def conv(self, pp, xName='x'):
 		'''compute convolution
 		   >>> pp0 = PolyPiece(1, [0,1])
@@ -127,18 +302,48 @@ class PolyPiece:
 		     1/6x^3,            x in [0,1]
 		     -1/6x^3 + x - 2/3, x in [1,2]
 		     0, else
+		   >>> pp2 = PolyPiece(p_x, [1000,1001], origin='left')
+		   >>> fpp2 = pp2.conv(pp2)
+		   >>> [(pp.polyLocal, pp.interval) for pp in fpp2.polyPieces[:1]]
+		   [(<Polynomial '1/6x^3 + 1000x^2 + 1000000x'>, [2000, 2001])]
 		'''
-		if self.poly.deg() < pp.poly.deg():
+		if self.polyLocal.deg() < pp.polyLocal.deg():
 			return pp.conv(self)
-
+		if PolyPiece.kernelConv and not PolyPiece.sparseConv and self._isKernelCandidate() and pp._isKernelCandidate():
+			return self._convKernel(pp, xName)
+
+		# convolution is computed in local coordinates:
+		# with x = y + shift1 + shift2 and t = s + shift1 we have
+		# int f(t)g(x-t) dt = int fLocal(s)gLocal(y-s) ds
+		shiftConv = self.shift + pp.shift
+		intv1 = [v-self.shift for v in self.interval] if self.shift != 0 else self.interval
+		intv2 = [v-pp.shift   for v in pp.interval]   if pp.shift   != 0 else pp.interval
 		def xPoly(coeffs): return Polynomial(coeffs, xName)
-		xLimits,tIntervals = PolyPiece._convLimits(self.interval, pp.interval, xPoly)
+		yLimits,tIntervals = PolyPiece._convLimits(intv1, intv2, xPoly)
+		xLimits = [y+shiftConv for y in yLimits] if shiftConv != 0 else yLimits
 
 		xIdPoly = xPoly([0,1])
-		try:    convPolys = PolyPiece._convPolys           (tIntervals, self.poly, pp.poly, xIdPoly)
-		except: convPolys = PolyPiece._convPolys_univariate(tIntervals, self.poly, pp.poly, xIdPoly)
-		#convPolys = PolyPiece._convPolys_univariate(tIntervals, self.poly, pp.poly, xIdPoly)
-		ppl_conv = [PolyPiece(p, xLimits[i:i+2]) for i,p in enumerate(convPolys)]
+		try:    convPolys = PolyPiece._convPolys           (tIntervals, self.polyLocal, pp.polyLocal, xIdPoly, PolyPiece.sparseConv)
+		except: convPolys = PolyPiece._convPolys_univariate(tIntervals, self.polyLocal, pp.polyLocal, xIdPoly)
+		#convPolys = PolyPiece._convPolys_univariate(tIntervals, self.polyLocal, pp.polyLocal, xIdPoly)
+		origin = self.origin if self.origin is not None else pp.origin
+		ppl_conv = [PolyPiece.fromLocal(p, xLimits[i:i+2], origin, shiftConv) for i,p in enumerate(convPolys)]
+		return PolyPieceFunc(ppl_conv)
+
+
+	def _isKernelCandidate(self):
+		return self.polyLocal._hasNumberCoeffs() and all(abs(v) != float('inf') for v in self.interval)
+
+
+	def _convKernel(self, pp, xName):
+		'''convolution with the kernel of conv_kernels for the degrees of both pieces,
+		   computed in coordinates relative to the left interval ends'''
+		(a1,b1),(a2,b2) = self.interval, pp.interval
+		f,g = self.polyAt(a1).coeffs, pp.polyAt(a2).coeffs
+		shiftConv = a1 + a2
+		origin = self.origin if self.origin is not None else pp.origin
+		ppl_conv = [PolyPiece.fromLocal(Polynomial(coeffs, xName), [y0+shiftConv, y1+shiftConv], origin, shiftConv)
+		            for coeffs,(y0,y1) in conv_kernels.convPieces(f, g, b1-a1, b2-a2)]
 		return PolyPieceFunc(ppl_conv)
 
 
@@ -146,6 +351,35 @@ class PolyPiece:
 		return self.conv(pp)
 
 
+	def __eq__(self, pp):
+		'''poly pieces are equal if they have the same interval and polynomial (independent of the origin)
+
+		   >>> PolyPiece(Polynomial([0, 1]), [1, 2]) == PolyPiece(Polynomial([0, 1]), [1, 2], origin='left')
+		   True
+		'''
+		if not isinstance(pp, PolyPiece):
+			return NotImplemented
+		return list(self.interval) == list(pp.interval) and self.polyLocal == pp.polyAt(self.shift)
+
+
+	def __hash__(self):
+		'''hash consistent with == (computed in coordinates relative to the left interval end,
+		   see Polynomial.__hash__ for polynomials with float coefficients)'''
+		return hash((tuple(self.interval), self.polyAt(PolyPiece._originShift(self.interval, 'left'))))
+
+
+	def intern(self):
+		'''return the shared instance of all interned poly pieces with the same interval,
+		   origin and (interned) local polynomial'''
+		polyLocal = self.polyLocal.intern()
+		key = (tuple(self.interval), self.origin, polyLocal.varName, polyLocal._key(typed=True))
+		pp = PolyPiece._internTable.get(key)
+		if pp is None:
+			self.polyLocal = polyLocal
+			PolyPiece._internTable[key] = pp = self
+		return pp
+
+
 	def __str__(self, prec=None):
 		aRepr = Polynomial._coeffRepr(self.interval[0], prec)
 		bRepr = Polynomial._coeffRepr(self.interval[1], prec)
@@ -186,12 +420,132 @@ class PolyPieceFunc:
 	     1, x in [1,2]
 	     0, else
 	'''
-	def __init__(self, *polyPieces):
+	# convolve symmetric functions by computing the left half of the result only (see conv)
+	symmetricConv = True
+	# (breaks, coefficient matrix) the pieces are created from on access (see fromArrays)
+	_arrays = None
+	_arraysPieces = None
+	# tuple of the pieces the arrays correspond to, once the pieces exist (see toArrays)
+	_arraysSnapshot = None
+	# (tuple of the pieces, float interval ends and shifts) for evaluation at floats (see _floatShadow)
+	_shadow = None
+
+	def __init__(self, *polyPieces, origin=None):
 		self.polyPieces = PolyPieceFunc._constructPolyPieces(*polyPieces)
+		if origin is not None:
+			self.polyPieces = [pp.withOrigin(origin) for pp in self.polyPieces]
 		self._normalize()
 		if not self._isConsistent():
 			raise ValueError("inconsistent poly pieces in '%s'" % polyPieces)
 
+	# The pieces of a function created by fromArrays are created on first access of polyPieces.
+	@property
+	def polyPieces(self):
+		if self._arraysPieces is None and self._arrays is not None:
+			self._arraysPieces = self._piecesFromArrays(*self._arrays)
+			self._arraysSnapshot = tuple(self._arraysPieces)
+		return self._arraysPieces if self._arrays is not None else self._polyPieces
+
+	@polyPieces.setter
+	def polyPieces(self, polyPieces):
+		self._polyPieces = polyPieces
+		self._arrays = self._arraysPieces = self._arraysSnapshot = None
+
+
+	@staticmethod
+	def fromArrays(breaks, coeffs, order='descending'):
+		'''create function from arrays as used by scipy.interpolate.PPoly: piece i is the polynomial
+		   sum_k coeffs[k,i] (x - breaks[i])^(n-k) on [breaks[i], breaks[i+1]] (order 'descending')
+		   or sum_k coeffs[k,i] (x - breaks[i])^k (order 'ascending').
+		   The arrays are not copied; the pieces are created on first access to polyPieces and
+		   toArrays returns the same arrays as long as the pieces are not replaced.
+
+		   >>> fpp = PolyPieceFunc.fromArrays(numpy.array([0., 1., 2.]), numpy.array([[1., -1.], [0., 1.]]))
+		   >>> print(fpp)
+		   x |->
+		     x,      x in [0,1]
+		     -x + 2, x in [1,2]
+		     0, else
+		'''
+		if numpy is None:
+			raise ImportError('fromArrays needs numpy')
+		if order not in ('ascending', 'descending'):
+			raise ValueError("invalid order '%s', expected 'ascending' or 'descending'" % order)
+		breaks,coeffs = numpy.asarray(breaks), numpy.asarray(coeffs)
+		if breaks.ndim != 1 or coeffs.ndim != 2 or coeffs.shape[1] != len(breaks)-1:
+			raise ValueError('expected breaks of length m+1 and coefficients of shape (k, m), got %s and %s'
+				% (breaks.shape, coeffs.shape))
+		fpp = PolyPieceFunc()
+		fpp._arrays = (breaks, coeffs if order == 'descending' else coeffs[::-1])
+		return fpp
+
+
+	@staticmethod
+	def _piecesFromArrays(breaks, coeffs):
+		# pieces stored relative to the left interval ends, zero pieces are skipped
+		breaksList = breaks.tolist()
+		pieces = []
+		for i,coeffsLocal in enumerate(coeffs[::-1].T.tolist()):
+			polyLocal = Polynomial(coeffsLocal)
+			if polyLocal == 0 or breaksList[i] == breaksList[i+1]: continue
+			a = breaksList[i]
+			pieces.append(PolyPiece.fromLocal(polyLocal, [a, breaksList[i+1]], 'left', a))
+		return pieces
+
+
+	def toArrays(self, order='descending', dtype=None):
+		'''(breaks, coeffs) as used by scipy.interpolate.PPoly (see fromArrays), gaps between
+		   the pieces become zero pieces. For a function created by fromArrays the original
+		   arrays are returned (without copying) as long as the pieces are not modified (also
+		   in place), otherwise the arrays are built once (with given dtype, default float; use
+		   object for exact coefficients) and cached for the current pieces.
+
+		   >>> fpp = PolyPieceFunc(((Polynomial([0, 1]), [0, 1]), (Polynomial([1]), [2, 3])))
+		   >>> breaks,coeffs = fpp.toArrays()
+		   >>> breaks.tolist(), coeffs.tolist()
+		   ([0.0, 1.0, 2.0, 3.0], [[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+		   >>> PolyPieceFunc.fromArrays(breaks, coeffs).toArrays()[1] is coeffs
+		   True
+		   >>> fpp.polyPieces.append(PolyPiece(1, [3, 4]))
+		   >>> fpp.toArrays()[0].tolist()
+		   [0.0, 1.0, 2.0, 3.0, 4.0]
+		'''
+		if numpy is None:
+			raise ImportError('toArrays needs numpy')
+		if order not in ('ascending', 'descending'):
+			raise ValueError("invalid order '%s', expected 'ascending' or 'descending'" % order)
+		dtype = numpy.dtype(float if dtype is None else dtype)
+		if self._arrays is None or self._arrays[1].dtype != dtype \
+		   or (self._arraysPieces is not None and not _samePieces(self._arraysSnapshot, self._arraysPieces)):
+			pieces = self.polyPieces
+			self._arrays = self._arraysFromPieces(dtype)
+			self._arraysPieces,self._arraysSnapshot = pieces,tuple(pieces)
+		breaks,coeffs = self._arrays
+		return breaks, (coeffs if order == 'descending' else coeffs[::-1])
+
+
+	def _arraysFromPieces(self, dtype):
+		pieces = self.polyPieces
+		if any(abs(v) == float('inf') for pp in pieces for v in pp.interval):
+			raise ValueError('only functions with finite pieces can be converted to arrays')
+		breaks,columns = [],[]
+		for pp in pieces:
+			a,b = pp.interval
+			if breaks and breaks[-1] != a:
+				# gap: zero piece
+				columns.append([])
+				breaks.append(a)
+			elif not breaks:
+				breaks.append(a)
+			columns.append(pp.polyAt(a).coeffs)
+			breaks.append(b)
+		k = max((len(c) for c in columns), default=1)
+		coeffs = numpy.zeros((k, len(columns)), dtype=dtype)
+		for i,c in enumerate(columns):
+			coeffs[k-len(c):,i] = c[::-1]
+		return numpy.array(breaks, dtype=dtype), coeffs
+
+
 	@staticmethod
 	def _constructPolyPieces(*polyPieces):
 		if len(polyPieces) == 0:
@@ -279,8 +633,8 @@ class PolyPieceFunc:
 		for i,pp in enumerate(self.polyPieces):
 			x0 = pp.interval[0]
 			absDiffX = abs(x0 - ppPrev.interval[1])
-			valPrev = ppPrev.poly.eval(x0) if absDiffX <= _precDef(prec, absDiffX) else 0
-			val_x0 = pp.poly.eval(x0)
+			valPrev = ppPrev.eval(x0) if absDiffX <= _precDef(prec, absDiffX) else 0
+			val_x0 = pp.eval(x0)
 			absDiffY = abs(val_x0 - valPrev)
 			if absDiffY > _precDef(prec, absDiffY):
 				if printFailReason:
@@ -307,15 +661,21 @@ class PolyPieceFunc:
 		   >>> fpp._selectPP(2)
 		   (<Polynomial '2x'>, 1)
 		'''
-		if idxStart >= len(self.polyPieces):          return Polynomial(),idxStart
-		if x0 < self.polyPieces[idxStart].interval[0]: return Polynomial(),idxStart
+		pp,idx = self._selectPiece(x0, idxStart)
+		return (Polynomial() if pp is None else pp.poly), idx
+
+
+	def _selectPiece(self, x0, idxStart=0):
+		'''return (first) poly piece containing x0 in its definition range (None if there is none)'''
+		if idxStart >= len(self.polyPieces):          return None,idxStart
+		if x0 < self.polyPieces[idxStart].interval[0]: return None,idxStart
 		for i,pp in enumerate(self.polyPieces[idxStart:]):
-			intv,pi = pp.interval, pp.poly
+			intv = pp.interval
 			if intv[0] > x0:
-				return Polynomial(), idxStart+i
+				return None, idxStart+i
 			if x0 <= intv[1]:
-				return pi, idxStart+i
-		return Polynomial(), idxStart+len(self.polyPieces)
+				return pp, idxStart+i
+		return None, idxStart+len(self.polyPieces)
 
 
 	def eval(self, x0):
@@ -340,8 +700,116 @@ class PolyPieceFunc:
 		   0
 		'''
 		assert isinstance(x0, numbers.Number)
-		poly, _ = self._selectPP(x0)
-		return poly.eval(x0)
+		if isinstance(x0, float):
+			idx = self._pieceIndexFloat(x0)
+			return 0 if idx is None else self.polyPieces[idx].polyLocal.eval(x0 - self._floatShadow()[2][idx])
+		pp, _ = self._selectPiece(x0)
+		return 0 if pp is None else pp.eval(x0)
+
+
+	def _floatShadow(self):
+		'''float copies of the interval ends and shifts of the pieces: (starts, ends, shifts, inexact),
+		   where inexact lists the indices of the ends not representable as floats.
+		   The shadow is cached with a snapshot of the pieces and recomputed if a piece of
+		   polyPieces has been replaced, added or removed (also in place).
+
+		   >>> fpp = PolyPieceFunc([PolyPiece(1, [0, 1]), PolyPiece(2, [1, 2])])
+		   >>> fpp.eval(1.5)
+		   2.0
+		   >>> fpp.polyPieces[1] = PolyPiece(3, [1, 2])
+		   >>> fpp.eval(1.5)
+		   3.0
+		'''
+		pieces = self.polyPieces
+		if self._shadow is None or not _samePieces(self._shadow[0], pieces):
+			starts = [float(pp.interval[0]) for pp in pieces]
+			ends = [float(pp.interval[1]) for pp in pieces]
+			shifts = [float(pp.shift) for pp in pieces]
+			inexact = {i for i,pp in enumerate(pieces) if starts[i] != pp.interval[0] or ends[i] != pp.interval[1]}
+			self._shadow = tuple(pieces), (starts, ends, shifts, inexact)
+		return self._shadow[1]
+
+
+	def _pieceIndexFloat(self, x0):
+		'''index of the (first) piece containing the float x0 (None if there is none),
+		   found by bisection of the float interval ends; exact comparisons are only needed
+		   for interval ends that are not representable as floats'''
+		starts,ends,_,inexact = self._floatShadow()
+		idx = bisect.bisect_left(ends, x0)
+		if idx in inexact and idx < len(ends) and x0 > self.polyPieces[idx].interval[1]:
+			idx += 1
+		if idx-1 in inexact and x0 <= self.polyPieces[idx-1].interval[1]:
+			idx -= 1
+		if idx == len(ends): return None
+		if idx in inexact:
+			return idx if x0 >= self.polyPieces[idx].interval[0] else None
+		return idx if x0 >= starts[idx] else None
+
+
+	def evalMulti(self, points):
+		'''evaluate at several numbers; each piece evaluates all points falling into it at once
+
+		   >>> fpp = PolyPieceFunc([PolyPiece(Polynomial([0,1]), [-1,1]), PolyPiece(Polynomial([0,2]), [1,2])])
+		   >>> fpp.evalMulti([2, -2, 0.5, 1.5])
+		   [4, 0, 0.5, 3.0]
+		'''
+		points = list(points)
+		values = [0]*len(points)
+		pointsPerPiece = {}
+		idx = 0
+		for i in sorted(range(len(points)), key=points.__getitem__):
+			pp,idx = self._selectPiece(points[i], idx)
+			if pp is not None:
+				pointsPerPiece.setdefault(idx, []).append(i)
+		for idx,indices in pointsPerPiece.items():
+			ppValues = self.polyPieces[idx].evalMulti([points[i] for i in indices])
+			for i,v in zip(indices, ppValues):
+				values[i] = v
+		return values
+
+
+	@staticmethod
+	@functools.lru_cache(maxsize=64)
+	def _compilePieces(piecesKey, floatCoeffs):
+		constants = {'bisect_left': bisect.bisect_left}
+		lines = []
+		starts,ends = [],[]
+		for i,(interval,shift,coeffsKey) in enumerate(piecesKey):
+			starts.append(interval[0])
+			ends.append(interval[1])
+			lines.append('def _piece%d(x):' % i)
+			if shift != 0:
+				constants['_shift%d' % i] = float(shift) if floatCoeffs else shift
+				lines.append('\tx = x - _shift%d' % i)
+			lines += Polynomial._hornerCode([c for _,c in coeffsKey], 'x', constants, floatCoeffs)
+			lines.append('\treturn v')
+		constants['_starts'], constants['_ends'] = starts, ends
+		lines += ['_pieces = (%s)' % ''.join('_piece%d, ' % i for i in range(len(piecesKey))),
+			'def _fpp(x):',
+			'\ti = bisect_left(_ends, x)',
+			'\tif i == %d or x < _starts[i]: return 0' % len(piecesKey),
+			'\treturn _pieces[i](x)']
+		exec('\n'.join(lines), constants)
+		return constants['_fpp']
+
+
+	def compile(self, floatCoeffs=False):
+		'''generate a Python function evaluating this piecewise polynomial function:
+		   the piece is selected by bisection, each piece is evaluated by straight-line
+		   Horner code (in the piece's local coordinates), optionally with coefficients
+		   converted to float. Generated functions are cached by pieces.
+
+		   >>> fpp = PolyPieceFunc([PolyPiece(Polynomial([0,1]), [-1,1]), PolyPiece(Polynomial([0,2]), [1,2])])
+		   >>> f = fpp.compile()
+		   >>> [f(x0) for x0 in [-2, -1, -0.5, 1, 1.5, 2, 2.1]]
+		   [0, -1, -0.5, 1, 3.0, 4, 0]
+		'''
+		for pp in self.polyPieces:
+			if not pp.polyLocal._hasNumberCoeffs():
+				raise ValueError("only univariate pieces with number coefficients can be compiled, '%s' given" % pp)
+		piecesKey = tuple((tuple(pp.interval), pp.shift, tuple((type(c),c) for c in pp.polyLocal.coeffs))
+			for pp in self.polyPieces)
+		return PolyPieceFunc._compilePieces(piecesKey, floatCoeffs)
 
 
 	def comp(self, p):
@@ -372,9 +840,17 @@ class PolyPieceFunc:
 		fppComp = PolyPieceFunc()
 		for pp in self.polyPieces:
 			aComp,bComp = [(border-d)*scaleFacIntv for border in pp.interval]
+			aComp,bComp = [v.numerator if isinstance(v, Fraction) and v.denominator == 1 else v for v in (aComp, bComp)]
 			if k < 0:
 				aComp,bComp = bComp, aComp
-			ppComp = PolyPiece(pp.poly(p), [aComp, bComp])
+			# in local coordinates: x = y + shiftComp, f(kx+d) = fLocal(ky + k*shiftComp + d - shift)
+			shiftComp = PolyPiece._originShift([aComp, bComp], pp.origin)
+			dLocal = k*shiftComp + d - pp.shift
+			if pp.polyLocal.varName == p.varName:
+				polyComp = pp.polyLocal.affine(k, dLocal)
+			else:
+				polyComp = pp.polyLocal(Polynomial([dLocal, k], p.varName))
+			ppComp = PolyPiece.fromLocal(polyComp, [aComp, bComp], pp.origin, shiftComp)
 			fppComp.polyPieces.append(ppComp)
 		if k < 0:
 			fppComp.polyPieces.reverse()
@@ -396,7 +872,21 @@ class PolyPieceFunc:
 
 	# remove intervals with 0-polynomials
 	def _normalize(self):
-		self.polyPieces = [pp for pp in self.polyPieces if pp.poly != 0 and pp.interval[0] != pp.interval[1]]
+		self.polyPieces = [pp for pp in self.polyPieces if pp.polyLocal != 0 and pp.interval[0] != pp.interval[1]]
+
+
+	def withOrigin(self, origin):
+		'''return function with all pieces stored relative to given origin (see PolyPiece)
+
+		   >>> fpp = PolyPieceFunc((Polynomial([-10, 1]), [10, 11]), origin='left')
+		   >>> fpp.polyPieces[0].polyLocal
+		   <Polynomial 'x'>
+		   >>> fpp.withOrigin(None).polyPieces[0].polyLocal
+		   <Polynomial 'x - 10'>
+		'''
+		fpp = PolyPieceFunc()
+		fpp.polyPieces = [pp.withOrigin(origin) for pp in self.polyPieces]
+		return fpp
 
 
 	def _binArithOp(self, op2, opFunc):
@@ -419,12 +909,17 @@ class PolyPieceFunc:
 		for i,xi in enumerate(xl[:-1]):
 			xi_1 = xl[i+1]
 			x = 0.5*(xi+xi_1)
-			p1,i1 = self._selectPP(x, i1)
+			pp1,i1 = self._selectPiece(x, i1)
+			pp2,i2 = op2._selectPiece(x, i2) if isinstance(op2, PolyPieceFunc) else (None,i2)
+			# operands are combined in the local coordinates of the resulting piece
+			origin = pp1.origin if pp1 is not None else pp2.origin if pp2 is not None else None
+			shift = PolyPiece._originShift([xi,xi_1], origin)
+			p1 = Polynomial() if pp1 is None else pp1.polyAt(shift)
 			if isinstance(op2, PolyPieceFunc):
-				p2,i2 = op2._selectPP(x, i2)
+				p2 = Polynomial() if pp2 is None else pp2.polyAt(shift)
 			else:
-				p2 = op2
-			ppl_res.append(PolyPiece(opFunc(p1,p2), [xi,xi_1]))
+				p2 = _shiftedPoly(op2, shift) if isinstance(op2, Polynomial) else op2
+			ppl_res.append(PolyPiece.fromLocal(opFunc(p1,p2), [xi,xi_1], origin, shift))
 		return PolyPieceFunc(ppl_res)
 
 
@@ -586,7 +1081,7 @@ class PolyPieceFunc:
 		# derivative of constant polynomial is the zero polynomial
 		fDer = PolyPieceFunc()
 		for pp in self.polyPieces:
-			fDer.polyPieces.append(PolyPiece(pp.poly.der(), pp.interval))
+			fDer.polyPieces.append(PolyPiece.fromLocal(pp.polyLocal.der(), pp.interval, pp.origin, pp.shift))
 		return fDer
 
 
@@ -613,14 +1108,22 @@ class PolyPieceFunc:
 		for pp in self.polyPieces:
 			if pp.interval[0] > interval[1]: break
 			if pp.interval[1] < interval[0]: continue
-			intVal += pp.poly.intDef([max(interval[0], pp.interval[0]),
-			                          min(interval[1], pp.interval[1])])
+			intVal += pp.intDef([max(interval[0], pp.interval[0]),
+			                     min(interval[1], pp.interval[1])])
 		if isinstance(intVal, Fraction) and intVal.denominator == 1: intVal = intVal.numerator
 		return intVal
 
 
-	def conv(self, fpp, xName='x'):
+	def conv(self, fpp, xName='x', intern=False, method='pieces', window=None):
 		'''compute convolution int(-inf,inf) f(t)g(x-t)dt
+		   (with intern=True the pieces of the result are interned, see intern).
+		   method 'pieces' sums the convolutions of all piece pairs, 'modular' computes
+		   the exact result for rational data by modular arithmetic (see modular_conv),
+		   'fft' an approximation with floats (see convApprox, which also gives an error estimate).
+		   If both functions are symmetric (see symmetryCenter), method 'pieces' only computes
+		   the left half of the result and mirrors it (unless symmetricConv is switched off).
+		   With window=(lo, hi) the result is restricted to [lo, hi]; method 'pieces' then
+		   skips the piece pairs whose convolution vanishes on the window.
 
 		   >>> pdf0 = PolyPieceFunc(PolyPiece(1,[0,1]))
 		   >>> pdf1 = pdf0.conv(pdf0)
@@ -653,14 +1156,228 @@ class PolyPieceFunc:
 
 		   >> [pdf3(x) for x in [0,1,2,3,4]]
 		'''
-		# (Sum_i fi) * (Sum_i gi) = Sum_i Sum_j fi * gj
+		if method in ('modular', 'fft'):
+			fpp_conv = self._convModular(fpp, xName) if method == 'modular' else self.convApprox(fpp, xName=xName)[0]
+			if window is not None:
+				fpp_conv = fpp_conv._restricted(*window)
+		elif method == 'pieces':
+			c1,c2 = (self.symmetryCenter(), fpp.symmetryCenter()) if PolyPieceFunc.symmetricConv and window is None else (None, None)
+			if window is not None:
+				fpp_conv = self._convWindow(fpp, window, xName)
+			elif c1 is not None and c2 is not None:
+				fpp_conv = self._convSymmetric(fpp, c1+c2, xName)
+			else:
+				# (Sum_i fi) * (Sum_i gi) = Sum_i Sum_j fi * gj
+				fpp_conv = PolyPieceFunc()
+				for pp1 in self.polyPieces:
+					for pp2 in fpp.polyPieces:
+						fpp_conv += pp1.conv(pp2, xName)
+		else:
+			raise ValueError("unknown convolution method '%s'" % method)
+		return fpp_conv.intern() if intern else fpp_conv
+
+
+	def symmetryCenter(self):
+		'''center c with f(c - t) = f(c + t) for all t, if the function is symmetric
+		   (translated even function with finite support), else None
+
+		   >>> from Polynomial import symbol
+		   >>> x = symbol()
+		   >>> PolyPieceFunc(((x - 1, [1, 2]), (3 - x, [2, 3]))).symmetryCenter()
+		   2
+		   >>> PolyPieceFunc(PolyPiece(1, [0, 1])).symmetryCenter()
+		   Fraction(1, 2)
+		   >>> PolyPieceFunc(((x, [0, 1]), (1, [1, 2]))).symmetryCenter() is None
+		   True
+		'''
+		pieces = self.polyPieces
+		if not pieces: return None
+		a,b = pieces[0].interval[0], pieces[-1].interval[1]
+		if abs(a) == float('inf') or abs(b) == float('inf'): return None
+		c = PolyPiece._originShift([a, b], 'mid')
+		mirrorPairs = list(zip(pieces[:(len(pieces)+1)//2], reversed(pieces)))
+		# compare the intervals first, then the polynomials in coordinates t = x - c
+		if any(pp1.interval[0] + pp2.interval[1] != a+b or pp1.interval[1] + pp2.interval[0] != a+b
+		       for pp1,pp2 in mirrorPairs):
+			return None
+		for pp1,pp2 in mirrorPairs:
+			coeffs1,coeffs2 = pp1.polyAt(c).coeffs, pp2.polyAt(c).coeffs
+			if len(coeffs1) != len(coeffs2): return None
+			if any(c1 != (c2 if k % 2 == 0 else -c2) for k,(c1,c2) in enumerate(zip(coeffs1, coeffs2))):
+				return None
+		return c
+
+
+	def _restricted(self, lower, upper):
+		'''function restricted to [lower, upper] (pieces are clipped)'''
+		fpp = PolyPieceFunc()
+		for pp in self.polyPieces:
+			a,b = pp.interval
+			if b <= lower or a >= upper: continue
+			if a < lower or b > upper:
+				pp = PolyPiece.fromLocal(pp.polyLocal, [max(a, lower), min(b, upper)], pp.origin, pp.shift)
+			fpp.polyPieces.append(pp)
+		return fpp
+
+
+	def _convSymmetric(self, fpp, c, xName='x'):
+		'''convolution of symmetric functions, which is symmetric about the sum c of their centers:
+		   only the piece pairs contributing to x < c are convolved, the right half is mirrored
+
+		   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1]))
+		   >>> pdf1 = PolyPieceFunc(PolyPiece(1, [0, 2]))
+		   >>> [(pp.poly, pp.interval) for pp in pdf0._convSymmetric(pdf1, Fraction(3, 2)).polyPieces]
+		   [(<Polynomial 'x'>, [0, 1]), (<Polynomial '1'>, [1, 2]), (<Polynomial '-x + 3'>, [2, 3])]
+		'''
+		if isinstance(c, Fraction) and c.denominator == 1: c = c.numerator
+		left = PolyPieceFunc()
+		for pp1 in self.polyPieces:
+			for pp2 in fpp.polyPieces:
+				if pp1.interval[0] + pp2.interval[0] < c:
+					left += pp1.conv(pp2, xName)._restricted(-float('inf'), c)
+		right = left.comp(Polynomial([2*c, -1], xName))
+		fpp_conv = PolyPieceFunc()
+		fpp_conv.polyPieces = PolyPieceFunc._joinMirrored(left.polyPieces, right.polyPieces, c)
+		return fpp_conv
+
+
+	@staticmethod
+	def _joinMirrored(left, right, c):
+		'''pieces of the left half and its mirror image at c, where the pieces next to c are
+		   joined if they meet at c and have the same polynomial (c is no break point)
+
+		   >>> from Polynomial import symbol
+		   >>> x = symbol()
+		   >>> p = (x - 2)**2 - 1 # symmetric about 2
+		   >>> [pp.interval for pp in PolyPieceFunc._joinMirrored([PolyPiece(p, [0, 2])], [PolyPiece(p, [2, 4])], 2)]
+		   [[0, 4]]
+		   >>> [pp.interval for pp in PolyPieceFunc._joinMirrored([PolyPiece(p, [0, 1])], [PolyPiece(p, [3, 4])], 2)]
+		   [[0, 1], [3, 4]]
+		'''
+		if left and right and left[-1].interval[1] == c == right[0].interval[0] and left[-1].polyAt(c) == right[0].polyAt(c):
+			ppLeft = left[-1]
+			joined = PolyPiece.fromLocal(ppLeft.polyLocal, [ppLeft.interval[0], right[0].interval[1]], ppLeft.origin, ppLeft.shift)
+			return left[:-1] + [joined] + right[1:]
+		return left + right
+
+
+	def _convWindow(self, fpp, window, xName='x'):
+		'''convolution restricted to the window [lo, hi]: the convolution of pieces on [a1,b1] and [a2,b2]
+		   vanishes outside of [a1+a2, b1+b2], the pairs for which this interval misses the window are skipped
+
+		   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1]))
+		   >>> pdf2 = pdf0.conv(pdf0).conv(pdf0, window=(2, 5))
+		   >>> [(pp.poly, pp.interval) for pp in pdf2.polyPieces]
+		   [(<Polynomial '1/2x^2 - 3x + 9/2'>, [2, 3])]
+		'''
+		lo,hi = window
 		fpp_conv = PolyPieceFunc()
 		for pp1 in self.polyPieces:
+			(a1,b1) = pp1.interval
 			for pp2 in fpp.polyPieces:
-				fpp_conv += pp1.conv(pp2, xName)
+				(a2,b2) = pp2.interval
+				if a1+a2 >= hi or b1+b2 <= lo: continue
+				fpp_conv += pp1.conv(pp2, xName)._restricted(lo, hi)
 		return fpp_conv
 
 
+	def convAt(self, fpp, x0):
+		'''value of the convolution with fpp at x0 computed as sum of the integrals
+		   int f(t)g(x0-t) dt over the piece pairs (without computing the convolution)
+
+		   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1]))
+		   >>> pdf1 = pdf0.conv(pdf0)
+		   >>> pdf1.convAt(pdf0, Fraction(3, 2)), pdf1.conv(pdf0).eval(Fraction(3, 2))
+		   (Fraction(3, 4), Fraction(3, 4))
+		'''
+		res = 0
+		for pp1 in self.polyPieces:
+			a1,b1 = pp1.interval
+			for pp2 in fpp.polyPieces:
+				a2,b2 = pp2.interval
+				lower,upper = max(a1, x0-b2), min(b1, x0-a2)
+				if lower >= upper: continue
+				# in local coordinates s = t - shift1 of the first piece:
+				# g(x0 - t) = gLocal(x0 - shift1 - shift2 - s)
+				gMirrored = pp2.polyLocal.affine(-1, x0 - pp1.shift - pp2.shift)
+				res += (pp1.polyLocal*gMirrored).intDef([lower-pp1.shift, upper-pp1.shift])
+		if isinstance(res, Fraction) and res.denominator == 1: res = res.numerator
+		return res
+
+
+	def lazy(self):
+		'''this function as leaf of a lazily evaluated expression (see LazyPolyPieceFunc)'''
+		return LazyPolyPieceFunc._node('leaf', (self,))
+
+
+	def tailProb(self, t, fpp=None):
+		'''tail probability P(X > t) for the density f of X, or P(X + Y > t) for independent X, Y
+		   with densities f and fpp (only the convolution on [t, inf) is computed, see conv)
+
+		   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1]))
+		   >>> pdf0.tailProb(Fraction(1, 4))
+		   Fraction(3, 4)
+		   >>> pdf0.conv(pdf0).tailProb(2, pdf0)
+		   Fraction(1, 6)
+		'''
+		density = self if fpp is None else self.conv(fpp, window=(t, float('inf')))
+		return density.intDef([t, float('inf')])
+
+
+	def _localPieces(self):
+		# list of (coefficients relative to the left interval end, interval) as used by modular_conv and fft_conv
+		return [(pp.polyAt(pp.interval[0]).coeffs, list(pp.interval)) for pp in self.polyPieces]
+
+
+	def _convModular(self, fpp, xName='x'):
+		'''exact convolution by modular arithmetic
+
+		   >>> pdf0 = PolyPieceFunc(PolyPiece(1,[0,1]))
+		   >>> pdf1 = pdf0._convModular(pdf0)
+		   >>> [(pp.poly, pp.interval) for pp in pdf1.polyPieces]
+		   [(<Polynomial 'x'>, [0, 1]), (<Polynomial '-x + 2'>, [1, 2])]
+		'''
+		origins = [pp.origin for pp in self.polyPieces + fpp.polyPieces if pp.origin is not None]
+		origin = origins[0] if origins else None
+		pieces = modular_conv.convPieces(self._localPieces(), fpp._localPieces())
+		return PolyPieceFunc([PolyPiece.fromLocal(Polynomial(coeffs, xName), intv, origin, intv[0]) for coeffs,intv in pieces])
+
+
+	def convApprox(self, fpp, h=None, deg=1, grid=False, xName='x'):
+		'''approximate convolution by FFT on a grid with step h (see fft_conv), returns
+		   (result, error estimate) with the result as piecewise polynomial function of degree deg >= 1
+		   interpolating the grid values (adjacent pieces with the same polynomial are merged)
+		   or with grid=True as pair of NumPy arrays (xs, values); the error estimate covers
+		   the grid values and the interpolation (see fft_conv.convPieces)
+
+		   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1]))
+		   >>> pdf1,err = pdf0.convApprox(pdf0, h=0.25)
+		   >>> len(pdf1.polyPieces), abs(pdf1.eval(0.5) - 0.5) < 1e-12, round(err, 12)
+		   (2, True, 0.25)
+		   >>> len(pdf0.conv(pdf0, method='fft').polyPieces)
+		   2
+		'''
+		res,err = fft_conv.convPieces(self._localPieces(), fpp._localPieces(), h, deg, grid)
+		if grid:
+			return res, err
+		origins = [pp.origin for pp in self.polyPieces + fpp.polyPieces if pp.origin is not None]
+		origin = origins[0] if origins else None
+		return PolyPieceFunc([PolyPiece.fromLocal(Polynomial(coeffs, xName), intv, origin, intv[0]) for coeffs,intv in res]), err
+
+
+	def intern(self):
+		'''replace the pieces by their interned instances (see PolyPiece.intern), so that
+		   identical pieces of several functions share one object; returns self
+
+		   >>> fpp1 = PolyPieceFunc((Polynomial([0, 1]), [0, 1])).intern()
+		   >>> fpp2 = PolyPieceFunc((Polynomial([0, 1]), [0, 1])).intern()
+		   >>> fpp1.polyPieces[0] is fpp2.polyPieces[0]
+		   True
+		'''
+		self.polyPieces = [pp.intern() for pp in self.polyPieces]
+		return self
+
+
 	def __xor__(self, fpp):
 		return self.conv(fpp)
 
@@ -685,6 +1402,460 @@ class PolyPieceFunc:
 		return 'x |->\n' + indent + ('\n'+indent).join(pieceReprs) + '\n' + indent + '0, else'
 
 
+
+class ConvolutionTree:
+	'''density of a sum of independent random variables, which supports replacing, adding
+	   and removing summands with O(log n) convolutions.
+
+	   The densities of the summands are the leaves of a complete binary tree, each inner
+	   node holds the convolution of its children and the root the density of the sum.
+	   The tree is stored as list of levels (levels[0] are the leaves, levels[-1] is [root]),
+	   None stands for an empty slot (the identity of the convolution). Slots of removed
+	   summands are reused by append (smallest index first), so the tree only grows with
+	   the number of summands present at the same time.
+	   Keyword arguments are passed on to PolyPieceFunc.conv (e.g. method).
+
+	   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1]))
+	   >>> tree = ConvolutionTree([pdf0, pdf0, pdf0])
+	   >>> (tree.density() - pdf0.conv(pdf0).conv(pdf0)).polyPieces
+	   []
+	   >>> tree.replace(1, pdf0*2/2)
+	   >>> tree.append(pdf0)
+	   3
+	   >>> tree.remove(0)
+	   >>> len(tree), tree.density().intDef()
+	   (3, 1)
+	   >>> tree.density().polyPieces[-1].interval
+	   [2, 3]
+	   >>> tree.append(pdf0)
+	   0
+	'''
+	def __init__(self, fpps=(), **convArgs):
+		self.convArgs = convArgs
+		leaves = list(fpps)
+		capacity = 1
+		while capacity < len(leaves): capacity *= 2
+		self._levels = [leaves + [None]*(capacity-len(leaves))]
+		while len(self._levels[-1]) > 1:
+			lower = self._levels[-1]
+			self._levels.append([self._combine(lower[i], lower[i+1]) for i in range(0, len(lower), 2)])
+		self._size = len(leaves)
+		# heap of the indices below _size of empty slots
+		self._free = [idx for idx,fpp in enumerate(leaves) if fpp is None]
+
+
+	def _combine(self, fpp1, fpp2):
+		if fpp1 is None: return fpp2
+		if fpp2 is None: return fpp1
+		return fpp1.conv(fpp2, **self.convArgs)
+
+
+	def _update(self, idx):
+		# recompute the nodes on the path from leaf idx to the root
+		for k in range(1, len(self._levels)):
+			idx //= 2
+			lower = self._levels[k-1]
+			self._levels[k][idx] = self._combine(lower[2*idx], lower[2*idx+1])
+
+
+	def __len__(self):
+		'''number of summands'''
+		return self._size - len(self._free)
+
+
+	def __getitem__(self, idx):
+		return self._levels[0][idx]
+
+
+	def density(self):
+		'''density of the sum (None if there are no summands)'''
+		return self._levels[-1][0]
+
+
+	def replace(self, idx, fpp):
+		'''replace the summand with index idx'''
+		if not 0 <= idx < self._size:
+			raise IndexError("no summand with index %d" % idx)
+		leaves = self._levels[0]
+		if leaves[idx] is None and fpp is not None:
+			self._free.remove(idx)
+			heapq.heapify(self._free)
+		elif leaves[idx] is not None and fpp is None:
+			heapq.heappush(self._free, idx)
+		leaves[idx] = fpp
+		self._update(idx)
+
+
+	def remove(self, idx):
+		'''remove the summand with index idx (the indices of the other summands do not change)'''
+		self.replace(idx, None)
+
+
+	def append(self, fpp):
+		'''add a summand, return its index: the smallest index of a removed summand if any,
+		   else the next index; if the tree is full, its capacity is doubled by adding
+		   a level above the root'''
+		if not self._free:
+			if self._size == len(self._levels[0]):
+				for level in self._levels:
+					level += [None]*len(level)
+				self._levels.append([self._levels[-1][0]])
+			self._size += 1
+			heapq.heappush(self._free, self._size-1)
+		idx = self._free[0]
+		self.replace(idx, fpp)
+		return idx
+
+
+
+class LazyPolyPieceFunc:
+	'''node of a lazily evaluated expression of piecewise polynomial functions.
+
+	   The operators ^ (convolution), +, * and comp build a DAG instead of computing the result.
+	   Equal subexpressions are represented by the same node (common subexpression elimination)
+	   and each node computes its function at most once (materialize). eval computes the value
+	   of a convolution at a point from its operands (see PolyPieceFunc.convAt) without computing
+	   the convolution itself; operands which are convolutions are only computed on the window
+	   that contributes to the value (other operations are materialized).
+
+	   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1])).lazy()
+	   >>> pdf1 = PolyPieceFunc(PolyPiece(Polynomial([0, 2]), [0, 1])).lazy()
+	   >>> expr = (pdf0 ^ pdf1) ^ pdf0
+	   >>> (pdf1 ^ pdf0) is (pdf0 ^ pdf1)
+	   True
+	   >>> expr.eval(Fraction(3, 2))
+	   Fraction(3, 4)
+	   >>> expr.materialize().eval(Fraction(3, 2))
+	   Fraction(3, 4)
+	   >>> [str((2*expr + 1).eval(x0)) for x0 in (3, 4)]
+	   ['1', '0']
+	'''
+	# live nodes by key (operation and operands)
+	_nodes = weakref.WeakValueDictionary()
+
+	@staticmethod
+	def _node(op, args):
+		# node for op and args, shared with an existing equal node
+		if op in ('^', '+', '*') and all(isinstance(a, LazyPolyPieceFunc) for a in args):
+			args = tuple(sorted(args, key=id))
+		key = (op,) + tuple(id(a) if isinstance(a, (LazyPolyPieceFunc, PolyPieceFunc)) else (type(a), a) for a in args)
+		node = LazyPolyPieceFunc._nodes.get(key)
+		if node is None:
+			node = LazyPolyPieceFunc.__new__(LazyPolyPieceFunc)
+			node.op,node.args,node._value = op,args,None
+			LazyPolyPieceFunc._nodes[key] = node
+		return node
+
+
+	@staticmethod
+	def _operand(op2):
+		if isinstance(op2, PolyPieceFunc): return op2.lazy()
+		if isinstance(op2, (LazyPolyPieceFunc, numbers.Number, Polynomial)): return op2
+		raise ValueError("arithmetic operator of invalid type '%s'" % type(op2))
+
+
+	def __xor__(self, fpp):
+		fpp = LazyPolyPieceFunc._operand(fpp)
+		if not isinstance(fpp, LazyPolyPieceFunc):
+			raise ValueError("convolution with invalid type '%s'" % type(fpp))
+		return LazyPolyPieceFunc._node('^', (self, fpp))
+
+
+	def __add__(self, op2):
+		return LazyPolyPieceFunc._node('+', (self, LazyPolyPieceFunc._operand(op2)))
+
+
+	def __radd__(self, op1):
+		return self.__add__(op1)
+
+
+	def __mul__(self, op2):
+		return LazyPolyPieceFunc._node('*', (self, LazyPolyPieceFunc._operand(op2)))
+
+
+	def __rmul__(self, op1):
+		return self.__mul__(op1)
+
+
+	def comp(self, p):
+		'''composition with a linear polynomial p (see PolyPieceFunc.comp), for a number p the value at p'''
+		if isinstance(p, numbers.Number):
+			return self.eval(p)
+		if isinstance(p, Polynomial) and p.deg() == 0:
+			return self.eval(p.coeffs[0])
+		return LazyPolyPieceFunc._node('comp', (self, p))
+
+
+	def __call__(self, poly):
+		return self.comp(poly)
+
+
+	def materialize(self):
+		'''the function (PolyPieceFunc) of this node, computed once'''
+		if self._value is None:
+			args = [a.materialize() if isinstance(a, LazyPolyPieceFunc) else a for a in self.args]
+			if self.op == 'leaf':
+				self._value = args[0]
+			elif self.op == '^':
+				self._value = args[0].conv(args[1])
+			elif self.op == '+':
+				self._value = args[0] + args[1]
+			elif self.op == '*':
+				self._value = args[0] * args[1]
+			else:
+				self._value = args[0].comp(args[1])
+		return self._value
+
+
+	def _support(self):
+		'''interval outside of which the function vanishes (None if it vanishes everywhere)'''
+		if self._value is not None or self.op == 'leaf':
+			pieces = self.materialize().polyPieces
+			return [pieces[0].interval[0], pieces[-1].interval[1]] if pieces else None
+		supp = [a._support() if isinstance(a, LazyPolyPieceFunc) else a for a in self.args]
+		if self.op == '^':
+			return None if None in supp else [supp[0][0]+supp[1][0], supp[0][1]+supp[1][1]]
+		if self.op == 'comp':
+			if supp[0] is None: return None
+			d,k = self.args[1].coeffs
+			try:
+				scaleFac = Fraction(1, k)
+			except TypeError:
+				scaleFac = 1/k
+			supp = [(v-d)*scaleFac for v in supp[0]]
+			return sorted(v.numerator if isinstance(v, Fraction) and v.denominator == 1 else v for v in supp)
+		if not isinstance(self.args[1], LazyPolyPieceFunc):
+			# a constant summand is added on the support of the function, a factor 0 gives 0
+			return None if self.op == '*' and self.args[1] == 0 else supp[0]
+		supp = [s for s in supp if s is not None]
+		if self.op == '+':
+			return [min(s[0] for s in supp), max(s[1] for s in supp)] if supp else None
+		if len(supp) < 2 or max(s[0] for s in supp) > min(s[1] for s in supp): return None
+		return [max(s[0] for s in supp), min(s[1] for s in supp)]
+
+
+	def _onWindow(self, lower, upper):
+		'''the function restricted to [lower, upper]; a convolution is computed only on the window
+		   from its operands restricted to the parts that contribute to it (see PolyPieceFunc.conv)'''
+		if lower >= upper:
+			return PolyPieceFunc()
+		if self._value is not None or self.op != '^':
+			return self.materialize()._restricted(lower, upper)
+		a,b = self.args
+		suppA,suppB = a._support(), b._support()
+		if suppA is None or suppB is None:
+			return PolyPieceFunc()
+		fppA = a._onWindow(max(lower - suppB[1], suppA[0]), min(upper - suppB[0], suppA[1]))
+		fppB = b._onWindow(max(lower - suppA[1], suppB[0]), min(upper - suppA[0], suppB[1]))
+		return fppA.conv(fppB, window=(lower, upper))
+
+
+	def eval(self, x0):
+		'''value at the number x0; convolutions are evaluated by PolyPieceFunc.convAt from their
+		   operands on the windows contributing to x0 (nested convolutions are not materialized)
+
+		   >>> pdf0 = PolyPieceFunc(PolyPiece(1, [0, 1])).lazy()
+		   >>> expr = (pdf0 ^ pdf0) ^ pdf0
+		   >>> expr.eval(Fraction(1, 2)), (pdf0 ^ pdf0)._value is None
+		   (Fraction(1, 8), True)
+		'''
+		if self._value is not None or self.op == 'leaf':
+			return self.materialize().eval(x0)
+		a,b = self.args
+		if self.op == '^':
+			suppA,suppB = a._support(), b._support()
+			if suppA is None or suppB is None: return 0
+			fppA = a._onWindow(max(x0 - suppB[1], suppA[0]), min(x0 - suppB[0], suppA[1]))
+			fppB = b._onWindow(max(x0 - suppA[1], suppB[0]), min(x0 - suppA[0], suppB[1]))
+			return fppA.convAt(fppB, x0)
+		if self.op == 'comp':
+			return a.eval(b.eval(x0))
+		if isinstance(b, LazyPolyPieceFunc):
+			return a.eval(x0) + b.eval(x0) if self.op == '+' else a.eval(x0) * b.eval(x0)
+		supp = self._support()
+		if supp is None or not supp[0] <= x0 <= supp[1]:
+			return 0
+		bVal = b.eval(x0) if isinstance(b, Polynomial) else b
+		return a.eval(x0) + bVal if self.op == '+' else a.eval(x0) * bVal
+
+
+
+class PolyPieceFuncArray:
+	'''many piecewise polynomial functions with float coefficients in shared arrays
+	   (structure of arrays) for batched construction and evaluation.
+
+	   Member i has the breaks breaks[i,:] (m+1 values) and the coefficient matrix coeffs[i,:,:]
+	   in the layout of PolyPieceFunc.fromArrays (descending powers of x - breaks[i,j]).
+	   All members have the same number of pieces m and degree bound k-1; members with fewer
+	   pieces are padded with pieces of width 0 at the end.
+
+	   >>> fa = PolyPieceFuncArray.triangular([0, 1], [1, 1], [2, 4])
+	   >>> fa.eval([1, 1]).tolist(), fa.intDef().tolist(), fa.mean().tolist()
+	   ([1.0, 0.6666666666666666], [1.0, 1.0], [1.0, 2.0])
+	   >>> print(fa[0])
+	   x |->
+	     x,      x in [0,1]
+	     -x + 2, x in [1,2]
+	     0, else
+	'''
+	def __init__(self, breaks, coeffs):
+		if numpy is None:
+			raise ImportError('PolyPieceFuncArray needs numpy')
+		self.breaks,self.coeffs = numpy.asarray(breaks, dtype=float), numpy.asarray(coeffs, dtype=float)
+		if self.breaks.ndim != 2 or self.coeffs.ndim != 3 or self.coeffs.shape[0] != self.breaks.shape[0] \
+		   or self.coeffs.shape[2] != self.breaks.shape[1]-1:
+			raise ValueError('expected breaks of shape (n, m+1) and coefficients of shape (n, k, m), got %s and %s'
+				% (self.breaks.shape, self.coeffs.shape))
+
+
+	@staticmethod
+	def fromFuncs(fpps):
+		'''container of the given PolyPieceFuncs (see PolyPieceFunc.toArrays)'''
+		arrays = [fpp.toArrays(dtype=float) for fpp in fpps]
+		m = max(len(b)-1 for b,_ in arrays)
+		k = max(c.shape[0] for _,c in arrays)
+		breaks,coeffs = numpy.zeros((len(arrays), m+1)),numpy.zeros((len(arrays), k, m))
+		for i,(b,c) in enumerate(arrays):
+			breaks[i,:len(b)],breaks[i,len(b):] = b, b[-1]
+			coeffs[i,k-c.shape[0]:,:c.shape[1]] = c
+		return PolyPieceFuncArray(breaks, coeffs)
+
+
+	@staticmethod
+	def uniform(a, b):
+		'''densities of uniform distributions on [a[i], b[i]]'''
+		a,b = numpy.asarray(a, dtype=float), numpy.asarray(b, dtype=float)
+		return PolyPieceFuncArray(numpy.stack([a, b], axis=1), (1/(b-a))[:,None,None])
+
+
+	@staticmethod
+	def triangular(a, c, b):
+		'''densities of triangular distributions on [a[i], b[i]] with modes c[i]'''
+		a,c,b = [numpy.asarray(v, dtype=float) for v in (a, c, b)]
+		height = 2/(b-a)
+		with numpy.errstate(divide='ignore', invalid='ignore'):
+			slope1 = numpy.where(c > a, height/(c-a), 0.0)
+			slope2 = numpy.where(b > c, height/(b-c), 0.0)
+		coeffs = numpy.zeros((len(a), 2, 2))
+		coeffs[:,0,0],coeffs[:,0,1],coeffs[:,1,1] = slope1, -slope2, height
+		return PolyPieceFuncArray(numpy.stack([a, c, b], axis=1), coeffs)
+
+
+	@staticmethod
+	def beta(a, b, alpha, beta):
+		'''densities of beta distributions on [a[i], b[i]] with integer shape parameters
+		   alpha[i], beta[i] >= 1, i.e. (x-a)^(alpha-1) (b-x)^(beta-1) / (B(alpha, beta) (b-a)^(alpha+beta-1))
+
+		   >>> PolyPieceFuncArray.beta([0], [2], [2], [3]).coeffs.tolist()
+		   [[[0.75], [-3.0], [3.0], [0.0]]]
+		'''
+		a,b = numpy.asarray(a, dtype=float), numpy.asarray(b, dtype=float)
+		alpha,beta = numpy.asarray(alpha, dtype=int), numpy.asarray(beta, dtype=int)
+		if numpy.any(alpha < 1) or numpy.any(beta < 1):
+			raise ValueError('shape parameters must be integers >= 1')
+		k = int(numpy.max(alpha + beta)) - 1
+		fact = numpy.array(comb_tables.factorials(k, exact=False))
+		w = b - a
+		# t^(alpha-1) (w-t)^(beta-1) = sum_j C(beta-1, j) (-1)^j w^(beta-1-j) t^(alpha-1+j)
+		betaFunc = fact[alpha-1]*fact[beta-1]/fact[alpha+beta-1]
+		coeffs = numpy.zeros((len(a), k, 1))
+		rows = numpy.arange(len(a))
+		for j in range(int(numpy.max(beta))):
+			active = j <= beta-1
+			binom = numpy.where(active, fact[beta-1]/(fact[j]*fact[numpy.maximum(beta-1-j, 0)]), 0.0)
+			value = binom * (-1)**j * w**(-alpha-j) / betaFunc
+			power = alpha-1+j
+			coeffs[rows[active], k-1-power[active], 0] = value[active]
+		return PolyPieceFuncArray(numpy.stack([a, b], axis=1), coeffs)
+
+
+	@staticmethod
+	def pertLike(a, m, b, lamb=4):
+		'''PERT-like densities for minimum a, mode m and maximum b: beta distributions with
+		   the PERT shape parameters 1 + lamb*(m-a)/(b-a) and 1 + lamb*(b-m)/(b-a) rounded to integers
+
+		   >>> PolyPieceFuncArray.pertLike([0], [1], [2]).mean().tolist()
+		   [1.0]
+		'''
+		a,m,b = [numpy.asarray(v, dtype=float) for v in (a, m, b)]
+		alpha = numpy.rint(1 + lamb*(m-a)/(b-a)).astype(int)
+		beta = numpy.rint(1 + lamb*(b-m)/(b-a)).astype(int)
+		return PolyPieceFuncArray.beta(a, b, alpha, beta)
+
+
+	def __len__(self):
+		return self.breaks.shape[0]
+
+
+	def __getitem__(self, idx):
+		'''member idx as PolyPieceFunc (sharing the arrays)'''
+		return PolyPieceFunc.fromArrays(self.breaks[idx], self.coeffs[idx])
+
+
+	def eval(self, xs):
+		'''values of the members at the points xs: a number, an array of shape (n,) (one point per member)
+		   or of shape (n, p) (p points per member); as PolyPieceFunc.eval x is assigned to the first
+		   piece whose interval contains it, ignoring pieces of width 0 and zero pieces (gaps)
+
+		   >>> fa = PolyPieceFuncArray([[0, 1, 2, 3]], [[[1, 0, 0], [0, 0, 1]]])
+		   >>> fa.eval([[-1, 0.5, 1, 1.5, 2, 3, 4]]).tolist()
+		   [[0.0, 0.5, 1.0, 0.0, 1.0, 1.0, 0.0]]
+		'''
+		xs = numpy.asarray(xs, dtype=float)
+		scalar = xs.ndim < 2
+		xs = numpy.broadcast_to(xs.reshape(-1, 1) if xs.ndim == 1 else xs, (len(self), 1 if scalar else xs.shape[1]))
+		starts,ends = self.breaks[:,None,:-1], self.breaks[:,None,1:]
+		nonzero = self.coeffs.any(axis=1)[:,None,:]
+		candidates = (xs[:,:,None] >= starts) & (xs[:,:,None] <= ends) & (ends > starts) & nonzero
+		idx = candidates.argmax(axis=2)
+		rows = numpy.arange(len(self))[:,None]
+		t = xs - self.breaks[rows, idx]
+		values = numpy.zeros(xs.shape)
+		for d in range(self.coeffs.shape[1]):
+			values = values*t + self.coeffs[rows, d, idx]
+		values = numpy.where(candidates.any(axis=2), values, 0.0)
+		return values[:,0] if scalar else values
+
+
+	def _pieceIntegrals(self, lower, upper, power=0):
+		# integrals of x^power times the pieces over their intersections with [lower, upper], shape (n, m)
+		k,m = self.coeffs.shape[1:]
+		starts,ends = self.breaks[:,:-1], self.breaks[:,1:]
+		t0 = numpy.clip(numpy.asarray(lower, dtype=float).reshape(-1, 1) - starts, 0, ends-starts)
+		t1 = numpy.clip(numpy.asarray(upper, dtype=float).reshape(-1, 1) - starts, 0, ends-starts)
+		binoms = comb_tables.binomial_row(power, exact=False)
+		res = numpy.zeros((len(self), m))
+		# x^power = sum_i C(power, i) start^(power-i) t^i with t = x - start
+		for d in range(k):
+			c = self.coeffs[:,k-1-d,:]
+			for i in range(power+1):
+				e = d+i+1
+				res += c * binoms[i] * starts**(power-i) * (t1**e - t0**e)/e
+		return res
+
+
+	def intDef(self, interval=(-float('inf'), float('inf'))):
+		'''definite integrals of the members over interval (numbers or arrays of shape (n,))'''
+		return self._pieceIntegrals(*interval).sum(axis=1)
+
+
+	def moments(self, order=2):
+		'''raw moments int x^r f(x) dx for r = 0, ..., order as array of shape (n, order+1)'''
+		lower,upper = self.breaks[:,0], self.breaks[:,-1]
+		return numpy.stack([self._pieceIntegrals(lower, upper, r).sum(axis=1) for r in range(order+1)], axis=1)
+
+
+	def mean(self):
+		'''expected values of the members (as densities)'''
+		return self.moments(1)[:,1]
+
+
+	def variance(self):
+		'''variances of the members (as densities)'''
+		mom = self.moments(2)
+		return mom[:,2] - mom[:,1]**2
+
+
 if __name__ == "__main__":
 	import doctest
 	print('running doc tests ...')
@@ -5,11 +5,41 @@ polynomials themselves.
 from __future__ import division
 import copy
 from fractions import Fraction
+import functools
+import math
 import numbers
 import re
+import weakref
+try:
+	import univar_polyops as upo
+	import poly_parser
+	import comb_tables
+except ImportError:
+	from . import univar_polyops as upo
+	from . import poly_parser
+	from . import comb_tables
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+# unit roundoff of floats
+_EPS = 2.0**-53
 
 
 class Polynomial:
+	# shared instances of interned polynomials (see intern)
+	_internTable = weakref.WeakValueDictionary()
+	# version of the coefficients, incremented by each (possible) modification
+	_version = 0
+	# (version, float shadow) of exact coefficients used for evaluation at floats (see _floatShadow)
+	_shadow = None
+	# (version, (integral numerators, common denominator)) of rational coefficients (see _ratShadow)
+	_intShadow = None
+	# relative error bound above which evaluation at floats falls back to exact arithmetic
+	FLOAT_EVAL_RTOL = 1e-12
+
 	def __init__(self, repr=0, varName='x'):
 		'''create univariate polynomial.
 
@@ -29,11 +59,12 @@ class Polynomial:
 		   >>> p_x2.coeffs
 		   [0, 0, 1]
 		'''
-		self.varName = Polynomial._checkVarName(varName)
+		self._varName = Polynomial._checkVarName(varName)
+		self._dirty = False
 		if isinstance(repr, Polynomial):
 			raise TypeError('cannot construct polynomial from polynomial; do you mean to use the method clone()?')
 		elif isinstance(repr, numbers.Number):
-			self.coeffs = [repr] if repr != 0 else []
+			self._coeffs = [repr] if repr != 0 else []
 		else:
 			try:
 				iter(repr)
@@ -43,13 +74,45 @@ class Polynomial:
 					raise ValueError("coefficients of polynomial must have lexicographically "
 					" smaller variable names than the main variable (here '%s'), but '%s' found" %
 					(varName, coeffsVarMax))
-				self.coeffs = copy.deepcopy(coeffs)
-				self._normalize()
+				self._coeffs = copy.deepcopy(coeffs)
+				self._dirty = True
 			except TypeError:
 				raise TypeError('unexpected type "%s" when constructing polynomial' % type(repr))
 
 
-	
+
+	# Normalization (see _normalize) is deferred: arithmetic like iadd only marks the polynomial
+	# as dirty, the properties coeffs and varName normalize on access.
+	# Internally _coeffs and _varName may be used, if the result does not depend on normalization.
+	# The list returned by coeffs may be modified by the caller, so each access starts a new version
+	# of the coefficients (see _floatShadow); internal read-only access uses _normalizedCoeffs.
+	@property
+	def coeffs(self):
+		if self._dirty: self._normalize()
+		self._version += 1
+		return self._coeffs
+
+	@coeffs.setter
+	def coeffs(self, coeffs):
+		self._coeffs = coeffs
+		self._dirty = True
+		self._version += 1
+
+	def _normalizedCoeffs(self):
+		if self._dirty: self._normalize()
+		return self._coeffs
+
+	@property
+	def varName(self):
+		if self._dirty: self._normalize()
+		return self._varName
+
+	@varName.setter
+	def varName(self, varName):
+		if self._dirty: self._normalize()
+		self._varName = varName
+
+
 	@staticmethod
 	def _checkVarName(varName):
 		if not isinstance(varName, str):
@@ -71,27 +134,46 @@ class Polynomial:
 		   >>> p0.coeffs
 		   []
 		'''
-		return Polynomial(copy.deepcopy(self.coeffs), self.varName)
+		p = Polynomial.__new__(Polynomial)
+		p._coeffs = copy.deepcopy(self._coeffs)
+		p._varName = self._varName
+		p._dirty = self._dirty
+		return p
 
 	
 	@staticmethod
-	def _insertMultiplications(exprStr, varNames):
-		# get multiletter variable names out of the way
-		tempSubs = {n: '$%d$'%idx for idx,n in enumerate(varNames) if len(n) > 1}
-		for n,s in tempSubs.items():
-			exprStr = exprStr.replace(n, s)
-		# insert saved multiplication operators
-		for _ in range(2): # regular expressions for implicit multiplication may overlap
-			exprStr = re.sub(r'([a-zA-Z0-9)])[ \t]*([(a-zA-Z])', r'\1*\2', exprStr)
-		# get multiletter variable names back
-		for n,s in tempSubs.items():
-			exprStr = exprStr.replace(s, n)
-		return exprStr
+	def _fromTerms(terms, varNames, constVarName=None):
+		'''nested polynomial from dictionary {exponent tuple: coefficient} with respect to
+		   the sorted variable names (the last one becomes the main variable)'''
+		def _nested(terms, iVar):
+			if iVar < 0:
+				return sum(terms.values())
+			termsByExp = {}
+			for exps,c in terms.items():
+				termsByExp.setdefault(exps[iVar], {})[exps] = c
+			if not termsByExp:
+				return 0
+			coeffs = [_nested(termsByExp.get(e, {}), iVar-1) for e in range(max(termsByExp)+1)]
+			if len(coeffs) == 1: return coeffs[0]
+			return Polynomial(coeffs, varNames[iVar])
+		p = _nested(terms, len(varNames)-1)
+		if isinstance(p, Polynomial): return p
+		if constVarName is None: constVarName = varNames[-1] if varNames else 'x'
+		return Polynomial(p, constVarName)
+
+
+	@staticmethod
+	@functools.lru_cache(maxsize=1024)
+	def _parse(exprStr, varNamesKey):
+		terms,varNames = poly_parser.parse(exprStr, varNamesKey)
+		constVarName = varNamesKey[0] if varNamesKey else 'x'
+		return Polynomial._fromTerms(terms, varNames, constVarName)
 
 
 	@staticmethod
 	def fromString(exprStr, varNames=None):
 		'''create univariate polynomial from expression string
+		   (see module poly_parser for the syntax; parsed strings are cached)
 		
 		   >>> p = poly('(y-1)**3')
 		   >>> p.coeffs
@@ -106,15 +188,13 @@ class Polynomial:
 		   <Polynomial '-y^2 + x^2'>
 		   >>> poly('x-1/2')
 		   <Polynomial 'x - 1/2'>
+		   >>> poly('ab^2 + 1', ['ab'])
+		   <Polynomial 'ab^2 + 1'>
 		'''
 		if varNames is None:
-			varNames = set(re.findall('[a-zA-Z][0-9]*', exprStr))
-		exprStr = exprStr.replace('^', '**')
-		exprStr = Polynomial._insertMultiplications(exprStr, varNames)
-		# assume exact arithmetic: division of integers is taken as Fraction;
-		exprStr = re.sub(r'([1-9][0-9]*)\s*/\s*([1-9][0-9]*)', r'Fraction(\1,\2)', exprStr)
-		p = eval(exprStr, None, {v: symbol(v) for v in varNames})
-		return p if isinstance(p, Polynomial) else Polynomial([p], list(varNames)[0] if varNames else 'x')
+			varNames = poly_parser.findVarNames(exprStr)
+		varNamesKey = tuple(varNames) if not isinstance(varNames, (set, frozenset)) else tuple(sorted(varNames))
+		return Polynomial._parse(exprStr, varNamesKey).clone()
 
 
 	def deg(self, varName=None):
@@ -150,8 +230,10 @@ class Polynomial:
 		return {self.varName}.union(*[p.allVarNames() for p in self.coeffs if isinstance(p, Polynomial)])
 
 
-	def eval(self, x0):
-		'''evaluate polynomial at given x0, i.e. compute poly(x0)
+	def eval(self, x0, backend=None):
+		'''evaluate polynomial at given x0, i.e. compute poly(x0).
+		   For a number x0 and a backend other than the reference backend
+		   (see univar_polyops.get_backend) the evaluation is done by the backend.
 		
 		   >>> p = Polynomial([1, 2, 1])
 		   >>> p.eval(0)
@@ -164,8 +246,19 @@ class Polynomial:
 		   >>> p3.coeffs
 		   [1, -2, 1]
 		'''
+		b = upo.get_backend(backend)
+		if b.name != 'python' and isinstance(x0, numbers.Number) and self._hasNumberCoeffs():
+			return b.evaluate(self.coeffs, x0)
+		if isinstance(x0, float):
+			shadow = self._floatShadow()
+			if shadow is not None:
+				return self._evalFloat(shadow, x0)
+		elif isinstance(x0, (int, Fraction)):
+			shadow = self._ratShadow()
+			if shadow is not None and (shadow[1] != 1 or isinstance(x0, Fraction)):
+				return upo.evaluate_rational(shadow[0], shadow[1], x0)
 		p_x0 = 0
-		for c in reversed(self.coeffs):
+		for c in reversed(self._normalizedCoeffs()):
 			p_x0 = x0*p_x0 + c
 		# if x0 is a polynomial, make sure return value is a polynomial
 		# if x0 is not a polynomial (e.g. a number), try not to return a polynomial
@@ -175,37 +268,193 @@ class Polynomial:
 		return p_x0 if not isinstance(p_x0, Polynomial) or p_x0.deg() >= 1 else p_x0.coeff(0)
 
 
-	# removing leading zero coefficents
-	def _normalize(self):
-		while len(self.coeffs) > 0 and self.coeffs[-1] == 0:
-			self.coeffs = self.coeffs[:-1]
-		for idx,c in enumerate(self.coeffs):
-			if isinstance(c, Polynomial):
-				c._normalize()
-				if c.deg() <= 0:
-					assert len(c.coeffs) <= 1
-					self.coeffs[idx] = c.coeff(0)
-		if len(self.coeffs) == 1 and isinstance(self.coeffs[0], Polynomial):
-			self.varName = self.coeffs[0].varName
-			self.coeffs = self.coeffs[0].coeffs
+	def _floatShadow(self):
+		'''float copies of the coefficients, if they are exact numbers (int, Fraction), else None.
+		   The shadow is cached for the current version of the coefficients: in-place arithmetic
+		   and each access of the list coeffs (which may modify it) invalidate it. A reference to
+		   coeffs kept across evaluations must not be used for modifications.
+
+		   >>> p = Polynomial([Fraction(1, 3), 1])
+		   >>> p.eval(2.0)
+		   2.3333333333333335
+		   >>> p.coeffs[0] = 100
+		   >>> p.eval(2.0)
+		   102.0
+		'''
+		if self._shadow is None or self._shadow[0] != self._version:
+			coeffs = self._normalizedCoeffs()
+			exact = all(isinstance(c, (int, Fraction)) for c in coeffs) and coeffs
+			self._shadow = self._version, ([float(c) for c in coeffs] if exact else None)
+		return self._shadow[1]
+
+
+	def _ratShadow(self):
+		'''(numerators, d) with integers numerators[i] = coeffs[i]*d (see univar_polyops.integral_coeffs),
+		   if the coefficients are exact numbers, else None; cached like the float shadow.
+		   Evaluation at rational points then needs no gcd computations but the final one.
+
+		   >>> p = Polynomial([Fraction(1, 2), 0, Fraction(2, 3)])
+		   >>> p._ratShadow()
+		   ([3, 0, 4], 6)
+		   >>> p.eval(Fraction(3, 2))
+		   Fraction(2, 1)
+		'''
+		if self._intShadow is None or self._intShadow[0] != self._version:
+			coeffs = self._normalizedCoeffs()
+			exact = all(isinstance(c, (int, Fraction)) for c in coeffs) and coeffs
+			self._intShadow = self._version, (upo.integral_coeffs(coeffs) if exact else None)
+		return self._intShadow[1]
+
+
+	def _evalFloat(self, shadow, x0):
+		'''evaluate at float x0 with the float shadow; if the error bound of Horner's scheme
+		   (2n+1)*eps*sum(|c_i||x0|^i) exceeds FLOAT_EVAL_RTOL*|p(x0)| (cancellation),
+		   the value is computed exactly and rounded. Non-finite arguments or values
+		   (nan, inf, overflow) are returned as computed with floats.
+
+		   >>> p = Polynomial([Fraction(-1, 3), 1])
+		   >>> p.eval(0.5)
+		   0.16666666666666669
+		   >>> p.eval(1/3) # float(1/3) is slightly smaller than 1/3
+		   -1.850371707708594e-17
+		   >>> p.eval(float('-inf'))
+		   -inf
+		'''
+		# start with the leading coefficient: 0.0*inf would give nan
+		v,vAbs,xAbs = shadow[-1],abs(shadow[-1]),abs(x0)
+		for c in reversed(shadow[:-1]):
+			v = v*x0 + c
+			vAbs = vAbs*xAbs + abs(c)
+		if not (math.isfinite(x0) and math.isfinite(v)):
+			return v
+		if (2*len(shadow)+1)*_EPS*vAbs <= Polynomial.FLOAT_EVAL_RTOL*abs(v):
+			return v
+		exact = upo.evaluate_rational(*self._ratShadow(), x0)
+		try:
+			return float(exact)
+		except OverflowError:
+			return math.inf if exact > 0 else -math.inf
+
 
+	def evalMulti(self, points, useTree=False):
+		'''evaluate polynomial at several points.
+		   With useTree the polynomial is reduced modulo the subproduct tree of the points,
+		   which needs asymptotically fewer operations, but pays off in pure Python only
+		   for very high degrees (with floats it can become numerically unstable).
 
-	def _iaddCoeffs(self, coeffs):
-		for i in range(min(len(self.coeffs), len(coeffs))):
-			self.coeffs[i] += coeffs[i]
-		if len(coeffs) > len(self.coeffs):
-			self.coeffs += coeffs[len(self.coeffs):]
-		self._normalize()
+		   >>> Polynomial([1, 2, 1]).evalMulti([0, 1, Fraction(1,2)])
+		   [1, 4, Fraction(9, 4)]
+		'''
+		if useTree and self._hasNumberCoeffs():
+			return upo.evaluate_multi(self.coeffs, list(points))
+		return [self.eval(x0) for x0 in points]
 
 
-	def _isubCoeffs(self, coeffs):
+	@staticmethod
+	def interpolate(xs, ys, varName='x'):
+		'''polynomial of minimal degree through the points (xs[i], ys[i]).
+		   The xs must be distinct; exact input values give exact coefficients.
+
+		   >>> Polynomial.interpolate([0, 1, 2], [1, 4, 9])
+		   <Polynomial 'x^2 + 2x + 1'>
+		   >>> Polynomial.interpolate([0, 2], [0, 1])
+		   <Polynomial '1/2x'>
+		'''
+		return Polynomial(upo.interpolate(list(xs), list(ys)), varName)
+
+
+	def _hasNumberCoeffs(self):
+		return all(isinstance(c, numbers.Number) for c in self.coeffs)
+
+
+	def shifted(self, d):
+		'''compute polynomial p(x+d) by Taylor shift (without generic composition)
+
+		   >>> Polynomial([0, 0, 1]).shifted(1).coeffs
+		   [1, 2, 1]
+		   >>> Polynomial([Fraction(1,2), 0, 1]).shifted(Fraction(-1,2)).coeffs
+		   [Fraction(3, 4), Fraction(-1, 1), Fraction(1, 1)]
+		'''
+		if not isinstance(d, numbers.Number):
+			return self.eval(Polynomial([d, 1], self.varName))
+		if not self._hasNumberCoeffs():
+			# polynomial coefficients: p(x+d) = sum_k x^k sum_(j>=k) C(j,k) d^(j-k) c_j
+			coeffs = self.coeffs
+			dPows = [1]
+			for _ in range(1, len(coeffs)): dPows.append(dPows[-1]*d)
+			coeffsShifted = [sum(comb_tables.binomial_row(j)[k]*dPows[j-k]*coeffs[j] for j in range(k, len(coeffs)))
+			                 for k in range(len(coeffs))]
+			return Polynomial(coeffsShifted, self.varName)
+		return Polynomial(upo.taylor_shift(self.coeffs, d), self.varName)
+
+
+	def affine(self, k, d=0):
+		'''compute polynomial p(k*x+d) by Taylor shift and scaling of coefficients
+
+		   >>> Polynomial([0, 0, 1]).affine(2, 1).coeffs
+		   [1, 4, 4]
+		'''
+		if not isinstance(k, numbers.Number) or not isinstance(d, numbers.Number) or not self._hasNumberCoeffs():
+			return self.eval(Polynomial([d, k], self.varName))
+		return Polynomial(upo.affine_transform(self.coeffs, k, d), self.varName)
+
+
+	# removing leading zero coefficents, replacing constant polynomial coefficients by numbers
+	def _normalize(self):
+		self._dirty = False
+		coeffs = self._coeffs
+		for idx,c in enumerate(coeffs):
+			if isinstance(c, Polynomial):
+				cCoeffs = c.coeffs
+				if len(cCoeffs) <= 1:
+					coeffs[idx] = cCoeffs[0] if cCoeffs else 0
+		n = len(coeffs)
+		while n > 0 and coeffs[n-1] == 0:
+			n -= 1
+		del coeffs[n:]
+		if n == 1 and isinstance(coeffs[0], Polynomial):
+			self._varName = coeffs[0]._varName
+			self._coeffs = coeffs[0]._coeffs
+
+
+	def _backendFor(self, coeffs, backend):
+		'''the backend (see univar_polyops.get_backend) for arithmetic with a list of number
+		   coefficients, None if the reference implementation is used in place'''
+		b = upo.get_backend(backend)
+		if b.name == 'python' or not all(isinstance(c, numbers.Number) for c in coeffs) or not self._hasNumberCoeffs():
+			return None
+		return b
+
+
+	def _iaddCoeffs(self, coeffs, backend=None):
+		b = self._backendFor(coeffs, backend)
+		if b is not None:
+			self._coeffs = b.add(self._coeffs, coeffs)
+		else:
+			selfCoeffs = self._coeffs
+			for i in range(min(len(selfCoeffs), len(coeffs))):
+				selfCoeffs[i] += coeffs[i]
+			if len(coeffs) > len(selfCoeffs):
+				selfCoeffs += coeffs[len(selfCoeffs):]
+		self._dirty = True
+		self._version += 1
+
+
+	def _isubCoeffs(self, coeffs, backend=None):
+		b = self._backendFor(coeffs, backend)
+		if b is not None:
+			self._coeffs = b.sub(self._coeffs, coeffs)
+			self._dirty = True
+			self._version += 1
+			return
 		coeffsInv = [-c for c in coeffs]
 		self._iaddCoeffs(coeffsInv)
 
 	
-	def iadd(self, poly):
+	def iadd(self, poly, backend=None):
 		'''add another polynomial.
-		   poly can be a number, a coefficient list or another univariate polynomial
+		   poly can be a number, a coefficient list or another univariate polynomial;
+		   sums of number coefficients are computed by the given backend (see mul)
 		   
 		   >>> p = Polynomial([0,1]) # x
 		   >>> p.iadd(-1)
@@ -219,26 +468,27 @@ class Polynomial:
 		   [-1, 1]
 		'''
 		if isinstance(poly, numbers.Number):
-			self._iaddCoeffs([poly])
+			self._iaddCoeffs([poly], backend)
 		elif isinstance(poly, list):
-			self._iaddCoeffs(poly)
+			self._iaddCoeffs(poly, backend)
 		elif isinstance(poly, Polynomial):
-			if self.varName == poly.varName:
-				self._iaddCoeffs(poly.coeffs)
-			elif self.varName > poly.varName:
+			if self._varName == poly._varName:
+				self._iaddCoeffs(poly._coeffs, backend)
+			elif self._varName > poly._varName:
 				self._iaddCoeffs([poly])
 			else:
 				tmp = self.clone()
-				self.coeffs = copy.deepcopy(poly.coeffs)
-				self.varName = poly.varName
+				self._coeffs = copy.deepcopy(poly._coeffs)
+				self._varName = poly._varName
 				self._iaddCoeffs([tmp])
 		else:
 			raise ValueError("unexpected argument type " + type(poly))
 
 
-	def isub(self, poly):
+	def isub(self, poly, backend=None):
 		'''subtract another polynomial.
-		   poly can be a number, a coefficient list or another univariate polynomial
+		   poly can be a number, a coefficient list or another univariate polynomial;
+		   differences of number coefficients are computed by the given backend (see mul)
 		   
 		   >>> p = Polynomial([0,1]) # x
 		   >>> p.isub(1)
@@ -252,18 +502,18 @@ class Polynomial:
 		   [-2, 1]
 		'''
 		if isinstance(poly, numbers.Number):
-			self._iaddCoeffs([-poly])
+			self._iaddCoeffs([-poly], backend)
 		elif isinstance(poly, list):
-			self._isubCoeffs(poly)
+			self._isubCoeffs(poly, backend)
 		elif isinstance(poly, Polynomial):
-			if self.varName == poly.varName:
-				self._isubCoeffs(poly.coeffs)
-			elif self.varName > poly.varName:
+			if self._varName == poly._varName:
+				self._isubCoeffs(poly._coeffs, backend)
+			elif self._varName > poly._varName:
 				self._iaddCoeffs([-poly])
 			else:
 				tmp = self.clone()
-				self.coeffs = copy.deepcopy(poly.coeffs)
-				self.varName = poly.varName
+				self._coeffs = copy.deepcopy(poly._coeffs)
+				self._varName = poly._varName
 				self.scale(-1)
 				self._iaddCoeffs([tmp])
 		else:
@@ -352,8 +602,9 @@ class Polynomial:
 		return p.__sub__(self)
 
 
-	def scale(self, s):
-		'''multiply each coefficient with given scale s
+	def scale(self, s, backend=None):
+		'''multiply each coefficient with given scale s;
+		   for number coefficients and s by the given backend (see mul)
 		
 		   >>> p = Polynomial([2,1])
 		   >>> p.scale(2)
@@ -364,13 +615,21 @@ class Polynomial:
 		   []
 		'''
 		if s == 0:
-			self.coeffs = []
-		for i in range(len(self.coeffs)):
-			self.coeffs[i] *= s
-
-
-	def scaled(self, s):
-		'''return polynomial scaled by given scale s
+			self._coeffs = []
+			self._dirty = False
+		self._version += 1
+		b = self._backendFor([s], backend)
+		if b is not None:
+			self._coeffs = b.scale(self._coeffs, s)
+			self._dirty = True
+			return
+		coeffs = self._coeffs
+		for i in range(len(coeffs)):
+			coeffs[i] *= s
+
+
+	def scaled(self, s, backend=None):
+		'''return polynomial scaled by given scale s (see scale)
 		
 		   >>> p1 = Polynomial([2,1])
 		   >>> p2 = p1.scaled(2)
@@ -383,7 +642,7 @@ class Polynomial:
 		if s == 0:
 			return Polynomial(0, varName=self.varName)
 		polyScaled = self.clone()
-		polyScaled.scale(s)
+		polyScaled.scale(s, backend)
 		return polyScaled
 
 
@@ -394,7 +653,7 @@ class Polynomial:
 		for i in range(len(self.coeffs) + len(coeffs) - 1):
 			ci = 0
 			for j in range(max(0, i-len(coeffs)+1), min(i+1, len(self.coeffs))):
-				ci += self.coeffs[j] * coeffs[i-j]
+				ci += Polynomial._mulCoeff(self.coeffs[j], coeffs[i-j])
 			coeffsMul.append(ci)
 		return coeffsMul
 
@@ -419,6 +678,82 @@ class Polynomial:
 		return self.scaled(-1)
 
 
+	# multivariate products use Kronecker substitution if both factors have at least this number of terms
+	# and fill at least the given fraction of the box of their per-variable degree bounds
+	# (packing polynomials with few mixed terms, e.g. (x+y+z)^n, creates mostly zero coefficients)
+	KRONECKER_THRESHOLD = 64
+	KRONECKER_MIN_DENSITY = 0.5
+
+	def _termCount(self, degrees):
+		# number of nonzero terms, the degree of each variable is entered into degrees (one walk of the tree)
+		degrees[self.varName] = max(degrees.get(self.varName, -1), len(self.coeffs) - 1)
+		termCount = 0
+		for c in self.coeffs:
+			if isinstance(c, Polynomial):
+				termCount += c._termCount(degrees)
+			elif c != 0:
+				termCount += 1
+		return termCount
+
+
+	def _isKroneckerCandidate(self):
+		# cheap gate: univariate polynomials are multiplied by the backend anyway
+		if self._hasNumberCoeffs(): return False
+		degrees = {}
+		termCount = self._termCount(degrees)
+		if termCount < Polynomial.KRONECKER_THRESHOLD: return False
+		boxSize = 1
+		for d in degrees.values():
+			boxSize *= d + 1
+		return termCount >= Polynomial.KRONECKER_MIN_DENSITY*boxSize
+
+
+	@staticmethod
+	def _mulCoeff(c1, c2):
+		# product of coefficients within a product of polynomials: Kronecker substitution was considered for the factors already
+		if isinstance(c1, Polynomial): return c1.mul(c2, kronecker=False)
+		if isinstance(c2, Polynomial): return c2.mul(c1, kronecker=False)
+		return c1 * c2
+
+
+	@staticmethod
+	def _mulKronecker(p1, p2):
+		'''multiply (multivariate) polynomials by Kronecker substitution:
+		   with degree bounds D_i = deg(p1, v_i) + deg(p2, v_i) + 1 the monomial v_0^e_0*v_1^e_1*...
+		   is mapped to x^(e_0 + D_0*(e_1 + D_1*(...))), the univariate polynomials are multiplied
+		   and the product is unpacked again.
+
+		   >>> p = Polynomial.fromString('x+y+1')
+		   >>> Polynomial._mulKronecker(p, p) == p*p
+		   True
+		'''
+		varNames = sorted(p1.allVarNames() | p2.allVarNames())
+		strides = [1]
+		for v in varNames[:-1]:
+			strides.append(strides[-1]*(p1.deg(v) + p2.deg(v) + 1))
+		varStrides = dict(zip(varNames, strides))
+		def _pack(p):
+			packed = [0]
+			def _packRec(p, offset):
+				stride = varStrides[p.varName]
+				for e,c in enumerate(p.coeffs):
+					if isinstance(c, Polynomial):
+						_packRec(c, offset + e*stride)
+					elif c != 0:
+						idx = offset + e*stride
+						if idx >= len(packed): packed.extend([0]*(idx+1-len(packed)))
+						packed[idx] += c
+			_packRec(p, 0)
+			return packed
+		product = upo.multiply_fast(_pack(p1), _pack(p2))
+		def _unpack(coeffs, iVar):
+			if iVar < 0:
+				return coeffs[0] if coeffs else 0
+			stride = strides[iVar]
+			return Polynomial([_unpack(coeffs[e:e+stride], iVar-1) for e in range(0, len(coeffs), stride)], varNames[iVar])
+		return _unpack(product, len(varNames)-1)
+
+
 	def __mul__(self, poly):
 		'''overload operator *
 		
@@ -431,19 +766,38 @@ class Polynomial:
 		   >>> p0.coeffs
 		   []
 		'''
+		return self.mul(poly)
+
+
+	def mul(self, poly, backend=None, kronecker=True):
+		'''multiply with number, coefficient list or polynomial; products of coefficient lists
+		   of numbers are computed by the given backend (see univar_polyops.get_backend),
+		   the default is the backend selected by univar_polyops.set_backend.
+		   Multivariate products use Kronecker substitution if both factors are large and dense
+		   (see KRONECKER_THRESHOLD); the test is done once per product, not for the products of
+		   the coefficients, and is skipped for kronecker=False.
+
+		   >>> Polynomial([0.5, 1]).mul(Polynomial([2, 1]), backend='python').coeffs
+		   [1.0, 2.5, 1]
+		'''
 		if isinstance(poly, numbers.Number):
-			return self.scaled(poly)
+			return self.scaled(poly, backend)
 		if isinstance(poly, list):
 			coeffs = poly
 		elif isinstance(poly, Polynomial):
+			if kronecker and self._isKroneckerCandidate() and poly._isKroneckerCandidate():
+				return Polynomial._mulKronecker(self, poly)
 			if self.varName == poly.varName:
 				coeffs = poly.coeffs
 			elif self.varName > poly.varName:
-				return self.scaled(poly)
+				return Polynomial([Polynomial._mulCoeff(c, poly) for c in self.coeffs], varName=self.varName)
 			else:
-				return poly.scaled(self)
+				return Polynomial([Polynomial._mulCoeff(c, self) for c in poly.coeffs], varName=poly.varName)
 		else:
 			return NotImplemented
+		if self._hasNumberCoeffs() and all(isinstance(c, numbers.Number) for c in coeffs):
+			if not self.coeffs or not coeffs: return Polynomial(0, varName=self.varName)
+			return Polynomial(upo.get_backend(backend).multiply(self.coeffs, coeffs), varName=self.varName)
 		return Polynomial(self._mulCoeffs(coeffs), varName=self.varName)
 
 
@@ -527,6 +881,8 @@ class Polynomial:
 		   x^2 - x + 1, -2
 		   >>> q,r = poly('xy') / poly('2x'); print("%s, %s" % (q, r))
 		   1/2y, 0
+		   >>> q,r = poly('x^2') / poly('2'); print("%s, %s" % (q, r))
+		   1/2x^2, 0
 		'''
 		if isinstance(d, numbers.Number):
 			try:
@@ -536,6 +892,10 @@ class Polynomial:
 			return self.scaled(scaleFac)
 		if not isinstance(d, Polynomial):
 			raise TypeError("divisor of invalid type %s" % type(d))
+		if self.varName == d.varName and self._hasNumberCoeffs() and d._hasNumberCoeffs():
+			# univariate division over the coefficient lists
+			quot,rem = upo.divide(self.coeffs, d.coeffs)
+			return Polynomial(quot, self.varName), Polynomial(rem, self.varName)
 		quot,rem = 0,self.clone()
 		try:
 			while True:
@@ -579,6 +939,123 @@ class Polynomial:
 		return polySubs
 
 
+	def _monomialTable(self, varNames):
+		'''flat list of (exponent tuple, coefficient) for given ordering of variable names'''
+		varIdx = {v: i for i,v in enumerate(varNames)}
+		missing = self.allVarNames() - set(varNames)
+		if missing and self.deg() >= 0:
+			raise ValueError("no values given for variable(s) %s" % ', '.join(sorted(missing)))
+		table = []
+		def _collect(p, exps):
+			iVar = varIdx.get(p.varName)
+			for e,c in enumerate(p.coeffs):
+				if c == 0: continue
+				expsTerm = exps if iVar is None else exps[:iVar] + (e,) + exps[iVar+1:]
+				if isinstance(c, Polynomial):
+					_collect(c, expsTerm)
+				else:
+					table.append((expsTerm, c))
+		_collect(self, (0,)*len(varNames))
+		return table
+
+
+	def evalPoints(self, varNames, arrays):
+		'''evaluate polynomial at many points, given as one array of values per variable.
+		   The nested structure is flattened into a table of monomials once; float values
+		   are evaluated vectorized with NumPy (if available), other values with plain loops.
+
+		   >>> p = poly('x^2y + 1')
+		   >>> p.evalPoints('x,y', [[1, 2], [3, Fraction(1,3)]])
+		   [4, Fraction(7, 3)]
+		'''
+		if isinstance(varNames, str):
+			varNames = re.split('[, \t]+', varNames.strip())
+		varNames = list(varNames)
+		if len(arrays) != len(varNames):
+			raise ValueError("%d value arrays given for %d variables" % (len(arrays), len(varNames)))
+		table = self._monomialTable(varNames)
+		maxExps = [max([exps[i] for exps,_ in table], default=0) for i in range(len(varNames))]
+		useNumpy = numpy is not None and any(
+			isinstance(a, numpy.ndarray) and a.dtype.kind == 'f' or
+			not isinstance(a, numpy.ndarray) and any(isinstance(v, float) for v in a) for a in arrays)
+		if useNumpy:
+			arrays = [numpy.asarray(a, dtype=float) for a in arrays]
+			nPoints = len(arrays[0]) if arrays else 0
+			pows = [[numpy.ones(nPoints)] for _ in arrays]
+			for i,a in enumerate(arrays):
+				for _ in range(maxExps[i]):
+					pows[i].append(pows[i][-1]*a)
+			values = numpy.zeros(nPoints)
+			for exps,c in table:
+				term = numpy.full(nPoints, float(c))
+				for i,e in enumerate(exps):
+					if e: term *= pows[i][e]
+				values += term
+			return values
+		# only the non-zero exponents of each monomial are needed in the loop over the points
+		tableNonZero = [(c, [(i,e) for i,e in enumerate(exps) if e]) for exps,c in table]
+		values = []
+		for point in zip(*arrays):
+			pows = []
+			for x0,maxExp in zip(point, maxExps):
+				pows_x0 = [1]
+				for _ in range(maxExp): pows_x0.append(pows_x0[-1]*x0)
+				pows.append(pows_x0)
+			v = 0
+			for c,iExps in tableNonZero:
+				for i,e in iExps:
+					c = c*pows[i][e]
+				v += c
+			values.append(v)
+		return values
+
+
+	@staticmethod
+	def _hornerCode(coeffs, argName, constants, floatCoeffs=False, indent='\t'):
+		'''lines of straight-line Python code evaluating a polynomial with Horner's scheme,
+		   the value is assigned to variable 'v'. Coefficients without exact literal
+		   representation are added to the dictionary constants.'''
+		def _literal(c):
+			if floatCoeffs: c = float(c)
+			if type(c) in (int, float) and c not in (float('inf'), -float('inf')) and c == c:
+				return repr(c)
+			name = '_c%d' % len(constants)
+			constants[name] = c
+			return name
+		if not coeffs:
+			return [indent + 'v = %s' % _literal(0)]
+		lines = [indent + 'v = %s' % _literal(coeffs[-1])]
+		for c in reversed(coeffs[:-1]):
+			lines.append(indent + ('v = v*%s + %s' % (argName, _literal(c)) if c != 0 else 'v = v*%s' % argName))
+		return lines
+
+
+	@staticmethod
+	@functools.lru_cache(maxsize=256)
+	def _compileCoeffs(coeffsKey, floatCoeffs):
+		constants = {}
+		lines = ['def _poly(x):'] + Polynomial._hornerCode([c for _,c in coeffsKey], 'x', constants, floatCoeffs) + ['\treturn v']
+		exec('\n'.join(lines), constants)
+		return constants['_poly']
+
+
+	def compile(self, floatCoeffs=False):
+		'''generate a Python function evaluating this (univariate) polynomial by straight-line
+		   Horner code, optionally with coefficients converted to float.
+		   Generated functions are cached by coefficients, no Polynomial objects are involved
+		   when calling them.
+
+		   >>> f = poly('x^2 - 1/2').compile()
+		   >>> f(3), f(Fraction(1,2))
+		   (Fraction(17, 2), Fraction(-1, 4))
+		   >>> poly('x^2 - 1/2').compile(floatCoeffs=True)(3)
+		   8.5
+		'''
+		if not self._hasNumberCoeffs():
+			raise ValueError("only univariate polynomials with number coefficients can be compiled, '%s' given" % self)
+		return Polynomial._compileCoeffs(tuple((type(c),c) for c in self.coeffs), floatCoeffs)
+
+
 	def __call__(self, x0):
 		'''overload call operator (evaluation/composition)
 		
@@ -591,7 +1068,21 @@ class Polynomial:
 		   >>> p1(p2)(p2).coeffs
 		   [-1, 1, 1]
 		'''
-		return self.eval(x0)
+		return self.compose(x0) if isinstance(x0, Polynomial) else self.eval(x0)
+
+
+	def compose(self, q):
+		'''compute composition p(q(x)).
+		   For polynomials with number coefficients a divide-and-conquer algorithm
+		   based on precomputed powers of q is used.
+
+		   >>> p = Polynomial.fromString('x^2-1')
+		   >>> p.compose(Polynomial.fromString('y+1'))
+		   <Polynomial 'y^2 + 2y'>
+		'''
+		if not isinstance(q, Polynomial) or not self._hasNumberCoeffs() or not q._hasNumberCoeffs():
+			return self.eval(q)
+		return Polynomial(upo.compose(self.coeffs, q.coeffs), q.varName)
 
 
 	def der(self, varName=None):
@@ -652,9 +1143,11 @@ class Polynomial:
 		'''
 		if varName is None or varName == self.varName:
 			c0 = self.coeff(0)
+			n = len(self.coeffs)
+			rec,recFloat = comb_tables.reciprocals(n), comb_tables.reciprocals(n, exact=False)
 			# make new coefficient (0) the same type as existing ones
 			# save division by 1
-			coeffsInt = [c0-c0, c0] + [self.coeffs[i]*Fraction(1,i+1) for i in range(1, len(self.coeffs))]
+			coeffsInt = [c0-c0, c0] + [c*(recFloat if isinstance(c, float) else rec)[i+1] for i,c in enumerate(self.coeffs[1:], 1)]
 			return Polynomial(coeffsInt, varName=self.varName)
 		if varName > self.varName:
 			return Polynomial([0, self], varName=varName)
@@ -827,6 +1320,51 @@ class Polynomial:
 		return Polynomial._eqCoeffs(self.coeffs, coeffs, eps)
 
 
+	@staticmethod
+	def _coeffKey(c, typed):
+		if isinstance(c, Polynomial): return c._key(typed)
+		return (type(c), c) if typed else c
+
+
+	def _key(self, typed=False):
+		'''immutable canonical form: the value of a constant polynomial,
+		   else the variable name with the tuple of the coefficients' canonical forms.
+		   With typed=True numbers are paired with their type (1, 1.0 and Fraction(1) differ).'''
+		if len(self.coeffs) <= 1:
+			return Polynomial._coeffKey(self.coeffs[0] if self.coeffs else 0, typed)
+		return (self.varName, tuple(Polynomial._coeffKey(c, typed) for c in self.coeffs))
+
+
+	def __hash__(self):
+		'''hash of the canonical form, consistent with ==: constant polynomials hash like their value.
+		   Floats are hashed exactly, so polynomials with float coefficients that are only
+		   equal within the tolerance of == can have different hashes.
+		   Polynomials used as dictionary keys must not be modified in place.
+
+		   >>> hash(Polynomial(3)) == hash(3)
+		   True
+		   >>> len({poly('x+1'), poly('1+x'), poly('y+1')})
+		   2
+		'''
+		return hash(self._key())
+
+
+	def intern(self):
+		'''return the shared instance of all interned polynomials equal to this one
+		   (same variable name, same coefficients of the same types).
+		   Interned polynomials are shared and must not be modified in place.
+
+		   >>> p1,p2 = poly('x^2-1'), poly('(x+1)(x-1)')
+		   >>> p1.intern() is p2.intern()
+		   True
+		'''
+		key = (self.varName, self._key(typed=True))
+		p = Polynomial._internTable.get(key)
+		if p is None:
+			Polynomial._internTable[key] = p = self
+		return p
+
+
 # create identity polynomials for given variable name (e.g. polynomial x for variable name 'x')
 def symbol(varName='x'):
 	'''generate identity polynomials given a variable name
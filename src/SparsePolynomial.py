@@ -0,0 +1,346 @@
+'''Sparse multivariate polynomials.
+A polynomial is stored as dictionary mapping exponent tuples to non-zero coefficients.
+The exponents refer to a tuple of variable names in ascending lexicographic order,
+e.g. {(1,2): 3} with variable names ('x','y') represents 3xy^2.
+Conversion to and from the nested representation of class Polynomial is supported.
+'''
+import numbers
+try:
+	from Polynomial import Polynomial
+	import comb_tables
+except ImportError:
+	from .Polynomial import Polynomial
+	from . import comb_tables
+
+
+class SparsePolynomial:
+	def __init__(self, terms=None, varNames=('x',)):
+		'''create sparse polynomial from dictionary {exponent tuple: coefficient}
+		   or from a number (constant polynomial).
+
+		   >>> SparsePolynomial({(1,0): 2, (0,2): -1}, ('x','y'))
+		   <SparsePolynomial '-y^2 + 2x'>
+		   >>> SparsePolynomial(3)
+		   <SparsePolynomial '3'>
+		'''
+		varNames = tuple(varNames)
+		if list(varNames) != sorted(set(varNames)):
+			raise ValueError("variable names must be unique and sorted, '%s' given" % (varNames,))
+		self.varNames = varNames
+		if terms is None:
+			terms = {}
+		elif isinstance(terms, numbers.Number):
+			terms = {(0,)*len(varNames): terms}
+		elif not isinstance(terms, dict):
+			raise TypeError('unexpected type "%s" when constructing sparse polynomial' % type(terms))
+		for exps in terms:
+			if len(exps) != len(varNames):
+				raise ValueError("exponent tuple %s does not match variable names %s" % (exps, varNames))
+		self.terms = {exps: c for exps,c in terms.items() if c != 0}
+
+
+	@staticmethod
+	def symbol(varName='x'):
+		'''sparse polynomial of a single variable
+
+		   >>> SparsePolynomial.symbol('y')
+		   <SparsePolynomial 'y'>
+		'''
+		return SparsePolynomial({(1,): 1}, (varName,))
+
+
+	@staticmethod
+	def fromCoeffs(coeffs, varName='x'):
+		'''create univariate sparse polynomial from coefficient list (ascending order)'''
+		return SparsePolynomial({(i,): c for i,c in enumerate(coeffs)}, (varName,))
+
+
+	@staticmethod
+	def fromPolynomial(poly):
+		'''convert nested polynomial to sparse representation
+
+		   >>> from Polynomial import poly
+		   >>> SparsePolynomial.fromPolynomial(poly('(x+y)^2')).terms == {(2,0): 1, (1,1): 2, (0,2): 1}
+		   True
+		'''
+		if isinstance(poly, numbers.Number):
+			return SparsePolynomial(poly)
+		varNames = tuple(sorted(poly.allVarNames()))
+		varIdx = {v: i for i,v in enumerate(varNames)}
+		terms = {}
+		def _collect(p, exps):
+			iVar = varIdx[p.varName]
+			for e,c in enumerate(p.coeffs):
+				if c == 0: continue
+				expsTerm = exps[:iVar] + (e,) + exps[iVar+1:]
+				if isinstance(c, Polynomial):
+					_collect(c, expsTerm)
+				else:
+					terms[expsTerm] = terms.get(expsTerm, 0) + c
+		_collect(poly, (0,)*len(varNames))
+		return SparsePolynomial(terms, varNames)
+
+
+	def toPolynomial(self):
+		'''convert to nested polynomial
+
+		   >>> p = SparsePolynomial({(1,1): 2, (0,0): 1}, ('x','y'))
+		   >>> p.toPolynomial()
+		   <Polynomial '2xy + 1'>
+		'''
+		return Polynomial._fromTerms(self.terms, self.varNames)
+
+
+	def _withVarNames(self, varNames):
+		# express terms with respect to a superset of the variable names
+		if varNames == self.varNames:
+			return self.terms
+		idx = [varNames.index(v) for v in self.varNames]
+		terms = {}
+		for exps,c in self.terms.items():
+			expsNew = [0]*len(varNames)
+			for i,e in zip(idx, exps):
+				expsNew[i] = e
+			terms[tuple(expsNew)] = c
+		return terms
+
+
+	def _unify(self, poly):
+		# terms of both operands with respect to common variable names
+		if isinstance(poly, numbers.Number):
+			poly = SparsePolynomial(poly, self.varNames)
+		elif isinstance(poly, Polynomial):
+			poly = SparsePolynomial.fromPolynomial(poly)
+		elif not isinstance(poly, SparsePolynomial):
+			raise ValueError("unexpected argument type %s" % type(poly))
+		varNames = self.varNames if poly.varNames == self.varNames else tuple(sorted(set(self.varNames + poly.varNames)))
+		return varNames, self._withVarNames(varNames), poly._withVarNames(varNames)
+
+
+	def deg(self, varName=None):
+		'''total degree, or degree in given variable (zero polynomial has degree -1)
+
+		   >>> p = SparsePolynomial({(1,2): 1, (3,0): 1}, ('x','y'))
+		   >>> p.deg(), p.deg('x'), p.deg('y'), p.deg('z')
+		   (3, 3, 2, 0)
+		'''
+		if not self.terms: return -1
+		if varName is None:
+			return max(sum(exps) for exps in self.terms)
+		if varName not in self.varNames: return 0
+		i = self.varNames.index(varName)
+		return max(exps[i] for exps in self.terms)
+
+
+	def __add__(self, poly):
+		'''overload operator +
+
+		   >>> x,y = SparsePolynomial.symbol('x'), SparsePolynomial.symbol('y')
+		   >>> x + y + 1
+		   <SparsePolynomial 'y + x + 1'>
+		'''
+		try:
+			varNames,terms1,terms2 = self._unify(poly)
+		except ValueError:
+			return NotImplemented
+		terms = dict(terms1)
+		for exps,c in terms2.items():
+			terms[exps] = terms.get(exps, 0) + c
+		return SparsePolynomial(terms, varNames)
+
+
+	def __radd__(self, poly):
+		return self.__add__(poly)
+
+
+	def __neg__(self):
+		return SparsePolynomial({exps: -c for exps,c in self.terms.items()}, self.varNames)
+
+
+	def __sub__(self, poly):
+		'''overload operator -
+
+		   >>> x = SparsePolynomial.symbol('x')
+		   >>> x - x
+		   <SparsePolynomial '0'>
+		'''
+		try:
+			varNames,terms1,terms2 = self._unify(poly)
+		except ValueError:
+			return NotImplemented
+		terms = dict(terms1)
+		for exps,c in terms2.items():
+			terms[exps] = terms.get(exps, 0) - c
+		return SparsePolynomial(terms, varNames)
+
+
+	def __rsub__(self, poly):
+		return (-self).__add__(poly)
+
+
+	def __mul__(self, poly):
+		'''overload operator *
+
+		   >>> x,y = SparsePolynomial.symbol('x'), SparsePolynomial.symbol('y')
+		   >>> (x + y)*(x - y)
+		   <SparsePolynomial '-y^2 + x^2'>
+		   >>> 2*x
+		   <SparsePolynomial '2x'>
+		'''
+		if isinstance(poly, numbers.Number):
+			return SparsePolynomial({exps: c*poly for exps,c in self.terms.items()}, self.varNames)
+		try:
+			varNames,terms1,terms2 = self._unify(poly)
+		except ValueError:
+			return NotImplemented
+		terms = {}
+		for exps1,c1 in terms1.items():
+			for exps2,c2 in terms2.items():
+				exps = tuple([e1+e2 for e1,e2 in zip(exps1, exps2)])
+				terms[exps] = terms.get(exps, 0) + c1*c2
+		return SparsePolynomial(terms, varNames)
+
+
+	def __rmul__(self, poly):
+		return self.__mul__(poly)
+
+
+	def __pow__(self, e):
+		'''overload operator ** (exponentiation)
+
+		   >>> (SparsePolynomial.symbol('x') + 1)**2
+		   <SparsePolynomial 'x^2 + 2x + 1'>
+		'''
+		res = SparsePolynomial(1, self.varNames)
+		p_2 = self
+		while e > 0:
+			if e % 2: res = res*p_2
+			e >>= 1
+			if e: p_2 = p_2*p_2
+		return res
+
+
+	def __eq__(self, poly):
+		'''overload operator ==
+
+		   >>> SparsePolynomial(1) == 1
+		   True
+		   >>> SparsePolynomial.symbol('x') == SparsePolynomial.symbol('y')
+		   False
+		'''
+		try:
+			_,terms1,terms2 = self._unify(poly)
+		except ValueError:
+			return NotImplemented
+		return terms1 == terms2
+
+
+	def der(self, varName):
+		'''partial derivative with respect to given variable
+
+		   >>> SparsePolynomial({(1,2): 1}, ('x','y')).der('y')
+		   <SparsePolynomial '2xy'>
+		'''
+		if varName not in self.varNames:
+			return SparsePolynomial(None, self.varNames)
+		i = self.varNames.index(varName)
+		terms = {exps[:i] + (exps[i]-1,) + exps[i+1:]: exps[i]*c for exps,c in self.terms.items() if exps[i] > 0}
+		return SparsePolynomial(terms, self.varNames)
+
+
+	def intIndef(self, varName):
+		'''indefinite integral with respect to given variable
+
+		   >>> SparsePolynomial({(1,1): 1}, ('x','y')).intIndef('y')
+		   <SparsePolynomial '1/2xy^2'>
+		'''
+		p = self if varName in self.varNames else SparsePolynomial(self._withVarNames(tuple(sorted(self.varNames + (varName,)))),
+			tuple(sorted(self.varNames + (varName,))))
+		i = p.varNames.index(varName)
+		eMax = max((exps[i] for exps in p.terms), default=0) + 1
+		rec,recFloat = comb_tables.reciprocals(eMax), comb_tables.reciprocals(eMax, exact=False)
+		terms = {}
+		for exps,c in p.terms.items():
+			e = exps[i]+1
+			terms[exps[:i] + (e,) + exps[i+1:]] = c*(recFloat if isinstance(c, float) else rec)[e]
+		return SparsePolynomial(terms, p.varNames)
+
+
+	def subs(self, substitutions):
+		'''substitute numbers or polynomials for variables; the result is a sparse polynomial
+
+		   >>> p = SparsePolynomial({(1,1): 2, (0,0): 1}, ('x','y'))
+		   >>> p.subs({'x': 3})
+		   <SparsePolynomial '6y + 1'>
+		   >>> p.subs({'x': 1, 'y': SparsePolynomial.symbol('x')})
+		   <SparsePolynomial '2x + 1'>
+		'''
+		iSubs = [i for i,v in enumerate(self.varNames) if v in substitutions]
+		iKeep = [i for i,v in enumerate(self.varNames) if v not in substitutions]
+		valSubs = {}
+		varNamesRes = set(self.varNames[i] for i in iKeep)
+		for i in iSubs:
+			val = substitutions[self.varNames[i]]
+			if isinstance(val, Polynomial):
+				val = SparsePolynomial.fromPolynomial(val)
+			if isinstance(val, SparsePolynomial):
+				varNamesRes.update(val.varNames)
+			valSubs[i] = val
+		varNamesRes = tuple(sorted(varNamesRes))
+		iRes = [varNamesRes.index(self.varNames[i]) for i in iKeep]
+		# powers of substituted values; polynomial powers are expressed in the resulting variables
+		powers = {i: [1 if isinstance(val, numbers.Number) else SparsePolynomial(1, varNamesRes)] for i,val in valSubs.items()}
+		def _power(i, e):
+			pows = powers[i]
+			while len(pows) <= e:
+				pows.append(pows[-1]*valSubs[i])
+			return pows[e]
+		terms = {}
+		for exps,c in self.terms.items():
+			val = c
+			polyVal = None
+			for i in iSubs:
+				if not exps[i]: continue
+				pow_i = _power(i, exps[i])
+				if isinstance(pow_i, SparsePolynomial):
+					polyVal = pow_i if polyVal is None else polyVal*pow_i
+				else:
+					val = val*pow_i
+			expsRes = [0]*len(varNamesRes)
+			for i,iR in zip(iKeep, iRes):
+				expsRes[iR] = exps[i]
+			if polyVal is None:
+				expsRes = tuple(expsRes)
+				terms[expsRes] = terms.get(expsRes, 0) + val
+			else:
+				for expsPoly,cPoly in polyVal._withVarNames(varNamesRes).items():
+					expsTerm = tuple([e1+e2 for e1,e2 in zip(expsRes, expsPoly)])
+					terms[expsTerm] = terms.get(expsTerm, 0) + val*cPoly
+		return SparsePolynomial(terms, varNamesRes)
+
+
+	def eval(self, point):
+		'''evaluate at point given as dictionary {varName: value}; returns a number
+		   if values for all variables are given
+
+		   >>> SparsePolynomial({(1,1): 2, (0,0): 1}, ('x','y')).eval({'x': 2, 'y': 3})
+		   13
+		'''
+		p = self.subs(point)
+		if p.deg() > 0:
+			return p
+		return p.terms.get((0,)*len(p.varNames), 0)
+
+
+	def __str__(self):
+		return str(self.toPolynomial())
+
+
+	def __repr__(self):
+		return "<SparsePolynomial '%s'>" % self
+
+
+if __name__ == "__main__":
+	import doctest
+	print('running doc tests ...')
+	doctest.testmod()
@@ -0,0 +1,72 @@
+"""
+growable tables of combinatorial constants: reciprocals 1/k, factorials k!,
+rows of binomial coefficients and beta integrals int_0^1 s^i (1-s)^j ds.
+
+Each table exists in an exact variant (ints and Fractions) and a float variant
+and is extended on demand. The returned lists are shared and must not be modified.
+"""
+
+from fractions import Fraction
+
+_reciprocals = {True: [0, 1], False: [0.0, 1.0]}
+_factorials = {True: [1], False: [1.0]}
+_binomialRows = {True: [[1]], False: [[1.0]]}
+
+
+def reciprocals(n, exact=True):
+	"""table r with r[k] = 1/k for 1 <= k <= n (r[0] is 0)
+
+	>>> reciprocals(3)[1:4]
+	[1, Fraction(1, 2), Fraction(1, 3)]
+	>>> reciprocals(4, exact=False)[4]
+	0.25
+	"""
+	table = _reciprocals[exact]
+	for k in range(len(table), n+1):
+		table.append(Fraction(1, k) if exact else 1.0/k)
+	return table
+
+
+def factorials(n, exact=True):
+	"""table f with f[k] = k! for 0 <= k <= n
+
+	>>> factorials(5)
+	[1, 1, 2, 6, 24, 120]
+	"""
+	table = _factorials[exact]
+	for k in range(len(table), n+1):
+		table.append(table[-1]*k)
+	return table
+
+
+def binomial_row(n, exact=True):
+	"""binomial coefficients [C(n,0), C(n,1), ..., C(n,n)]
+
+	>>> binomial_row(4)
+	[1, 4, 6, 4, 1]
+	"""
+	rows = _binomialRows[exact]
+	for k in range(len(rows), n+1):
+		prev = rows[-1]
+		rows.append([prev[0]] + [prev[i-1] + prev[i] for i in range(1, k)] + [prev[-1]])
+	return rows[n]
+
+
+def beta_integral(i, j, exact=True):
+	"""int_0^1 s^i (1-s)^j ds = i! j! / (i+j+1)!
+
+	>>> beta_integral(1, 1)
+	Fraction(1, 6)
+	>>> beta_integral(2, 0, exact=False)
+	0.3333333333333333
+	"""
+	fact = factorials(i+j+1)
+	if exact:
+		return Fraction(fact[i]*fact[j], fact[i+j+1])
+	return fact[i]*fact[j] / fact[i+j+1]
+
+
+if __name__ == "__main__":
+	import doctest
+	print('running doc tests ...')
+	doctest.testmod()
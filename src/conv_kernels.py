@@ -0,0 +1,136 @@
+"""
+convolution kernels for polynomial pieces of given degrees.
+
+The convolution of a polynomial F of degree n on [0,w1] with a polynomial G of degree m
+on [0,w2] (both in local coordinates relative to the left interval end) consists of
+three polynomials in y, which are bilinear forms in the coefficients of F and G:
+	P0(y) = int_0^y  F(s)G(y-s) ds   (only depends on the coefficients)
+	P1(y) = int_0^w1 F(s)G(y-s) ds   (depends on w1)
+	P2(y) = int_0^w2 F(y-u)G(u) du   (depends on w2)
+The convolution is P0 on [0,min(w1,w2)], P1 (if w1 <= w2) or P2 (if w1 > w2) on
+[min(w1,w2),max(w1,w2)] and P1 - P0 + P2 on [max(w1,w2),w1+w2].
+
+For each pair of degrees these bilinear forms are derived symbolically once,
+translated to straight-line Python code and cached.
+"""
+
+import functools
+
+try:
+	from SparsePolynomial import SparsePolynomial
+	import comb_tables
+except ImportError:
+	from .SparsePolynomial import SparsePolynomial
+	from . import comb_tables
+
+
+def _symbolicCoeffs(name, n):
+	return ['%s%03d' % (name, i) for i in range(n+1)]
+
+
+def _symbolicPoly(coeffNames, varPoly):
+	# sum_i c_i*varPoly^i with symbolic coefficients c_i
+	res = SparsePolynomial(None, ())
+	varPow = SparsePolynomial(1, ())
+	for c in coeffNames:
+		res = res + SparsePolynomial.symbol(c)*varPow
+		varPow = varPow*varPoly
+	return res
+
+
+def derive(deg1, deg2):
+	"""derive the polynomials P0, P1, P2 for given degrees as sparse polynomials in y,
+	the symbolic coefficients f000, f001, ..., g000, g001, ... and the widths w1, w2
+
+	>>> P0,P1,P2 = derive(0, 0)
+	>>> P0, P1, P2
+	(<SparsePolynomial 'f000g000y'>, <SparsePolynomial 'f000g000w1'>, <SparsePolynomial 'f000g000w2'>)
+	"""
+	fNames,gNames = _symbolicCoeffs('f', deg1), _symbolicCoeffs('g', deg2)
+	s,u,y = [SparsePolynomial.symbol(v) for v in ('s', 'u', 'y')]
+	# int_0^y s^i (y-s)^j ds = B(i,j) y^(i+j+1) with the beta integral B(i,j) = int_0^1 s^i (1-s)^j ds
+	nf,ng = len(fNames),len(gNames)
+	P0 = SparsePolynomial({(0,)*i + (1,) + (0,)*(nf-1-i + j) + (1,) + (0,)*(ng-1-j) + (i+j+1,): comb_tables.beta_integral(i, j)
+	                       for i in range(nf) for j in range(ng)}, tuple(fNames + gNames + ['y']))
+	H = (_symbolicPoly(fNames, s)*_symbolicPoly(gNames, y-s)).intIndef('s')
+	P1 = H.subs({'s': SparsePolynomial.symbol('w1')})
+	H2 = (_symbolicPoly(fNames, y-u)*_symbolicPoly(gNames, u)).intIndef('u')
+	P2 = H2.subs({'u': SparsePolynomial.symbol('w2')})
+	return P0, P1, P2
+
+
+def _code(P, yIdx, constants, products):
+	# code for the list of coefficients of y^k of P, each a sum of monomials in f_i, g_j, w
+	exprs = {}
+	for exps,c in P.terms.items():
+		factors = [v for v,e in zip(P.varNames, exps) if e and v[0] in 'fg']
+		prodName = '_'.join(factors)
+		products[prodName] = ' * '.join(factors)
+		wFactors = ['%s_%d' % (v, e) for v,e in zip(P.varNames, exps) if e and v[0] == 'w']
+		term = '*'.join([prodName] + wFactors)
+		if c != 1:
+			name = '_k%d' % len(constants)
+			constants[name] = c
+			term = '%s*%s' % (name, term)
+		exprs.setdefault(exps[yIdx] if yIdx is not None else 0, []).append(term)
+	deg = max(exprs, default=-1)
+	return '[%s]' % ', '.join(' + '.join(exprs[k]) if k in exprs else '0' for k in range(deg+1))
+
+
+@functools.lru_cache(maxsize=None)
+def kernel(deg1, deg2, floatConstants=False):
+	"""function (f, g, w1, w2) -> (P0, P1, P2) computing the coefficient lists of the
+	convolution polynomials for coefficient lists f, g of given degrees (see module doc)
+
+	>>> k = kernel(1, 0)
+	>>> k([0, 1], [1], 1, 1) # F(s) = s on [0,1], G = 1 on [0,1]
+	([0, 0, Fraction(1, 2)], [Fraction(1, 2)], [Fraction(-1, 2), 1])
+	"""
+	P0,P1,P2 = derive(deg1, deg2)
+	constants,products = {},{}
+	if floatConstants:
+		P0,P1,P2 = [SparsePolynomial({exps: float(c) for exps,c in P.terms.items()}, P.varNames) for P in (P0,P1,P2)]
+	polyCodes = [_code(P, P.varNames.index('y') if 'y' in P.varNames else None, constants, products) for P in (P0,P1,P2)]
+	fNames,gNames = _symbolicCoeffs('f', deg1), _symbolicCoeffs('g', deg2)
+	lines = ['def _kernel(f, g, w1, w2):',
+		'\t%s, = f' % ', '.join(fNames),
+		'\t%s, = g' % ', '.join(gNames)]
+	for w,deg in (('w1', deg1+deg2+1), ('w2', deg1+deg2+1)):
+		lines.append('\t%s_1 = %s' % (w, w))
+		lines += ['\t%s_%d = %s_%d*%s' % (w, e, w, e-1, w) for e in range(2, deg+1)]
+	lines += ['\t%s = %s' % (name, expr) for name,expr in products.items() if '*' in expr]
+	lines.append('\treturn %s' % ', '.join(polyCodes))
+	exec('\n'.join(lines), constants)
+	return constants['_kernel']
+
+
+def convPieces(f, g, w1, w2):
+	"""convolution of polynomial pieces f on [0,w1] and g on [0,w2] (coefficient lists in
+	local coordinates) as list of (coefficient list, [yStart, yEnd]) in local coordinates
+	y = x - (a1 + a2)
+
+	>>> convPieces([1], [1], 1, 1)
+	[([0, 1], [0, 1]), ([2, -1], [1, 2])]
+	"""
+	if not f or not g:
+		return []
+	useFloat = any(isinstance(v, float) for v in (w1, w2, *f, *g))
+	P0,P1,P2 = kernel(len(f)-1, len(g)-1, useFloat)(f, g, w1, w2)
+	wMin,wMax = (w1,w2) if w1 <= w2 else (w2,w1)
+	pieces = [(P0, [0, wMin])]
+	if wMin != wMax:
+		pieces.append((P1 if w1 <= w2 else P2, [wMin, wMax]))
+	PLast = [c1 - c0 + c2 for c0,c1,c2 in _zip0(P0, P1, P2)]
+	pieces.append((PLast, [wMax, w1+w2]))
+	return pieces
+
+
+def _zip0(*coeffLists):
+	n = max(len(c) for c in coeffLists)
+	return zip(*[list(c) + [0]*(n-len(c)) for c in coeffLists])
+
+
+if __name__ == "__main__":
+	import doctest
+	print('running doc tests ...')
+	doctest.testmod()
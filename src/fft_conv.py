@@ -0,0 +1,221 @@
+"""
+approximate convolution of piecewise polynomial functions by FFT.
+
+The functions are replaced by their averages over the cells of a grid with step h
+(step functions), which are convolved with NumPy's FFT. The convolution of the step
+functions is exact at the grid points and approximates the convolution with error O(h^2)
+also for discontinuous functions.
+The result is a grid function, optionally refitted to a piecewise polynomial function
+by interpolation. The error of the grid values is estimated by comparing with the result
+for step 2h, the error of the refitted function adds the interpolation and merging error
+(see refitErrorEstimate).
+
+The functions work on lists of pieces (coeffs, [a, b]) as in modular_conv, where coeffs
+are the coefficients of the polynomial in local coordinates t = x - a. The support must
+be finite; the computations are done with floats.
+"""
+
+import math
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# number of grid cells over the support of the convolution if no step is given
+DEFAULT_CELLS = 2**12
+# relative tolerance (with respect to the maximal value) for merging adjacent pieces
+MERGE_RTOL = 1e-12
+
+
+def integral(pieces, xs):
+	'''values of the integral of the piecewise polynomial function from -inf to the points xs
+
+	   >>> integral([([0, 1], [0, 1]), ([1], [1, 2])], numpy.array([-1, 0.5, 1.5, 3])).tolist()
+	   [0.0, 0.125, 1.0, 1.5]
+	'''
+	# coefficient matrix of the antiderivatives in local coordinates (one row per piece)
+	deg = max(len(coeffs) for coeffs,_ in pieces)
+	intCoeffs = numpy.zeros((len(pieces), deg+1))
+	for i,(c,_) in enumerate(pieces):
+		intCoeffs[i,1:len(c)+1] = [float(v)/(k+1) for k,v in enumerate(c)]
+	starts = numpy.array([float(a) for _,(a,_) in pieces])
+	ends = numpy.array([float(b) for _,(_,b) in pieces])
+	def _horner(idx, t):
+		values = intCoeffs[idx,-1].copy()
+		for d in range(deg-1, -1, -1):
+			values = values*t + intCoeffs[idx,d]
+		return values
+	# integral up to the start of each piece and in total
+	offsets = numpy.concatenate(([0.0], numpy.cumsum(_horner(numpy.arange(len(pieces)), ends-starts))))
+	idx = numpy.searchsorted(ends, xs)
+	idxPiece = numpy.minimum(idx, len(pieces)-1)
+	t = numpy.clip(xs - starts[idxPiece], 0.0, None)
+	inside = (idx < len(pieces)) & (xs > starts[idxPiece])
+	return offsets[idx] + numpy.where(inside, _horner(idxPiece, t), 0.0)
+
+
+def _support(pieces):
+	a,b = float(pieces[0][1][0]), float(pieces[-1][1][1])
+	if math.isinf(a) or math.isinf(b):
+		raise ValueError('fft convolution needs functions with finite support')
+	return a, b
+
+
+def convGrid(pieces1, pieces2, h):
+	'''approximation of the convolution on the grid y0 + k*h, returned as (y0, values).
+	   The values vanish at both ends of the grid, which covers the support of the convolution.
+
+	   >>> y0,values = convGrid([([1], [0, 1])], [([1], [0, 1])], 0.25)
+	   >>> y0, numpy.round(values, 12).tolist()
+	   (0.0, [0.0, 0.25, 0.5, 0.75, 1.0, 0.75, 0.5, 0.25, 0.0])
+	'''
+	if numpy is None:
+		raise ImportError('fft convolution needs numpy')
+	(a1,b1),(a2,b2) = _support(pieces1), _support(pieces2)
+	n1,n2 = max(1, math.ceil((b1-a1)/h)), max(1, math.ceil((b2-a2)/h))
+	# cell averages
+	f = numpy.diff(integral(pieces1, a1 + numpy.arange(n1+1)*h)) / h
+	g = numpy.diff(integral(pieces2, a2 + numpy.arange(n2+1)*h)) / h
+	# h * sum_i f_i g_(k-i) is the convolution of the step functions at a1 + a2 + (k+1)h
+	nFFT = 1 << (n1+n2-2).bit_length()
+	conv = numpy.fft.irfft(numpy.fft.rfft(f, nFFT) * numpy.fft.rfft(g, nFFT), nFFT)[:n1+n2-1] * h
+	return a1 + a2, numpy.concatenate(([0.0], conv, [0.0]))
+
+
+def errorEstimate(pieces1, pieces2, h, values=None):
+	'''estimate of the error of convGrid: the maximal difference of the results for steps h and 2h
+	   at their common grid points (values are the results for step h, if already computed)'''
+	if values is None:
+		_,values = convGrid(pieces1, pieces2, h)
+	_,values2 = convGrid(pieces1, pieces2, 2*h)
+	common = min(len(values2), (len(values)+1)//2)
+	return float(numpy.max(numpy.abs(values[:2*common:2] - values2[:common])))
+
+
+def refit(y0, h, values, deg=1):
+	'''piecewise polynomial interpolation of the grid function y0 + k*h -> values[k]:
+	   each piece interpolates deg+1 consecutive values (the last one fewer),
+	   returns a list of (local coefficients, [a, b])
+
+	   >>> pieces = refit(0.0, 0.5, numpy.array([0.0, 0.5, 1.0, 0.5, 0.0]), deg=2)
+	   >>> [(numpy.round(coeffs, 12).tolist(), intv) for coeffs,intv in pieces]
+	   [([0.0, 1.0, 0.0], [0.0, 1.0]), ([1.0, -1.0, 0.0], [1.0, 2.0])]
+	'''
+	if deg < 1:
+		raise ValueError('refit needs degree >= 1, got %s' % deg)
+	nCells = len(values) - 1
+	nPieces = math.ceil(nCells/deg)
+	res = []
+	# interpolation of full pieces: one linear system with the same matrix for all of them
+	nFull = nCells // deg
+	if nFull > 0:
+		t = numpy.arange(deg+1)*h
+		vInv = numpy.linalg.inv(numpy.vander(t, increasing=True))
+		blocks = values[numpy.arange(nFull)[:,None]*deg + numpy.arange(deg+1)]
+		for i,coeffs in enumerate(blocks @ vInv.T):
+			res.append((coeffs.tolist(), [y0 + i*deg*h, y0 + (i+1)*deg*h]))
+	if nPieces > nFull:
+		rest = values[nFull*deg:]
+		t = numpy.arange(len(rest))*h
+		coeffs = numpy.linalg.solve(numpy.vander(t, increasing=True), rest)
+		res.append((coeffs.tolist(), [y0 + nFull*deg*h, y0 + nCells*h]))
+	return res
+
+
+def evalPieces(pieces, xs):
+	'''values of the piecewise polynomial function at the sorted points xs inside of its support
+
+	   >>> evalPieces([([0.0, 1.0], [0.0, 1.0]), ([1.0, -1.0], [1.0, 2.0])], numpy.array([0.0, 0.5, 1.5, 2.0])).tolist()
+	   [0.0, 0.5, 0.5, 0.0]
+	'''
+	deg = max(len(coeffs) for coeffs,_ in pieces) - 1
+	coeffMatrix = numpy.zeros((len(pieces), deg+1))
+	for i,(c,_) in enumerate(pieces):
+		coeffMatrix[i,:len(c)] = c
+	starts = numpy.array([float(a) for _,(a,_) in pieces])
+	idx = numpy.clip(numpy.searchsorted(starts, xs, side='right') - 1, 0, len(pieces)-1)
+	t = xs - starts[idx]
+	values = coeffMatrix[idx,-1].copy()
+	for d in range(deg-1, -1, -1):
+		values = values*t + coeffMatrix[idx,d]
+	return values
+
+
+def refitErrorEstimate(y0, h, values, pieces, deg=1):
+	'''estimate of the error of the piecewise polynomial function pieces (refit and mergePieces of
+	   the grid function y0 + k*h -> values[k]) with respect to the grid function: the maximal
+	   deviation at the grid points (merging) plus the interpolation error between the grid points,
+	   estimated by refitting the even and the odd grid points with step 2h and comparing at the
+	   grid points in between (which overestimates the interpolation error for step h)
+
+	   >>> values = numpy.array([0.0, 0.25, 1.0, 2.25, 4.0])
+	   >>> refitErrorEstimate(0.0, 0.5, values, refit(0.0, 0.5, values, 1), 1)
+	   0.25
+	'''
+	xs = y0 + numpy.arange(len(values))*h
+	interpErr = 0.0
+	for first in (0, 1):
+		sub = values[first::2]
+		if len(sub) < 2: continue
+		between = numpy.arange(first+1, first + 2*len(sub) - 2, 2)
+		subPieces = refit(xs[first], 2*h, sub, deg)
+		interpErr = max(interpErr, float(numpy.max(numpy.abs(evalPieces(subPieces, xs[between]) - values[between]))))
+	return float(numpy.max(numpy.abs(evalPieces(pieces, xs) - values))) + interpErr
+
+
+def mergePieces(pieces, tol):
+	'''merge adjacent pieces, if the polynomial of the first one continued over the next
+	   piece differs by at most tol from its polynomial (at deg+1 equidistant points)
+
+	   >>> mergePieces([([0.0, 1.0], [0.0, 0.5]), ([0.5, 1.0], [0.5, 1.0]), ([1.0, 0.0], [1.0, 2.0])], 1e-12)
+	   [([0.0, 1.0], [0.0, 1.0]), ([1.0, 0.0], [1.0, 2.0])]
+	'''
+	res = []
+	for coeffs,(a,b) in pieces:
+		if res:
+			prevCoeffs,prevIntv = res[-1]
+			t = numpy.linspace(0.0, b-a, max(len(coeffs), len(prevCoeffs)))
+			diff = numpy.polynomial.polynomial.polyval(t + (a - prevIntv[0]), prevCoeffs) - numpy.polynomial.polynomial.polyval(t, coeffs)
+			if numpy.max(numpy.abs(diff)) <= tol:
+				res[-1] = (prevCoeffs, [prevIntv[0], b])
+				continue
+		res.append((coeffs, [a, b]))
+	return res
+
+
+def convPieces(pieces1, pieces2, h=None, deg=1, grid=False):
+	'''approximate convolution of two piecewise polynomial functions given as lists of
+	   (local coefficients, [a, b]) with grid step h (default: DEFAULT_CELLS cells over the
+	   support of the result); returns (result, error estimate), the result is a list of
+	   (local coefficients, [a, b]) of degree deg >= 1, in which adjacent pieces continuing
+	   the same polynomial (up to MERGE_RTOL) are merged, or with grid=True the grid function
+	   as pair of arrays (xs, values). The error estimate of the grid values (errorEstimate)
+	   includes the error of refit and merging for the piecewise polynomial result (refitErrorEstimate).
+
+	   >>> pieces,err = convPieces([([1], [0, 1])], [([1], [0, 1])], h=0.5, deg=1)
+	   >>> [(numpy.round(coeffs, 12).tolist(), intv) for coeffs,intv in pieces]
+	   [([0.0, 1.0], [0.0, 1.0]), ([1.0, -1.0], [1.0, 2.0])]
+	   >>> round(err, 12) # the kink at 1 is between the grid points for step 2h
+	   0.5
+	'''
+	if deg < 1:
+		raise ValueError('fft convolution needs degree >= 1, got %s' % deg)
+	if not pieces1 or not pieces2:
+		return ((numpy.zeros(0), numpy.zeros(0)) if grid else []), 0.0
+	if h is None:
+		(a1,b1),(a2,b2) = _support(pieces1), _support(pieces2)
+		h = ((b1-a1) + (b2-a2)) / DEFAULT_CELLS
+	y0,values = convGrid(pieces1, pieces2, h)
+	err = errorEstimate(pieces1, pieces2, h, values)
+	if grid:
+		return (y0 + numpy.arange(len(values))*h, values), err
+	tol = MERGE_RTOL * float(numpy.max(numpy.abs(values)))
+	pieces = mergePieces(refit(y0, h, values, deg), tol)
+	return pieces, err + refitErrorEstimate(y0, h, values, pieces, deg)
+
+
+if __name__ == "__main__":
+	import doctest
+	print('running doc tests ...')
+	doctest.testmod()
@@ -0,0 +1,276 @@
+"""
+exact convolution of piecewise polynomial functions by modular arithmetic.
+
+The coefficients are made integral by clearing denominators, the convolution is
+computed modulo several word sized primes (each prime independently) and the exact
+rational result is reconstructed by Chinese remaindering and rational reconstruction.
+Primes are added until the reconstructed result does not change any more (early termination)
+or at the latest until their product exceeds a bound for the numerators and denominators
+of the result (see heightBound), which makes the reconstruction unique.
+This avoids the growth of intermediate Fractions (and their gcd computations)
+for densities of sums of many random variables.
+
+The functions work on lists of pieces (coeffs, [a, b]), where coeffs are the
+coefficients of the polynomial in local coordinates t = x - a (relative to the left
+interval end). Interval ends and coefficients must be rational (int or Fraction).
+"""
+
+from fractions import Fraction
+import bisect
+import functools
+from math import ceil, factorial, gcd, isqrt
+
+# first prime used (the largest prime below 2^31); further primes are the next smaller ones
+PRIME_START = 2**31 - 1
+# stop adding primes once the reconstructed result is stable over one more prime; the result is
+# then correct with high probability, without it as many primes as heightBound requires are used
+EARLY_TERMINATION = True
+
+
+class _UnluckyPrime(Exception):
+	'''raised if a denominator is divisible by the prime'''
+
+
+def _isPrime(n):
+	# deterministic Miller-Rabin test for n < 3.4e14
+	if n < 2: return False
+	for p in (2, 3, 5, 7, 11, 13, 17):
+		if n % p == 0: return n == p
+	d,s = n-1,0
+	while d % 2 == 0: d,s = d//2,s+1
+	for a in (2, 3, 5, 7, 11, 13, 17):
+		x = pow(a, d, n)
+		if x in (1, n-1): continue
+		for _ in range(s-1):
+			x = x*x % n
+			if x == n-1: break
+		else:
+			return False
+	return True
+
+
+def primes(start=PRIME_START):
+	'''generator of the primes below or equal to start in descending order
+
+	>>> import itertools
+	>>> list(itertools.islice(primes(), 3))
+	[2147483647, 2147483629, 2147483587]
+	'''
+	n = start
+	while n > 2:
+		if _isPrime(n): yield n
+		n -= 1
+
+
+def _mod(r, p):
+	# residue of a rational number modulo p
+	if isinstance(r, int): return r % p
+	if r.denominator % p == 0: raise _UnluckyPrime()
+	return r.numerator * pow(r.denominator, -1, p) % p
+
+
+def _taylorShiftMod(coeffs, a, p):
+	# coefficients of q(t) = c(t + a) modulo p
+	c = list(coeffs)
+	n = len(c)
+	for i in range(n-1):
+		for j in range(n-2, i-1, -1):
+			c[j] = (c[j] + a*c[j+1]) % p
+	return c
+
+
+def _convPairMod(f, g, w1, w2, p, inv, fact, invFact):
+	'''polynomials P0, P1, P2 of conv_kernels modulo p for the local coefficient lists f, g
+	   (residues) on [0,w1] and [0,w2]'''
+	n,m = len(f), len(g)
+	P0 = [0]*(n+m)
+	for i,fi in enumerate(f):
+		if fi == 0: continue
+		for j,gj in enumerate(g):
+			# beta integral i! j! / (i+j+1)!
+			P0[i+j+1] = (P0[i+j+1] + fi*gj % p * fact[i] % p * fact[j] % p * invFact[i+j+1]) % p
+	def _outer(f, g, w):
+		# int_0^w f(s) g(y-s) ds = sum_j g_j sum_k C(j,k) (-1)^k y^(j-k) M_k with M_k = int_0^w f(s) s^k ds
+		wPows = [1]
+		for _ in range(len(f)+len(g)): wPows.append(wPows[-1]*w % p)
+		M = [sum(fi*wPows[i+k+1] % p * inv[i+k+1] for i,fi in enumerate(f)) % p for k in range(len(g))]
+		res = [0]*len(g)
+		for j,gj in enumerate(g):
+			if gj == 0: continue
+			for k in range(j+1):
+				# C(j,k) = j! / (k! (j-k)!)
+				binom = fact[j]*invFact[k] % p * invFact[j-k] % p
+				term = gj*binom % p * M[k] % p
+				res[j-k] = (res[j-k] + (term if k % 2 == 0 else -term)) % p
+		return res
+	P1 = _outer(f, g, w1)
+	P2 = _outer(g, f, w2)
+	return P0, P1, P2
+
+
+def _pairIntervals(intv1, intv2):
+	'''intervals of the convolution of two pieces: [P0, middle polynomial, P1 - P0 + P2]
+	   (see conv_kernels), the middle one is None for equal widths'''
+	(a1,b1),(a2,b2) = intv1,intv2
+	w1,w2 = b1-a1, b2-a2
+	wMin,wMax = min(w1, w2), max(w1, w2)
+	a = a1 + a2
+	return [[a, a+wMin], [a+wMin, a+wMax] if wMin != wMax else None, [a+wMax, a+w1+w2]]
+
+
+def _convMod(pieces1, pieces2, breaks, p):
+	'''residues of the coefficients of the convolution on the intervals between breaks
+	   (in local coordinates relative to the left ends) modulo p'''
+	deg = max(len(c) for c,_ in pieces1) + max(len(c) for c,_ in pieces2)
+	inv = [0, 1]
+	for k in range(2, deg+2): inv.append(-(p//k) * inv[p % k] % p)
+	fact,invFact = [1],[1]
+	for k in range(1, deg+2):
+		fact.append(fact[-1]*k % p)
+		invFact.append(invFact[-1]*inv[k] % p)
+	f = [([c % p for c in coeffs], _mod(b-a, p)) for coeffs,(a,b) in pieces1]
+	g = [([c % p for c in coeffs], _mod(b-a, p)) for coeffs,(a,b) in pieces2]
+	breaksMod = [_mod(x, p) for x in breaks]
+	res = [[0]*deg for _ in breaks[:-1]]
+	for (fi,w1),(_,intv1) in zip(f, pieces1):
+		for (gj,w2),(_,intv2) in zip(g, pieces2):
+			P0,P1,P2 = _convPairMod(fi, gj, w1, w2, p, inv, fact, invFact)
+			P1 += [0]*(len(P0)-len(P1))
+			P2 += [0]*(len(P0)-len(P2))
+			PMid = P1 if intv1[1]-intv1[0] <= intv2[1]-intv2[0] else P2
+			PLast = [(c1 - c0 + c2) % p for c0,c1,c2 in zip(P0, P1, P2)]
+			a = _mod(intv1[0] + intv2[0], p)
+			for Q,intv in zip((P0, PMid, PLast), _pairIntervals(intv1, intv2)):
+				if intv is None: continue
+				for idx in range(bisect.bisect_left(breaks, intv[0]), bisect.bisect_left(breaks, intv[1])):
+					shifted = _taylorShiftMod(Q, (breaksMod[idx] - a) % p, p)
+					resIdx = res[idx]
+					for d,c in enumerate(shifted):
+						resIdx[d] = (resIdx[d] + c) % p
+	return res
+
+
+def _convModSafe(pieces1, pieces2, breaks, p):
+	try:
+		return _convMod(pieces1, pieces2, breaks, p)
+	except _UnluckyPrime:
+		return None
+
+
+def _ratRecon(u, m):
+	'''rational number r with r = u mod m and |numerator|, denominator <= sqrt(m/2),
+	   None if no such number exists'''
+	bound = isqrt(m//2)
+	r0,r1 = m, u % m
+	s0,s1 = 0, 1
+	while r1 > bound:
+		q = r0 // r1
+		r0,r1 = r1, r0 - q*r1
+		s0,s1 = s1, s0 - q*s1
+	if s1 == 0 or abs(s1) > bound or gcd(r1, abs(s1)) != 1:
+		return None
+	return Fraction(r1, s1)
+
+
+def _clearDenominators(pieces):
+	# integral coefficient lists and the common denominator
+	d = 1
+	for coeffs,_ in pieces:
+		for c in coeffs:
+			if isinstance(c, Fraction): d = d*c.denominator // gcd(d, c.denominator)
+	return [([int(c*d) for c in coeffs], intv) for coeffs,intv in pieces], d
+
+
+def heightBound(pieces1, pieces2):
+	'''bound B for the absolute values of the numerators and for the denominators of the
+	   coefficients of the convolution of two piecewise polynomial functions with integral
+	   coefficients (in local coordinates), a modulus m > 2*B^2 determines them by rational
+	   reconstruction.
+
+	   With N = n1 + n2 - 1 for the maximal coefficient list lengths n1, n2, R = max(1, S1 + S2)
+	   for the support lengths S1, S2 and the common denominator q of the interval ends, each coefficient
+	   is a sum of at most (number of piece pairs) integrals int f(s) g(x0+t-s) ds with limits
+	   linear in t, whose coefficients are bounded by |f|_1 |g|_1 (8R)^N (|f|_1: sum of the
+	   absolute values of the coefficients), and has a denominator dividing q^(N+1) (N+1)!.
+
+	   >>> heightBound([([1], [0, 1])], [([1], [0, 1])])
+	   32
+	'''
+	q = 1
+	for _,intv in pieces1 + pieces2:
+		for v in intv:
+			if isinstance(v, Fraction): q = q*v.denominator // gcd(q, v.denominator)
+	n = max(len(c) for c,_ in pieces1) + max(len(c) for c,_ in pieces2) - 1
+	span = (pieces1[-1][1][1] - pieces1[0][1][0]) + (pieces2[-1][1][1] - pieces2[0][1][0])
+	r = max(1, ceil(span))
+	norm1,norm2 = [max(sum(abs(c) for c in coeffs) for coeffs,_ in pieces) for pieces in (pieces1, pieces2)]
+	height = len(pieces1)*len(pieces2) * norm1*norm2 * (8*r)**n
+	denominator = q**(n+1) * factorial(n+1)
+	return height*denominator
+
+
+def convPieces(pieces1, pieces2, mapFunc=map):
+	'''exact convolution of two piecewise polynomial functions given as lists of
+	   (local coefficients, [a, b]); returns the list of (local coefficients, [a, b])
+	   on the intervals between all sums of interval ends.
+	   The computations for several primes are independent and done with mapFunc
+	   (e.g. the map method of an executor for parallel computation).
+
+	   >>> convPieces([([1], [0, 1])], [([1], [0, 1])])
+	   [([0, 1], [0, 1]), ([1, -1], [1, 2])]
+	   >>> convPieces([([0, Fraction(1, 2)], [0, 2])], [([3], [1, Fraction(3, 2)])])
+	   [([0, 0, Fraction(3, 4)], [1, Fraction(3, 2)]), ([Fraction(3, 16), Fraction(3, 4)], [Fraction(3, 2), 3]), ([Fraction(21, 16), Fraction(-9, 4), Fraction(-3, 4)], [3, Fraction(7, 2)])]
+	'''
+	for coeffs,intv in pieces1 + pieces2:
+		if not all(isinstance(v, (int, Fraction)) for v in list(coeffs) + list(intv)):
+			raise ValueError('modular convolution needs rational coefficients and interval ends')
+	pieces1 = [(coeffs, intv) for coeffs,intv in pieces1 if coeffs and intv[0] != intv[1]]
+	pieces2 = [(coeffs, intv) for coeffs,intv in pieces2 if coeffs and intv[0] != intv[1]]
+	if not pieces1 or not pieces2:
+		return []
+	pieces1,d1 = _clearDenominators(pieces1)
+	pieces2,d2 = _clearDenominators(pieces2)
+	breaks = sorted(set(x for _,intv1 in pieces1 for _,intv2 in pieces2
+	                    for intv in _pairIntervals(intv1, intv2) if intv is not None for x in intv))
+	breaks = [x.numerator if isinstance(x, Fraction) and x.denominator == 1 else x for x in breaks]
+	primeGen = primes()
+	convModP = functools.partial(_convModSafe, pieces1, pieces2, breaks)
+	# a modulus above mMin determines the result (and ends the loop also without early termination)
+	mMin = 2*heightBound(pieces1, pieces2)**2
+	m,crt = 1,None
+	result = None
+	while True:
+		newPrimes = []
+		mNew = m
+		while mNew <= mMin and (not EARLY_TERMINATION or len(newPrimes) < (2 if crt is None else 1)):
+			newPrimes.append(next(primeGen))
+			mNew *= newPrimes[-1]
+		for p,resP in zip(newPrimes, mapFunc(convModP, newPrimes)):
+			if resP is None: continue
+			# Chinese remaindering: combine result modulo m with result modulo p
+			if crt is None:
+				crt = resP
+			else:
+				mInv = pow(m, -1, p)
+				crt = [[c + m*((cp - c) * mInv % p) for c,cp in zip(cs, csp)] for cs,csp in zip(crt, resP)]
+			m *= p
+		if crt is None: continue
+		resultNew = [[_ratRecon(c, m) for c in cs] for cs in crt]
+		stable = all(r is not None for rs in resultNew for r in rs) and resultNew == result
+		result = resultNew
+		if stable or m > mMin:
+			break
+	dInv = Fraction(1, d1*d2)
+	res = []
+	for coeffs,intv in zip(result, zip(breaks, breaks[1:])):
+		coeffs = [c*dInv for c in coeffs]
+		coeffs = [c.numerator if c.denominator == 1 else c for c in coeffs]
+		while coeffs and coeffs[-1] == 0: coeffs.pop()
+		res.append((coeffs, list(intv)))
+	return res
+
+
+if __name__ == "__main__":
+	import doctest
+	print('running doc tests ...')
+	doctest.testmod()
@@ -0,0 +1,217 @@
+"""
+parser for polynomial expressions like '(x+1)^2 - 1/2xy'.
+
+The expression is tokenized and parsed by recursive descent without using eval.
+The result is a dictionary {exponent tuple: coefficient} with respect to the
+lexicographically sorted variable names (see SparsePolynomial).
+
+Supported syntax: integer and decimal literals (a/b of integers gives a Fraction),
+variables, + - * / with the usual precedence, powers with ^ or **, parentheses
+and implicit multiplication (e.g. 2xy, 3(x+1), (x+1)(x-1)).
+"""
+
+from fractions import Fraction
+import re
+
+_TOKEN_RE = re.compile(r'\s*(?:(\d+\.\d*|\.\d+)|(\d+)|(\*\*|[-+*/^()])|([a-zA-Z]))')
+_VARNAME_RE = re.compile(r'[a-zA-Z][0-9]*')
+
+
+def findVarNames(exprStr):
+	'''variable names of an expression, when no variable names are given:
+	   a letter optionally followed by digits
+
+	   >>> sorted(findVarNames('x1^2 + 2xy'))
+	   ['x', 'x1', 'y']
+	'''
+	return set(_VARNAME_RE.findall(exprStr))
+
+
+def _tokenize(exprStr, varNames):
+	# list of (kind, value, position) with kind in ('num', 'op', 'var')
+	varNamesByLen = sorted(varNames, key=len, reverse=True)
+	tokens = []
+	pos = 0
+	exprStr = exprStr.rstrip()
+	while pos < len(exprStr):
+		m = _TOKEN_RE.match(exprStr, pos)
+		if m is None:
+			raise ValueError("cannot parse '%s': unexpected character at position %d" % (exprStr, pos))
+		floatStr,intStr,op,letter = m.groups()
+		if floatStr is not None:
+			tokens.append(('num', float(floatStr), m.start(1)))
+		elif intStr is not None:
+			tokens.append(('num', int(intStr), m.start(2)))
+		elif op is not None:
+			tokens.append(('op', op, m.start(3)))
+		else:
+			start = m.start(4)
+			varName = next((v for v in varNamesByLen if exprStr.startswith(v, start)), None)
+			if varName is None:
+				raise ValueError("cannot parse '%s': unknown variable at position %d" % (exprStr, start))
+			tokens.append(('var', varName, start))
+			pos = start + len(varName)
+			continue
+		pos = m.end()
+	return tokens
+
+
+class _Parser:
+	'''recursive descent parser, the values are term dictionaries'''
+
+	def __init__(self, exprStr, varNames):
+		self.exprStr = exprStr
+		self.varNames = varNames
+		self.zeroExps = (0,)*len(varNames)
+		self.tokens = _tokenize(exprStr, varNames)
+		self.pos = 0
+
+	def _error(self, msg):
+		pos = self.tokens[self.pos][2] if self.pos < len(self.tokens) else len(self.exprStr)
+		return ValueError("cannot parse '%s': %s at position %d" % (self.exprStr, msg, pos))
+
+	def _peek(self):
+		return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None, None)
+
+	def _accept(self, *ops):
+		kind,value,_ = self._peek()
+		if kind == 'op' and value in ops:
+			self.pos += 1
+			return value
+		return None
+
+	def parse(self):
+		terms = self._expr()
+		if self.pos < len(self.tokens):
+			raise self._error('unexpected token')
+		return terms
+
+	def _expr(self):
+		terms = self._term()
+		while True:
+			op = self._accept('+', '-')
+			if op is None: return terms
+			terms2 = self._term()
+			terms = _add(terms, terms2 if op == '+' else _scale(terms2, -1))
+
+	def _term(self):
+		terms = self._factor()
+		while True:
+			op = self._accept('*', '/')
+			if op is None:
+				kind,value,_ = self._peek()
+				if kind != 'var' and (kind, value) != ('op', '('): return terms
+			terms2 = self._factor()
+			if op == '/':
+				d = self._const(terms2)
+				if d is None:
+					raise self._error('division by non-constant polynomial')
+				if d == 0:
+					raise self._error('division by zero')
+				terms = {exps: _div(c, d) for exps,c in terms.items()}
+			else:
+				terms = _mul(terms, terms2)
+
+	def _factor(self):
+		op = self._accept('+', '-')
+		if op is None:
+			return self._power()
+		terms = self._factor()
+		return terms if op == '+' else _scale(terms, -1)
+
+	def _power(self):
+		terms = self._atom()
+		if self._accept('^', '**') is None:
+			return terms
+		e = self._const(self._factor())
+		if isinstance(e, Fraction) and e.denominator == 1: e = e.numerator
+		c = self._const(terms)
+		if c is not None and isinstance(e, int):
+			if e < 0 and isinstance(c, int): c = Fraction(c)
+			return self._constTerms(c**e)
+		if not isinstance(e, int) or e < 0:
+			raise self._error('exponent must be a non-negative integer')
+		res = self._constTerms(1)
+		while e > 0:
+			if e % 2: res = _mul(res, terms)
+			e >>= 1
+			if e: terms = _mul(terms, terms)
+		return res
+
+	def _atom(self):
+		kind,value,_ = self._peek()
+		if kind == 'num':
+			self.pos += 1
+			return self._constTerms(value)
+		if kind == 'var':
+			self.pos += 1
+			idx = self.varNames.index(value)
+			return {self.zeroExps[:idx] + (1,) + self.zeroExps[idx+1:]: 1}
+		if self._accept('('):
+			terms = self._expr()
+			if self._accept(')') is None:
+				raise self._error("missing ')'")
+			return terms
+		raise self._error('unexpected end of expression' if kind is None else 'unexpected token')
+
+	def _constTerms(self, c):
+		return {self.zeroExps: c} if c != 0 else {}
+
+	def _const(self, terms):
+		# constant value of terms or None
+		if not terms: return 0
+		if len(terms) == 1 and self.zeroExps in terms: return terms[self.zeroExps]
+		return None
+
+
+def _div(c, d):
+	return Fraction(c, d) if isinstance(c, int) and isinstance(d, int) else c/d
+
+
+def _scale(terms, s):
+	return {exps: s*c for exps,c in terms.items()}
+
+
+def _add(terms1, terms2):
+	res = dict(terms1)
+	for exps,c in terms2.items():
+		c = res.get(exps, 0) + c
+		if c != 0: res[exps] = c
+		else: res.pop(exps, None)
+	return res
+
+
+def _mul(terms1, terms2):
+	res = {}
+	for exps1,c1 in terms1.items():
+		for exps2,c2 in terms2.items():
+			exps = tuple(e1+e2 for e1,e2 in zip(exps1, exps2))
+			res[exps] = res.get(exps, 0) + c1*c2
+	return {exps: c for exps,c in res.items() if c != 0}
+
+
+def parse(exprStr, varNames=None):
+	'''parse expression string, return (terms, varNames) with the sorted tuple of
+	   variable names and the dictionary {exponent tuple: coefficient}
+
+	   >>> parse('(x+y)(x-y)')
+	   ({(2, 0): 1, (0, 2): -1}, ('x', 'y'))
+	   >>> parse('3/4x^2 - 0.5', ['x'])
+	   ({(2,): Fraction(3, 4), (0,): -0.5}, ('x',))
+	   >>> parse('2^-1')
+	   ({(): Fraction(1, 2)}, ())
+	   >>> parse('x/(x+1)')
+	   Traceback (most recent call last):
+	   ...
+	   ValueError: cannot parse 'x/(x+1)': division by non-constant polynomial at position 7
+	'''
+	if varNames is None:
+		varNames = findVarNames(exprStr)
+	varNames = tuple(sorted(set(varNames)))
+	return _Parser(exprStr, varNames).parse(), varNames
+
+
+if __name__ == "__main__":
+	import doctest
+	print('running doc tests ...')
+	doctest.testmod()
@@ -3,9 +3,24 @@ operations on univariate polynomials.
 A polynomial is represented as an iterable over the monomial coefficients,
 e.g. as a list [c0, c1, ..., cn] representing the polynomial c0 + c1*x + ... + cn*x^n.
 ("dense representation")
+
+The arithmetic used by class Polynomial is dispatched to a backend (see get_backend):
+'python' (reference implementation for arbitrary coefficients), 'numpy' (float
+coefficients) and 'gmpy2' (exact rational coefficients), if the packages are available.
 """
 
+import contextlib
+from fractions import Fraction
 from itertools import islice, zip_longest
+from math import gcd, isfinite
+try:
+	import numpy
+except ImportError:
+	numpy = None
+try:
+	import gmpy2
+except ImportError:
+	gmpy2 = None
 
 
 def degree(coeffs):
@@ -37,6 +52,36 @@ def evaluate(coeffs, x0):
 	return p_x0
 
 
+def integral_coeffs(coeffs):
+	"""(numerators, d) with the least common denominator d of the rational 'coeffs'
+	and the integers numerators[i] = coeffs[i]*d"""
+	d = 1
+	for c in coeffs:
+		if isinstance(c, Fraction): d = d*c.denominator // gcd(d, c.denominator)
+	return [int(c*d) for c in coeffs], d
+
+
+def evaluate_rational(numerators, d, x0):
+	"""exact value at rational x0 of the polynomial with coefficients numerators[i]/d
+	(see integral_coeffs). With x0 = a/b Horner's scheme is done in integers on the
+	homogenized polynomial sum_i numerators[i] a^i b^(n-i), followed by a single division.
+	For non-finite float x0 (nan, +-inf), which has no rational value, the float value is returned."""
+	if not numerators:
+		return Fraction(0)
+	if isinstance(x0, float) and not isfinite(x0):
+		v = float(Fraction(numerators[-1], d))
+		for c in reversed(numerators[:-1]):
+			v = v*x0 + float(Fraction(c, d))
+		return v
+	x0 = Fraction(x0)
+	a,b = x0.numerator, x0.denominator
+	v,bPow = numerators[-1],1
+	for c in reversed(numerators[:-1]):
+		bPow *= b
+		v = v*a + c*bPow
+	return Fraction(v, d*bPow)
+
+
 def add(coeffs1, coeffs2):
 	s = [c1+c2 for c1,c2 in zip_longest(coeffs1, coeffs2, fillvalue=0)]
 	return normalize(s)
@@ -100,3 +145,398 @@ def multiply_v2(coeffs1, coeffs2):
 		islice     (coeffs1, max(0, deg-deg2), min(deg1, deg)+1),
 		_rev_islice(coeffs2, min(deg2, deg), max(0, deg-deg1)-1))
 		for deg in range(deg1+deg2+1)]
+
+
+# below this length (of the shorter factor) schoolbook multiplication is faster
+KARATSUBA_THRESHOLD = 32
+
+
+def _iadd_shifted(coeffs, coeffs2, shift, sign=1):
+	"""add coeffs2*x^shift to coeffs (in-place, coeffs is not extended)"""
+	for i in range(min(len(coeffs2), len(coeffs)-shift)):
+		coeffs[shift+i] += sign*coeffs2[i]
+
+
+def multiply_karatsuba(coeffs1, coeffs2):
+	"""product of two polynomials by Karatsuba's divide-and-conquer algorithm.
+	The result has the same length as the result of multiply (no normalization)."""
+	n1,n2 = len(coeffs1), len(coeffs2)
+	if min(n1, n2) <= KARATSUBA_THRESHOLD:
+		return multiply(coeffs1, coeffs2)
+	m = max(n1, n2)//2
+	coeffsMul = [0]*(n1+n2-1)
+	if n1 <= m or n2 <= m:
+		# unbalanced factors: only the longer one is split
+		(short,long) = (coeffs1,coeffs2) if n1 <= m else (coeffs2,coeffs1)
+		_iadd_shifted(coeffsMul, multiply_karatsuba(short, long[:m]), 0)
+		_iadd_shifted(coeffsMul, multiply_karatsuba(short, long[m:]), m)
+		return coeffsMul
+	lo1,hi1 = coeffs1[:m], coeffs1[m:]
+	lo2,hi2 = coeffs2[:m], coeffs2[m:]
+	z0 = multiply_karatsuba(lo1, lo2)
+	z2 = multiply_karatsuba(hi1, hi2)
+	z1 = multiply_karatsuba([c1+c2 for c1,c2 in zip_longest(lo1, hi1, fillvalue=0)],
+	                        [c1+c2 for c1,c2 in zip_longest(lo2, hi2, fillvalue=0)])
+	_iadd_shifted(z1, z0, 0, -1)
+	_iadd_shifted(z1, z2, 0, -1)
+	_iadd_shifted(coeffsMul, z0, 0)
+	_iadd_shifted(coeffsMul, z1, m)
+	_iadd_shifted(coeffsMul, z2, 2*m)
+	return coeffsMul
+
+
+def multiply_fast(coeffs1, coeffs2):
+	"""product of two polynomials choosing the fastest available algorithm"""
+	if min(len(coeffs1), len(coeffs2)) <= KARATSUBA_THRESHOLD:
+		return multiply(coeffs1, coeffs2)
+	return multiply_karatsuba(coeffs1, coeffs2)
+
+
+# above this length the divide-and-conquer taylor shift is used
+TAYLOR_SHIFT_DC_THRESHOLD = 64
+
+
+def _is_rational(v):
+	return isinstance(v, (int, Fraction)) and not isinstance(v, bool)
+
+
+def _taylor_shift_horner(coeffs, a):
+	# repeated synthetic division by (x-a), O(n^2) additions
+	c = list(coeffs)
+	n = len(c)
+	for i in range(n-1):
+		if a == 1:
+			for j in range(n-2, i-1, -1):
+				c[j] += c[j+1]
+		else:
+			for j in range(n-2, i-1, -1):
+				c[j] += a*c[j+1]
+	return c
+
+
+def _taylor_shift_dc(coeffs, a):
+	# p = lo + x^m*hi  =>  p(x+a) = lo(x+a) + (x+a)^m * hi(x+a), with m a power of 2
+	kTop = (len(coeffs)-1).bit_length() - 1
+	powers = [[a, 1]] # powers[k] = (x+a)^(2^k)
+	while len(powers) <= kTop:
+		powers.append(multiply_fast(powers[-1], powers[-1]))
+	def _shift(c, k):
+		if len(c) <= TAYLOR_SHIFT_DC_THRESHOLD:
+			return _taylor_shift_horner(c, a)
+		m = 1 << k
+		res = multiply_fast(_shift(c[m:], k-1), powers[k])
+		_iadd_shifted(res, _shift(c[:m], k-1), 0)
+		return res
+	return _shift(list(coeffs), kTop)
+
+
+def taylor_shift(coeffs, a):
+	"""coefficients of p(x+a), where p(x) is the polynomial represented by 'coeffs'.
+	For rational coefficients and shift the computation is done with integers only."""
+	if a == 0 or len(coeffs) <= 1:
+		return list(coeffs)
+	shiftFunc = _taylor_shift_dc if len(coeffs) > TAYLOR_SHIFT_DC_THRESHOLD else _taylor_shift_horner
+	if not (_is_rational(a) and all(_is_rational(c) for c in coeffs)):
+		return shiftFunc(coeffs, a)
+	# p(x + u/v) = v^-n * s(v*x + u) with s(y) = v^n * p(y/v);
+	# the coefficients of s are made integral by multiplying with the common denominator d
+	a = Fraction(a)
+	u,v = a.numerator, a.denominator
+	n = len(coeffs) - 1
+	numerators,d = integral_coeffs(coeffs)
+	vPows = [1]
+	for _ in range(n): vPows.append(vPows[-1]*v)
+	sCoeffs = [c*vPows[n-i] for i,c in enumerate(numerators)]
+	sShifted = shiftFunc(sCoeffs, u)
+	if d == 1 and v == 1:
+		return sShifted
+	return [Fraction(c, d*vPows[n-i]) for i,c in enumerate(sShifted)]
+
+
+def affine_transform(coeffs, k, d=0):
+	"""coefficients of p(k*x+d), where p(x) is the polynomial represented by 'coeffs'"""
+	shifted = taylor_shift(coeffs, d)
+	kPow = 1
+	for i in range(1, len(shifted)):
+		kPow *= k
+		shifted[i] *= kPow
+	return shifted
+
+
+# below this length of the outer polynomial composition is done by Horner's scheme
+COMPOSE_DC_THRESHOLD = 8
+
+
+def _compose_horner(coeffs1, coeffs2):
+	res = []
+	for c in reversed(coeffs1):
+		res = multiply_fast(res, coeffs2) if res else []
+		if res: res[0] += c
+		else:   res = [c]
+	return res
+
+
+def compose(coeffs1, coeffs2):
+	"""coefficients of p(q(x)), where p and q are represented by 'coeffs1' and 'coeffs2'.
+	Large compositions are split into p = lo + x^m*hi  =>  p(q) = lo(q) + q^m * hi(q),
+	where the powers q^m (m a power of 2) are computed once."""
+	if len(coeffs1) <= COMPOSE_DC_THRESHOLD:
+		return _compose_horner(coeffs1, coeffs2)
+	kTop = (len(coeffs1)-1).bit_length() - 1
+	powers = [list(coeffs2)] # powers[k] = q^(2^k)
+	while len(powers) <= kTop:
+		powers.append(multiply_fast(powers[-1], powers[-1]))
+	def _compose(c, k):
+		if len(c) <= COMPOSE_DC_THRESHOLD:
+			return _compose_horner(c, coeffs2)
+		m = 1 << k
+		res = multiply_fast(_compose(c[m:], k-1), powers[k])
+		return [c1+c2 for c1,c2 in zip_longest(res, _compose(c[:m], k-1), fillvalue=0)]
+	return _compose(list(coeffs1), kTop)
+
+
+def _inverse(c):
+	# multiplicative inverse, exact for integers
+	if isinstance(c, int):
+		return c if c in (1, -1) else Fraction(1, c)
+	return 1/c
+
+
+def reciprocal_series(coeffs, n):
+	"""first n coefficients of the power series 1/p(x) computed by Newton iteration
+	(p(0) must not be zero)"""
+	g = [_inverse(coeffs[0])]
+	k = 1
+	while k < n:
+		k = min(2*k, n)
+		# g <- g*(2 - p*g) doubles the number of correct coefficients
+		e = [-c for c in multiply_fast(coeffs[:k], g)[:k]]
+		e[0] += 2
+		g = multiply_fast(g, e)[:k]
+	return g
+
+
+# above this quotient and divisor length, division uses a Newton reciprocal
+NEWTON_DIVISION_THRESHOLD = 64
+
+
+def divide(coeffs1, coeffs2):
+	"""quotient and remainder of polynomial division coeffs1/coeffs2.
+	Integer coefficients are divided exactly (the quotient may contain Fractions)."""
+	deg2 = degree(coeffs2)
+	if deg2 < 0:
+		raise ZeroDivisionError("polynomial division by zero")
+	rem = normalize(list(coeffs1))
+	quotLen = len(rem) - deg2
+	if quotLen <= 0:
+		return [], rem
+	if min(quotLen, deg2) > NEWTON_DIVISION_THRESHOLD:
+		# reversed polynomials: rev(quot) = rev(coeffs1)/rev(coeffs2) mod x^quotLen
+		revQuot = multiply_fast(rem[:deg2-1:-1], reciprocal_series(coeffs2[deg2::-1], quotLen))
+		quot = revQuot[quotLen-1::-1]
+		prod = multiply_fast(coeffs2[:deg2+1], quot)
+		return quot, normalize([c1-c2 for c1,c2 in zip(rem[:deg2], prod)])
+	leadInv = _inverse(coeffs2[deg2])
+	quot = [0]*quotLen
+	for k in range(quotLen-1, -1, -1):
+		q = rem[k+deg2]*leadInv
+		quot[k] = q
+		if q != 0:
+			for j in range(deg2):
+				rem[k+j] -= q*coeffs2[j]
+	del rem[deg2:]
+	inormalize(rem)
+	return quot, rem
+
+
+def derivative(coeffs):
+	"""coefficients of the derivative p'(x)"""
+	return [i*c for i,c in enumerate(coeffs)][1:]
+
+
+def subproduct_tree(points):
+	"""products of linear factors (x - x_i) arranged as binary tree.
+	Level 0 contains the linear factors, level k+1 the products of pairs of level k,
+	the last level contains the product of all factors."""
+	tree = [[[-x0, 1] for x0 in points]]
+	while len(tree[-1]) > 1:
+		level = tree[-1]
+		tree.append([multiply_fast(level[i], level[i+1]) if i+1 < len(level) else level[i]
+			for i in range(0, len(level), 2)])
+	return tree
+
+
+# below this number of coefficients polynomials are evaluated by Horner's scheme
+# instead of reducing them further in the remainder tree
+EVALUATE_MULTI_THRESHOLD = 64
+
+
+def evaluate_multi(coeffs, points, tree=None):
+	"""evaluate polynomial at all given points by reducing it modulo the subproduct tree
+	(with floats the remainder tree can become numerically unstable for many points)"""
+	if len(coeffs) <= EVALUATE_MULTI_THRESHOLD or len(points) <= 1:
+		return [evaluate(coeffs, x0) for x0 in points]
+	if tree is None:
+		tree = subproduct_tree(points)
+	values = []
+	def _reduce(rem, k, i):
+		# rem: polynomial reduced modulo node i of level k
+		if len(rem) <= EVALUATE_MULTI_THRESHOLD or k == 0:
+			values.extend(evaluate(rem, x0) for x0 in points[i<<k:(i+1)<<k])
+			return
+		for iChild in (2*i, 2*i+1):
+			if iChild < len(tree[k-1]):
+				_reduce(divide(rem, tree[k-1][iChild])[1], k-1, iChild)
+	kTop = len(tree) - 1
+	_reduce(divide(coeffs, tree[kTop][0])[1], kTop, 0)
+	return values
+
+
+def interpolate(xs, ys):
+	"""coefficients of the polynomial of minimal degree through the points (xs[i], ys[i])
+	(Lagrange interpolation with subproduct tree; the xs must be distinct)"""
+	if len(xs) != len(ys):
+		raise ValueError("interpolation needs the same number of x and y values (%d != %d)" % (len(xs), len(ys)))
+	if not xs:
+		return []
+	tree = subproduct_tree(xs)
+	# Lagrange weights y_i/M'(x_i), where M is the product of all linear factors
+	# (Horner's scheme is faster than the remainder tree for the sizes handled in pure Python)
+	dM = derivative(tree[-1][0])
+	weights = [y*_inverse(evaluate(dM, x0)) for x0,y in zip(xs, ys)]
+	# combine linear combinations bottom-up: p_parent = p_left*M_right + p_right*M_left
+	combs = [[w] for w in weights]
+	for k in range(len(tree)-1):
+		level = tree[k]
+		combs = [add(multiply_fast(combs[i], level[i+1]), multiply_fast(combs[i+1], level[i])) if i+1 < len(level) else combs[i]
+			for i in range(0, len(level), 2)]
+	return normalize(combs[0])
+
+
+class PythonBackend:
+	"""reference backend: the functions of this module on lists of arbitrary coefficients
+	(numbers or other objects with arithmetic operators, e.g. polynomials)"""
+	name = 'python'
+
+	def add(self, coeffs1, coeffs2):
+		return add(coeffs1, coeffs2)
+
+	def sub(self, coeffs1, coeffs2):
+		return sub(coeffs1, coeffs2)
+
+	def scale(self, coeffs, s):
+		return scale(coeffs, s)
+
+	def multiply(self, coeffs1, coeffs2):
+		return multiply_fast(coeffs1, coeffs2)
+
+	def evaluate(self, coeffs, x0):
+		return evaluate(coeffs, x0)
+
+
+class NumpyBackend(PythonBackend):
+	"""float backend: sums, differences, scaled lists and products of coefficient lists
+	containing floats are computed with NumPy arrays (products by numpy.convolve), the
+	results are lists of floats. Exact data (without floats) and evaluation are handled
+	by the reference backend."""
+	name = 'numpy'
+
+	@staticmethod
+	def _isFloatData(*coeffLists):
+		values = [c for coeffs in coeffLists for c in coeffs]
+		return (any(isinstance(c, float) for c in values)
+			and all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in values))
+
+	@staticmethod
+	def _padded(coeffs, n):
+		a = numpy.zeros(n)
+		a[:len(coeffs)] = coeffs
+		return a
+
+	def add(self, coeffs1, coeffs2):
+		if not NumpyBackend._isFloatData(coeffs1, coeffs2):
+			return add(coeffs1, coeffs2)
+		n = max(len(coeffs1), len(coeffs2))
+		return normalize((NumpyBackend._padded(coeffs1, n) + NumpyBackend._padded(coeffs2, n)).tolist())
+
+	def sub(self, coeffs1, coeffs2):
+		if not NumpyBackend._isFloatData(coeffs1, coeffs2):
+			return sub(coeffs1, coeffs2)
+		n = max(len(coeffs1), len(coeffs2))
+		return normalize((NumpyBackend._padded(coeffs1, n) - NumpyBackend._padded(coeffs2, n)).tolist())
+
+	def scale(self, coeffs, s):
+		if not NumpyBackend._isFloatData(coeffs, [s]):
+			return scale(coeffs, s)
+		return normalize((numpy.array(coeffs, dtype=float) * s).tolist())
+
+	def multiply(self, coeffs1, coeffs2):
+		if not coeffs1 or not coeffs2 or not NumpyBackend._isFloatData(coeffs1, coeffs2):
+			return multiply_fast(coeffs1, coeffs2)
+		return numpy.convolve(numpy.array(coeffs1, dtype=float), numpy.array(coeffs2, dtype=float)).tolist()
+
+
+class Gmpy2Backend(PythonBackend):
+	"""exact backend: int and Fraction coefficients are converted to gmpy2's mpz/mpq,
+	the results are converted back to int/Fraction. Other data is handled by the
+	reference backend."""
+	name = 'gmpy2'
+
+	@staticmethod
+	def _toGmpy(coeffs):
+		if not all(_is_rational(c) for c in coeffs):
+			return None
+		return [gmpy2.mpz(c) if isinstance(c, int) else gmpy2.mpq(c.numerator, c.denominator) for c in coeffs]
+
+	@staticmethod
+	def _fromGmpy(c, asInt):
+		return int(c) if asInt else Fraction(int(c.numerator), int(c.denominator))
+
+	def multiply(self, coeffs1, coeffs2):
+		g1,g2 = Gmpy2Backend._toGmpy(coeffs1), Gmpy2Backend._toGmpy(coeffs2)
+		if g1 is None or g2 is None:
+			return multiply_fast(coeffs1, coeffs2)
+		asInt = all(isinstance(c, int) for c in coeffs1) and all(isinstance(c, int) for c in coeffs2)
+		return [Gmpy2Backend._fromGmpy(c, asInt) for c in multiply_fast(g1, g2)]
+
+	def evaluate(self, coeffs, x0):
+		g,gx0 = Gmpy2Backend._toGmpy(coeffs), Gmpy2Backend._toGmpy([x0])
+		if g is None or gx0 is None:
+			return evaluate(coeffs, x0)
+		asInt = isinstance(x0, int) and all(isinstance(c, int) for c in coeffs)
+		return Gmpy2Backend._fromGmpy(evaluate(g, gx0[0]), asInt)
+
+
+BACKENDS = {'python': PythonBackend()}
+if numpy is not None: BACKENDS['numpy'] = NumpyBackend()
+if gmpy2 is not None: BACKENDS['gmpy2'] = Gmpy2Backend()
+_backend = BACKENDS['python']
+
+
+def get_backend(backend=None):
+	"""backend given by name or instance; None gives the backend selected by set_backend"""
+	if backend is None:
+		return _backend
+	if isinstance(backend, str):
+		try:
+			return BACKENDS[backend]
+		except KeyError:
+			raise ValueError("unknown or unavailable backend '%s', available: %s" % (backend, sorted(BACKENDS)))
+	return backend
+
+
+def set_backend(backend):
+	"""select the backend globally (by name or instance), return the previous one"""
+	global _backend
+	previous,_backend = _backend,get_backend(backend)
+	return previous
+
+
+@contextlib.contextmanager
+def using_backend(backend):
+	"""context manager selecting a backend within a with-block"""
+	previous = set_backend(backend)
+	try:
+		yield get_backend()
+	finally:
+		set_backend(previous)
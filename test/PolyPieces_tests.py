@@ -0,0 +1,374 @@
+from fractions import Fraction
+import math
+import numpy
+import unittest
+
+from src.PolyPieces import ConvolutionTree, PolyPiece, PolyPieceFunc, PolyPieceFuncArray
+from src.Polynomial import Polynomial
+
+
+def _uniform(a, b):
+	return PolyPieceFunc(PolyPiece(Fraction(1, b-a), [a, b]))
+
+
+def _triangular(a, c, b):
+	height = Fraction(2, b-a)
+	pieces = []
+	if c > a: pieces.append(PolyPiece(Polynomial([-a*height/(c-a), height/(c-a)]), [a, c]))
+	if b > c: pieces.append(PolyPiece(Polynomial([b*height/(b-c), -height/(b-c)]), [c, b]))
+	return PolyPieceFunc(pieces)
+
+
+def _beta(a, b, alpha, beta):
+	betaFunc = Fraction(math.factorial(alpha-1)*math.factorial(beta-1), math.factorial(alpha+beta-1))
+	poly = Polynomial(1/(betaFunc*Fraction(b-a)**(alpha+beta-1)))
+	for _ in range(alpha-1): poly = poly*Polynomial([-a, 1])
+	for _ in range(beta-1): poly = poly*Polynomial([b, -1])
+	return PolyPieceFunc(PolyPiece(poly, [a, b]))
+
+
+def _mean(fpp):
+	return sum(PolyPiece(Polynomial([0, 1])*pp.poly, pp.interval).intDef() for pp in fpp.polyPieces)
+
+
+def _convAll(fpps):
+	res = fpps[0]
+	for fpp in fpps[1:]:
+		res = res.conv(fpp)
+	return res
+
+
+class PolyPieceOriginTests(unittest.TestCase):
+
+	def test_localOrigin(self):
+		print('testing PolyPiece with local origin: ', end='')
+		x = Polynomial([0, 1])
+		poly = (x - 1000)**2 + 3*x
+		for origin,shift in [(None, 0), ('left', 1000), ('mid', Fraction(2001, 2))]:
+			pp = PolyPiece(poly, [1000, 1001], origin=origin)
+			self.assertEqual((origin, shift), (pp.origin, pp.shift))
+			self.assertEqual(poly, pp.poly)
+			self.assertEqual(poly, pp.polyAt(0))
+			self.assertEqual(pp.polyLocal, pp.polyAt(shift))
+			for x0 in (1000, Fraction(4001, 4), 1001):
+				self.assertEqual(poly.eval(x0), pp.eval(x0))
+				self.assertEqual(pp.polyAt(x0).eval(0), pp.eval(x0))
+			self.assertEqual(poly.intDef([1000, 1001]), pp.intDef())
+			self.assertEqual(PolyPiece(poly, [1000, 1001]), pp)
+			self.assertEqual(hash(PolyPiece(poly, [1000, 1001])), hash(pp))
+			print('.', end='')
+		self.assertRaises(ValueError, PolyPiece, poly, [0, 1], origin='right')
+		self.assertRaises(ValueError, PolyPiece.fromLocal, poly, [0, 1], origin='right')
+		print('.', end='')
+		print()
+
+	def test_fromLocalWithOrigin(self):
+		print('testing PolyPiece.fromLocal, withOrigin: ', end='')
+		x = Polynomial([0, 1])
+		pp = PolyPiece.fromLocal(x**2, [2, 4])
+		self.assertEqual(('left', 2), (pp.origin, pp.shift))
+		self.assertEqual((x - 2)**2, pp.poly)
+		# a given shift is converted to the shift of the origin
+		pp = PolyPiece.fromLocal(x**2, [2, 4], origin='mid', shift=2)
+		self.assertEqual(3, pp.shift)
+		self.assertEqual((x + 1)**2, pp.polyLocal)
+		self.assertEqual((x - 2)**2, pp.poly)
+		for origin in PolyPiece.ORIGINS:
+			self.assertEqual(pp, pp.withOrigin(origin))
+			self.assertEqual(origin, pp.withOrigin(origin).origin)
+		print('.', end='')
+		# infinite interval ends fall back to the finite end or 0
+		self.assertEqual(5, PolyPiece(x, [-float('inf'), 5], origin='mid').shift)
+		self.assertEqual(0, PolyPiece(x, [-float('inf'), float('inf')], origin='left').shift)
+		print('.', end='')
+		# setting the polynomial keeps the origin
+		pp.poly = x
+		self.assertEqual(('mid', 3), (pp.origin, pp.shift))
+		self.assertEqual(x + 3, pp.polyLocal)
+		self.assertEqual(Fraction(7, 2), pp.eval(Fraction(7, 2)))
+		print('.', end='')
+		print()
+
+	def test_functionsWithOrigin(self):
+		print('testing PolyPieceFunc operations with local origins: ', end='')
+		x = Polynomial([0, 1])
+		f = PolyPieceFunc(((x - 100, [100, 101]), (Polynomial([102, -1]), [101, 102])))
+		g = PolyPieceFunc(((Polynomial(1), [-50, -49]), ((x + 50)**2, [-49, -47])))
+		for origin in ('left', 'mid'):
+			fo,go = f.withOrigin(origin), g.withOrigin(origin)
+			self.assertEqual([origin]*2, [pp.origin for pp in fo.polyPieces])
+			self.assertEqual([], (fo - f).polyPieces)
+			self.assertEqual([], ((fo + go) - (f + g)).polyPieces)
+			self.assertEqual([], ((fo * fo) - (f * f)).polyPieces)
+			self.assertEqual([], (fo.conv(go) - f.conv(g)).polyPieces)
+			self.assertEqual([], (fo.comp(Polynomial([1, -2])) - f.comp(Polynomial([1, -2]))).polyPieces)
+			self.assertEqual(f.intDef(), fo.intDef())
+			for x0 in [Fraction(j, 3) for j in range(297, 310)]:
+				self.assertEqual(f.eval(x0), fo.eval(x0))
+				self.assertAlmostEqual(float(f.eval(x0)), fo.eval(float(x0)), delta=1e-12)
+			print('.', end='')
+		print()
+
+
+class ConvolutionTreeTests(unittest.TestCase):
+
+	def _assertDensity(self, fpps, tree):
+		self.assertEqual(len(fpps), len(tree))
+		self.assertEqual([], (tree.density() - _convAll(fpps)).polyPieces)
+
+	def test_replaceAppendRemove(self):
+		print('testing ConvolutionTree.replace, append, remove: ', end='')
+		u,v,w,x = _uniform(0, 1), _uniform(1, 3), PolyPieceFunc(PolyPiece(Polynomial([0, 2]), [0, 1])), _uniform(-1, 1)
+		tree = ConvolutionTree([u, v, w])
+		self._assertDensity([u, v, w], tree)
+		print('.', end='')
+		tree.replace(1, x)
+		self.assertIs(x, tree[1])
+		self._assertDensity([u, x, w], tree)
+		self.assertRaises(IndexError, tree.replace, 3, u)
+		self.assertRaises(IndexError, tree.replace, -1, u)
+		print('.', end='')
+		# removing keeps the indices of the other summands
+		tree.remove(0)
+		self.assertIsNone(tree[0])
+		self.assertIs(x, tree[1])
+		self._assertDensity([x, w], tree)
+		print('.', end='')
+		# append reuses the slot of the removed summand, then the next free slot
+		self.assertEqual(0, tree.append(v))
+		self._assertDensity([v, x, w], tree)
+		self.assertEqual(3, tree.append(u))
+		self._assertDensity([v, x, w, u], tree)
+		self.assertEqual(4, len(tree._levels[0]))
+		print('.', end='')
+		# a full tree doubles its capacity
+		self.assertEqual(4, tree.append(u))
+		self._assertDensity([v, x, w, u, u], tree)
+		self.assertEqual(8, len(tree._levels[0]))
+		print('.', end='')
+		# repeated removing and appending does not grow the tree
+		for k in range(20):
+			tree.remove(k % 5)
+			self.assertEqual(k % 5, tree.append(u))
+		self.assertEqual(8, len(tree._levels[0]))
+		self._assertDensity([u]*5, tree)
+		print('.', end='')
+		# the smallest free index is reused first
+		tree.remove(3)
+		tree.remove(1)
+		tree.replace(3, w)
+		self.assertEqual(1, tree.append(v))
+		self.assertEqual(5, tree.append(v))
+		self._assertDensity([u, v, u, w, u, v], tree)
+		print('.', end='')
+		for idx in range(6):
+			tree.remove(idx)
+		self.assertEqual(0, len(tree))
+		self.assertIsNone(tree.density())
+		print('.', end='')
+		print()
+
+	def test_emptyTree(self):
+		print('testing ConvolutionTree without summands: ', end='')
+		tree = ConvolutionTree()
+		self.assertEqual(0, len(tree))
+		self.assertIsNone(tree.density())
+		u = _uniform(0, 1)
+		self.assertEqual(0, tree.append(u))
+		self.assertEqual(1, tree.append(u))
+		self._assertDensity([u, u], tree)
+		print('.', end='')
+		print()
+
+
+class PolyPieceFuncArrayTests(unittest.TestCase):
+
+	def _assertMembers(self, fpps, fa):
+		# compare values (also at the breaks and outside of the support), integrals and means
+		self.assertEqual(len(fpps), len(fa))
+		points = [Fraction(j, 4) for j in range(-12, 29)]
+		values = fa.eval(numpy.tile([float(x) for x in points], (len(fa), 1)))
+		for i,fpp in enumerate(fpps):
+			for j,x in enumerate(points):
+				self.assertAlmostEqual(float(fpp.eval(x)), values[i,j], delta=1e-12, msg='testing member %d at %s' % (i, x))
+		breaks = [[pp.interval[k] for pp in fpp.polyPieces for k in (0, 1)] for fpp in fpps]
+		for k in range(max(len(b) for b in breaks)):
+			xs = [b[min(k, len(b)-1)] for b in breaks]
+			for x,value,fpp in zip(xs, fa.eval([float(x) for x in xs]), fpps):
+				self.assertAlmostEqual(float(fpp.eval(x)), value, delta=1e-12, msg='testing break %s' % x)
+		print('.', end='')
+		lower,upper = [Fraction(-1, 3)]*len(fpps), [Fraction(3, 2) + i for i in range(len(fpps))]
+		integrals = fa.intDef(([float(x) for x in lower], [float(x) for x in upper]))
+		for fpp,a,b,value in zip(fpps, lower, upper, integrals):
+			self.assertAlmostEqual(float(fpp.intDef([a, b])), value, delta=1e-12)
+		for fpp,value,mean in zip(fpps, fa.intDef(), fa.mean()):
+			self.assertAlmostEqual(float(fpp.intDef()), value, delta=1e-12)
+			self.assertAlmostEqual(float(_mean(fpp)), mean, delta=1e-12)
+		print('.', end='')
+
+	def test_fromFuncs(self):
+		print('testing PolyPieceFuncArray.fromFuncs: ', end='')
+		u = _uniform(0, 1)
+		x = Polynomial([0, 1])
+		# different numbers of pieces (padded with pieces of width 0) and degrees, a gap
+		fpps = [u, u.conv(u), u.conv(u).conv(u), PolyPieceFunc(((x, [0, 1]), (Polynomial(1), [2, 3]))), _uniform(-3, -1)]
+		self._assertMembers(fpps, PolyPieceFuncArray.fromFuncs(fpps))
+		print()
+
+	def test_distributions(self):
+		print('testing PolyPieceFuncArray.triangular, beta, pertLike: ', end='')
+		# modes at the ends give pieces of width 0
+		a,c,b = [0, 1, -2, 0, -1], [1, 1, 1, 3, 0], [2, 4, 1, 3, 5]
+		self._assertMembers([_triangular(*params) for params in zip(a, c, b)], PolyPieceFuncArray.triangular(a, c, b))
+		a,b,alpha,beta = [0, 1, -1, 0], [2, 3, 1, 5], [1, 2, 3, 4], [1, 3, 2, 1]
+		self._assertMembers([_beta(*params) for params in zip(a, b, alpha, beta)], PolyPieceFuncArray.beta(a, b, alpha, beta))
+		a,m,b = [0, 0, 1], [1, 0, 2], [2, 4, 6]
+		fpps = [_beta(ai, bi, round(1 + 4*Fraction(mi-ai, bi-ai)), round(1 + 4*Fraction(bi-mi, bi-ai))) for ai,mi,bi in zip(a, m, b)]
+		self._assertMembers(fpps, PolyPieceFuncArray.pertLike(a, m, b))
+		print()
+
+
+class PolyPieceFuncTests(unittest.TestCase):
+
+	def test_floatEvalAfterModification(self):
+		print('testing PolyPieceFunc.eval at floats after modification of the pieces: ', end='')
+		fpp = PolyPieceFunc([PolyPiece(1, [0, 1]), PolyPiece(2, [1, 2])])
+		self.assertEqual(2, fpp.eval(1.5))
+		fpp.polyPieces[1] = PolyPiece(1, [3, 4])
+		self.assertEqual(1, fpp.eval(3.5))
+		self.assertEqual(0, fpp.eval(1.5))
+		print('.', end='')
+		fpp.polyPieces.append(PolyPiece(Polynomial([0, 1]), [4, 5]))
+		self.assertEqual(4.5, fpp.eval(4.5))
+		fpp.polyPieces.pop(0)
+		self.assertEqual(0, fpp.eval(0.5))
+		self.assertEqual(1, fpp.eval(3.5))
+		print('.', end='')
+		print()
+
+	def test_arrays(self):
+		print('testing PolyPieceFunc.toArrays, fromArrays: ', end='')
+		x = Polynomial([0, 1])
+		fpp = PolyPieceFunc(((x, [0, 1]), (Polynomial([2, -1]), [1, 2]), (Polynomial(1), [3, 4])))
+		breaks,coeffs = fpp.toArrays()
+		self.assertEqual([0.0, 1.0, 2.0, 3.0, 4.0], breaks.tolist())
+		self.assertEqual([[1.0, -1.0, 0.0, 0.0], [0.0, 1.0, 0.0, 1.0]], coeffs.tolist())
+		self.assertEqual([[0.0, 1.0, 0.0, 1.0], [1.0, -1.0, 0.0, 0.0]], fpp.toArrays(order='ascending')[1].tolist())
+		# round trip, the arrays of a function created from arrays are not copied
+		fpp2 = PolyPieceFunc.fromArrays(breaks, coeffs)
+		self.assertIs(coeffs, fpp2.toArrays()[1])
+		for x0 in [Fraction(j, 4) for j in range(-2, 19)]:
+			self.assertEqual(fpp.eval(x0), fpp2.eval(x0))
+		self.assertIs(coeffs, fpp2.toArrays()[1])
+		self.assertEqual([0.0, 1.0], fpp2.toArrays(order='ascending')[1][:,0].tolist())
+		print('.', end='')
+		# exact arrays; no dtype means float
+		self.assertEqual([0, 1, 2, 3, 4], fpp.toArrays(dtype=object)[0].tolist())
+		self.assertEqual(object, fpp.toArrays(dtype=object)[1].dtype)
+		self.assertEqual(float, fpp.toArrays()[1].dtype)
+		print('.', end='')
+		# the cached arrays follow modifications of the pieces (also in place)
+		for f in (fpp, fpp2):
+			f.polyPieces.append(PolyPiece(2, [4, 5]))
+			self.assertEqual([0.0, 1.0, 2.0, 3.0, 4.0, 5.0], f.toArrays()[0].tolist())
+			self.assertEqual([0.0, 2.0], f.toArrays()[1][:,-1].tolist())
+			f.polyPieces[0] = PolyPiece(3, [0, 1])
+			self.assertEqual([0.0, 3.0], f.toArrays()[1][:,0].tolist())
+			f.polyPieces = f.polyPieces[:1]
+			self.assertEqual([0.0, 1.0], f.toArrays()[0].tolist())
+			print('.', end='')
+		print()
+
+	def test_symmetricConv(self):
+		print('testing PolyPieceFunc.conv of symmetric functions: ', end='')
+		x = Polynomial([0, 1])
+		bumps = PolyPieceFunc(((Polynomial(1), [0, 1]), (Polynomial(1), [4, 5])))
+		cases = [(_uniform(0, 1), _uniform(0, 2)), (_triangular(0, 1, 2), _uniform(-1, 1)), (_beta(0, 2, 2, 2), _beta(1, 2, 3, 3)),
+			(bumps, _uniform(0, 1)), (bumps, bumps), (bumps, _triangular(0, 1, 2))]
+		for f,g in cases:
+			self.assertIsNotNone(f.symmetryCenter())
+			self.assertIsNotNone(g.symmetryCenter())
+			res = f.conv(g)
+			PolyPieceFunc.symmetricConv = False
+			try:
+				expected = f.conv(g)
+			finally:
+				PolyPieceFunc.symmetricConv = True
+			self.assertEqual((expected.polyPieces[0].interval[0], expected.polyPieces[-1].interval[1]), (res.polyPieces[0].interval[0], res.polyPieces[-1].interval[1]))
+			self.assertEqual([], (res - expected).polyPieces)
+			print('.', end='')
+		# pieces next to the center are only joined if they meet there
+		p = (x - 2)**2 - 1
+		self.assertEqual([[0, 4]], [pp.interval for pp in PolyPieceFunc._joinMirrored([PolyPiece(p, [0, 2])], [PolyPiece(p, [2, 4])], 2)])
+		self.assertEqual([[0, 1], [3, 4]], [pp.interval for pp in PolyPieceFunc._joinMirrored([PolyPiece(p, [0, 1])], [PolyPiece(p, [3, 4])], 2)])
+		print('.', end='')
+		print()
+
+
+	def test_convWindow(self):
+		print('testing PolyPieceFunc.conv with window, tailProb: ', end='')
+		x = Polynomial([0, 1])
+		f = PolyPieceFunc(((x, [0, 1]), (Polynomial([2, -1]), [1, 2]), (Polynomial(Fraction(1, 2)), [3, 4])))
+		g = _beta(-1, 1, 2, 3)
+		full = f.conv(g)
+		for lo,hi in [(-1, 5), (0, 1), (Fraction(1, 3), Fraction(7, 2)), (-10, 0), (2, float('inf')), (-float('inf'), 1), (6, 8)]:
+			for method in ('pieces', 'modular'):
+				windowed = f.conv(g, method=method, window=(lo, hi))
+				self.assertTrue(all(lo <= pp.interval[0] and pp.interval[1] <= hi for pp in windowed.polyPieces))
+				self.assertEqual([], (windowed - full._restricted(lo, hi)).polyPieces, msg='testing window [%s, %s]' % (lo, hi))
+			print('.', end='')
+		# tail probabilities of a density and of sums of independent variables
+		for t in (-2, -1, 0, Fraction(1, 2), 1, Fraction(13, 4), 5, 6):
+			self.assertEqual(f.intDef([t, float('inf')]), f.tailProb(t))
+			self.assertEqual(full.intDef() - full.intDef([-float('inf'), t]), f.tailProb(t, g))
+		self.assertEqual(0, f.tailProb(5, g))
+		print('.', end='')
+		# the window follows modifications of the pieces
+		f.polyPieces.append(PolyPiece(Fraction(1, 2), [4, 5]))
+		self.assertEqual([], (f.conv(g, window=(3, 7)) - f.conv(g)._restricted(3, 7)).polyPieces)
+		self.assertEqual(f.conv(g).intDef([3, float('inf')]), f.tailProb(3, g))
+		print('.', end='')
+		print()
+
+
+class LazyPolyPieceFuncTests(unittest.TestCase):
+
+	def test_eval(self):
+		print('testing LazyPolyPieceFunc.eval: ', end='')
+		u,t,b = _uniform(0, 1).lazy(), _triangular(-1, 0, 2).lazy(), _beta(1, 3, 2, 3).lazy()
+		x = Polynomial([0, 1])
+		exprs = [(u ^ t) ^ b, u ^ (t ^ (b ^ u)), (u ^ t) + (t ^ b), 2*((u ^ u) ^ t) + 1, (u ^ t) * (u ^ b),
+			((u ^ t) ^ b).comp(Polynomial([1, 2])), (u ^ t.comp(Polynomial([0, -1]))) ^ (b ^ b)]
+		points = [Fraction(j, 4) for j in range(-16, 49)]
+		for expr in exprs:
+			fpp = expr.materialize()
+			for x0 in points:
+				self.assertEqual(fpp.eval(x0), expr.eval(x0), msg='testing %s at %s' % (expr.op, x0))
+			print('.', end='')
+		# nested convolutions are evaluated without computing them
+		u2,t2 = _uniform(0, 2).lazy(), _triangular(0, 1, 3).lazy()
+		expr = ((u2 ^ t2) ^ t2) ^ u2
+		self.assertEqual(Fraction(0), expr.eval(-1))
+		for x0 in (Fraction(1, 3), 4, Fraction(19, 2)):
+			expr.eval(x0)
+		self.assertIsNone(expr._value)
+		self.assertIsNone((u2 ^ t2)._value)
+		self.assertIsNone(((u2 ^ t2) ^ t2)._value)
+		self.assertEqual(u2.materialize().conv(t2.materialize()).conv(t2.materialize()).conv(u2.materialize()).eval(4), expr.eval(4))
+		print('.', end='')
+		print()
+
+	def test_nodes(self):
+		print('testing LazyPolyPieceFunc nodes: ', end='')
+		u,t = _uniform(0, 1).lazy(), _triangular(0, 1, 2).lazy()
+		self.assertIs(u ^ t, t ^ u)
+		self.assertIs((u ^ t) + 1, (t ^ u) + 1)
+		self.assertIsNot((u ^ t) + 1, (u ^ t) + 2)
+		print('.', end='')
+		# supports of compositions stay exact
+		self.assertEqual([Fraction(-1, 2), 1], (u ^ t).comp(Polynomial([1, 2]))._support())
+		self.assertEqual([-3, 0], (u ^ t).comp(Polynomial([0, -1]))._support())
+		self.assertEqual([-0.5, 1.0], (u ^ t).comp(Polynomial([1.0, 2.0]))._support())
+		self.assertIsNone(((u ^ t)*0)._support())
+		print('.', end='')
+		print()
@@ -1,7 +1,11 @@
+from fractions import Fraction
+import math
 import numbers
 import unittest
 
 from src.Polynomial import Polynomial as Poly
+# the module of univar_polyops used by Polynomial (for selecting backends)
+from src.Polynomial import upo
 
 TEST_CASES_CREATION = [
 	('1',	([1], 'x')),
@@ -13,9 +17,15 @@ TEST_CASES_CREATION = [
 	('1-xy',	([1, ([0, -1], 'x')], 'y')),
 	(('1-xy',['xy']),	([1, -1], 'xy')),
 	('(1-x)(1-y)',	([([1, -1], 'x'), ([-1, 1], 'x')], 'y')),
-	('(x+y+z)^2',	([([([0,0,1], 'x'), ([0,2], 'x'), 1], 'y'), ([([0,2], 'x'), 2], 'y'), 1], 'z'))
+	('(x+y+z)^2',	([([([0,0,1], 'x'), ([0,2], 'x'), 1], 'y'), ([([0,2], 'x'), 2], 'y'), 1], 'z')),
+	('3/4x^2 - x/2',	([0, Fraction(-1,2), Fraction(3,4)], 'x')),
+	('2^-2 + 2 x**3',	([Fraction(1,4), 0, 0, 2], 'x')),
+	('-3(1-y)',	([-3, 3], 'y')),
 ]
 
+# strings rejected by Polynomial.fromString
+TEST_CASES_PARSE_ERRORS = ['x/(x+1)', 'x^-1', 'x^(1/2)', '(x+1', 'x+', '2 3', 'x % 2', "__import__('os')"]
+
 TEST_CASES_NULLARY = {
 	Poly.deg: [
 		(-1, []),
@@ -105,6 +115,12 @@ TEST_CASES_UNARY = {
 		(([0,3], 'x'),	('x+y', {'y': Poly.fromString('2x')})), # 3x = (x+y)|(y=2x)
 		(([0,3], 'y'),	('x+y', {'x': Poly.fromString('2y')})), # 3x = (x+y)|(y=2x)
 	],
+	Poly.evalPoints: [
+		([],	('x+y', 'x,y', [[], []])),
+		([3, 0],	('x+y', 'x,y', [[1, 2], [2, -2]])),
+		([4, 17],	('x^2y+1', ['x', 'y'], [[1, 2], [3, 4]])),
+		([2, 2],	('2', 'x', [[1, 5]])),
+	],
 	Poly.der: [
 		([1],	('x', 'x')),
 		(([], 'y'),	('x', 'y')),
@@ -197,6 +213,20 @@ class PolynomialTests(unittest.TestCase):
 		print()
 
 
+	def test_parseErrors(self):
+		print('testing Polynomial.fromString errors: ', end='')
+		for expr in TEST_CASES_PARSE_ERRORS:
+			with self.assertRaises(ValueError, msg='parsing %s' % expr):
+				Poly.fromString(expr)
+			print('.', end='')
+		# parsed strings are cached, the returned polynomials must be independent
+		p1 = Poly.fromString('x^2+1')
+		p1.coeffs[0] = 2
+		self.assertEqual([1, 0, 1], Poly.fromString('x^2+1').coeffs)
+		print('.', end='')
+		print()
+
+
 	def test_nullaryMethods(self):
 		for func,inOutData in TEST_CASES_NULLARY.items():
 			print('testing Polynomial.%s (nullary): ' % func.__name__, end='')
@@ -268,6 +298,156 @@ class PolynomialTests(unittest.TestCase):
 					raise
 			print()
 
+	def test_kroneckerMultiplication(self):
+		print('testing Polynomial multiplication by Kronecker substitution: ', end='')
+		for polyRepr1,polyRepr2 in [('(x+2)^9(y-1)^9', '(x-3)^9(3y+1)^9'), ('(x+y+1)^3', '(x-z)^2')]:
+			p1,p2 = _createPoly(polyRepr1), _createPoly(polyRepr2)
+			pMul = Poly._mulKronecker(p1, p2)
+			self.assertTrue(pMul == p1*p2, 'testing Kronecker product of %s and %s' % (polyRepr1, polyRepr2))
+			self.assertEqual(p1.subs({'x': 2, 'y': 3, 'z': 5})*p2.subs({'x': 2, 'y': 3, 'z': 5}),
+				pMul.subs({'x': 2, 'y': 3, 'z': 5}))
+			print('.', end='')
+		# the factors are tested once per product, not for the products of their coefficients
+		calls = []
+		isCandidate = Poly._isKroneckerCandidate
+		def _countingIsCandidate(p):
+			calls.append(p)
+			return isCandidate(p)
+		Poly._isKroneckerCandidate = _countingIsCandidate
+		try:
+			for polyRepr1,polyRepr2,kronecker in [('(x+2)^9(y-1)^9', '(x-3)^9(3y+1)^9', True), ('(x+y+1)^3', '(x-z)^2', False), ('(x+z)^2', 'y+1', False)]:
+				p1,p2 = _createPoly(polyRepr1), _createPoly(polyRepr2)
+				expected = p1.subs({'x': 2, 'y': 3, 'z': 5})*p2.subs({'x': 2, 'y': 3, 'z': 5})
+				del calls[:]
+				pMul = p1*p2
+				self.assertEqual(2 if kronecker else 1, len(calls))
+				self.assertEqual(kronecker, isCandidate(p1) and isCandidate(p2))
+				self.assertEqual(expected, pMul.subs({'x': 2, 'y': 3, 'z': 5}))
+				print('.', end='')
+		finally:
+			Poly._isKroneckerCandidate = isCandidate
+		print()
+
+	def test_lazyNormalization(self):
+		print('testing Polynomial lazy normalization: ', end='')
+		p = _createPoly('x^2+y')
+		p -= _createPoly('y')
+		p += _createPoly('1')
+		self.assertTrue(p._dirty)
+		self.assertEqual('y', p._varName)
+		self.assertEqual('x', p.varName) # access normalizes y-polynomial [x^2+1, 0] to x^2+1
+		self.assertEqual([1, 0, 1], p.coeffs)
+		self.assertFalse(p._dirty)
+		q = _createPoly('(x+1)y')
+		q.isub(_createPoly('xy'))
+		self.assertEqual(_createPoly('y'), q.clone())
+		print('.', end='')
+		print()
+
+	def test_hashing(self):
+		print('testing Polynomial hashing: ', end='')
+		for polyRepr1,polyRepr2 in [('(x+1)^2', 'x^2+2x+1'), ('3/2', ([Fraction(3,2)], 'y')), ('xy-y', '(x-1)y'), ('0', ([], 'z'))]:
+			p1,p2 = _createPoly(polyRepr1), _createPoly(polyRepr2)
+			self.assertEqual(p1, p2)
+			self.assertEqual(hash(p1), hash(p2), 'testing hash of %s and %s' % (polyRepr1, polyRepr2))
+			print('.', end='')
+		self.assertEqual(hash(Fraction(3,2)), hash(_createPoly('3/2')))
+		self.assertEqual(2, len({_createPoly('x'), _createPoly('y'), _createPoly('1x')}))
+		self.assertIs(_createPoly('x^2-1').intern(), _createPoly('(x-1)(x+1)').intern())
+		self.assertIsNot(_createPoly('x+1').intern(), _createPoly('x+1.0').intern())
+		print('.', end='')
+		print()
+
+	def test_floatEval(self):
+		print('testing Polynomial evaluation at floats: ', end='')
+		p = _createPoly('1/3x^3 - 1/2x + 1/7')
+		for x0 in [0.0, 0.25, -1.5, 3.0, 1e5]:
+			self.assertAlmostEqual(float(p.eval(Fraction(x0))), p.eval(x0), delta=1e-14*max(1, abs(p.eval(x0))))
+			print('.', end='')
+		self.assertIsInstance(p.eval(0.5), float)
+		# cancellation: (x - 1/3)^3 near its root falls back to exact evaluation
+		q = _createPoly('(x - 1/3)^3')
+		x0 = 1/3
+		self.assertEqual(float(q.eval(Fraction(x0))), q.eval(x0))
+		# the shadow is invalidated on modification
+		p += Poly([1], 'x')
+		self.assertAlmostEqual(float(p.eval(Fraction(1, 4))), p.eval(0.25), delta=1e-14)
+		p.scale(2)
+		self.assertAlmostEqual(float(p.eval(Fraction(1, 4))), p.eval(0.25), delta=1e-14)
+		print('.', end='')
+		# ... and also on direct modification of the coefficient list
+		r = _createPoly('x + 1/3')
+		r *= 2
+		self.assertAlmostEqual(14/3, r.eval(2.0), delta=1e-14)
+		r.coeffs[0] = Fraction(100)
+		self.assertEqual(104.0, r.eval(2.0))
+		self.assertEqual(104, r.eval(2))
+		r.coeffs.append(Fraction(1, 2))
+		self.assertEqual(106.0, r.eval(2.0))
+		print('.', end='')
+		# repeated evaluation reuses the shadow
+		shadow = r._shadow
+		r.eval(3.0)
+		self.assertIs(shadow, r._shadow)
+		print('.', end='')
+		# non-finite arguments and overflow are not evaluated exactly
+		inf = float('inf')
+		self.assertEqual(inf, p.eval(inf))
+		self.assertEqual(-inf, p.eval(-inf))
+		self.assertEqual(inf, q.eval(inf))
+		self.assertEqual(-inf, q.eval(-inf))
+		self.assertTrue(math.isnan(p.eval(float('nan'))))
+		self.assertEqual(inf, p.eval(1e200))
+		# cancellation in floats, but the exact value overflows
+		s = Poly([0, -10**308, 1])
+		self.assertEqual(inf, s.eval(1e308))
+		self.assertEqual(inf, s.eval(-1e308))
+		print('.', end='')
+		print()
+
+	def test_backends(self):
+		print('testing Polynomial arithmetic with backends: ', end='')
+		p,q = Poly([1, 0.5]), Poly([1, -0.5])
+		# the reference backend keeps integer results of mixed data as integers
+		self.assertEqual([2], (p + q).coeffs)
+		self.assertIsInstance((p + q).coeffs[0], int)
+		print('.', end='')
+		with upo.using_backend('numpy'):
+			self.assertEqual([2.0], (p + q).coeffs)
+			self.assertIsInstance((p + q).coeffs[0], float)
+			self.assertEqual([0.0, 1.0], (p - q).coeffs)
+			self.assertIsInstance((p - q).coeffs[0], float)
+			self.assertEqual([2.0, 1.0], (p*2).coeffs)
+			self.assertIsInstance((p*2).coeffs[0], float)
+			r = Poly([1, 0.5])
+			r += [0, -0.5]
+			self.assertEqual(0, r.deg())
+			# exact data is not affected
+			self.assertEqual([2, 1], (Poly([1, 1]) + [1]).coeffs)
+			self.assertIsInstance((Poly([1, 1]) + [1]).coeffs[0], int)
+		print('.', end='')
+		# a backend instance given explicitly
+		calls = []
+		class CountingBackend(upo.PythonBackend):
+			name = 'counting'
+			def add(self, coeffs1, coeffs2):
+				calls.append('add')
+				return super().add(coeffs1, coeffs2)
+			def sub(self, coeffs1, coeffs2):
+				calls.append('sub')
+				return super().sub(coeffs1, coeffs2)
+			def scale(self, coeffs, s):
+				calls.append('scale')
+				return super().scale(coeffs, s)
+		backend = CountingBackend()
+		p.iadd(q, backend)
+		p.isub([1], backend)
+		p.scale(Fraction(1, 2), backend)
+		self.assertEqual(['add', 'sub', 'scale'], calls)
+		self.assertEqual([Fraction(1, 2)], p.coeffs)
+		print('.', end='')
+		print()
+
 #	def test_special(self):
 #		print('testing special: ', end='')
 #		p = _createPoly('y')
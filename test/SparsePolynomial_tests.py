@@ -0,0 +1,55 @@
+import unittest
+
+from src.Polynomial import Polynomial as Poly
+from src.SparsePolynomial import SparsePolynomial as SPoly
+
+# polynomials given as strings and their terms in sparse representation
+TEST_CASES_CONVERSION = [
+	('0',	({}, ('x',))),
+	('1',	({(0,): 1}, ('x',))),
+	('x^2-1',	({(2,): 1, (0,): -1}, ('x',))),
+	('1-xy',	({(0,0): 1, (1,1): -1}, ('x','y'))),
+	('(x+y+z)^2',	({(2,0,0): 1, (0,2,0): 1, (0,0,2): 1, (1,1,0): 2, (1,0,1): 2, (0,1,1): 2}, ('x','y','z'))),
+]
+
+# binary operations compared with the nested representation
+TEST_CASES_BINARY = [
+	('x-1',	'x^2-x+2'),
+	('x',	'y'),
+	('1-xy',	'(x+z)^2'),
+	('(x+y)(x-y)',	'2'),
+]
+
+
+class SparsePolynomialTests(unittest.TestCase):
+
+	def test_conversion(self):
+		print('testing SparsePolynomial conversion: ', end='')
+		for polyStr,(terms,varNames) in TEST_CASES_CONVERSION:
+			p = Poly.fromString(polyStr)
+			sp = SPoly.fromPolynomial(p)
+			if terms:
+				self.assertEqual(varNames, sp.varNames, 'testing variables of %s' % polyStr)
+			self.assertEqual(terms, sp.terms, 'testing terms of %s' % polyStr)
+			self.assertEqual(p, sp.toPolynomial(), 'testing round trip of %s' % polyStr)
+			print('.', end='')
+		print()
+
+	def test_binaryOperations(self):
+		print('testing SparsePolynomial binary operations: ', end='')
+		for polyStr1,polyStr2 in TEST_CASES_BINARY:
+			p1,p2 = Poly.fromString(polyStr1), Poly.fromString(polyStr2)
+			sp1,sp2 = SPoly.fromPolynomial(p1), SPoly.fromPolynomial(p2)
+			for op in (lambda a,b: a+b, lambda a,b: a-b, lambda a,b: a*b):
+				self.assertEqual(op(p1, p2), op(sp1, sp2).toPolynomial(), 'testing %s, %s' % (polyStr1, polyStr2))
+				print('.', end='')
+		print()
+
+	def test_subs(self):
+		print('testing SparsePolynomial.subs: ', end='')
+		sp = SPoly.fromPolynomial(Poly.fromString('x^2y + 3y - x'))
+		self.assertEqual(Poly.fromString('7y - 2'), sp.subs({'x': 2}).toPolynomial())
+		self.assertEqual(19, sp.eval({'x': 2, 'y': 3}))
+		self.assertEqual(Poly.fromString('x^3 + 2x'), sp.subs({'y': SPoly.symbol('x')}).toPolynomial())
+		print('.', end='')
+		print()
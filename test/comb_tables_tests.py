@@ -0,0 +1,26 @@
+from fractions import Fraction
+import math
+import unittest
+
+from src import comb_tables
+
+
+class CombTablesTests(unittest.TestCase):
+
+	def test_tables(self):
+		print('testing comb_tables: ', end='')
+		n = 12
+		self.assertEqual([Fraction(1, k) for k in range(1, n+1)], comb_tables.reciprocals(n)[1:n+1])
+		self.assertEqual([math.factorial(k) for k in range(n+1)], comb_tables.factorials(n)[:n+1])
+		print('.', end='')
+		for k in range(n+1):
+			self.assertEqual([math.comb(k, i) for i in range(k+1)], comb_tables.binomial_row(k))
+			self.assertEqual([float(math.comb(k, i)) for i in range(k+1)], comb_tables.binomial_row(k, exact=False))
+		print('.', end='')
+		for i,j in [(0, 0), (2, 3), (5, 1)]:
+			# expand (1-s)^j and integrate over [0,1]
+			beta = sum(Fraction((-1)**k * math.comb(j, k), i+k+1) for k in range(j+1))
+			self.assertEqual(beta, comb_tables.beta_integral(i, j))
+			self.assertAlmostEqual(float(beta), comb_tables.beta_integral(i, j, exact=False))
+			print('.', end='')
+		print()
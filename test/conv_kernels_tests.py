@@ -0,0 +1,36 @@
+from fractions import Fraction
+import unittest
+
+from src import conv_kernels
+from src import univar_polyops as upo
+
+# coefficient lists f, g with widths w1, w2 of the intervals [0,w1], [0,w2]
+TEST_CASES_CONV = [
+	([1],	[1],	1,	1),
+	([0,1],	[1],	Fraction(3,2),	1),
+	([1,-1],	[0,0,3],	1,	2),
+	([2,0,-1,Fraction(1,3)],	[1,1],	Fraction(1,2),	Fraction(1,3)),
+	([Fraction(-1,2),1,1],	[3,-2,1,4],	3,	3),
+]
+
+
+class ConvKernelsTests(unittest.TestCase):
+
+	def test_convPieces(self):
+		print('testing conv_kernels.convPieces: ', end='')
+		for f,g,w1,w2 in TEST_CASES_CONV:
+			pieces = conv_kernels.convPieces(f, g, w1, w2)
+			self.assertEqual(0, pieces[0][1][0])
+			self.assertEqual(w1+w2, pieces[-1][1][1])
+			# the convolution is continuous and vanishes at both ends
+			self.assertEqual(0, upo.evaluate(pieces[0][0], 0))
+			self.assertEqual(0, upo.evaluate(pieces[-1][0], w1+w2))
+			for (p0,(_,y)),(p1,_) in zip(pieces, pieces[1:]):
+				self.assertEqual(upo.evaluate(p0, y), upo.evaluate(p1, y))
+			# the integral of the convolution is the product of the integrals
+			def intDef(coeffs, a, b):
+				return sum(Fraction(c, i+1)*(b**(i+1) - a**(i+1)) for i,c in enumerate(coeffs))
+			intConv = sum(intDef(p, a, b) for p,(a,b) in pieces)
+			self.assertEqual(intDef(f, 0, w1)*intDef(g, 0, w2), intConv)
+			print('.', end='')
+		print()
@@ -0,0 +1,84 @@
+from fractions import Fraction
+import unittest
+
+from src import fft_conv
+from src import modular_conv
+from src import univar_polyops as upo
+
+# piecewise polynomial functions as lists of (local coefficients, interval)
+TEST_CASES_CONV = [
+	([([1], [0, 1])],	[([1], [0, 1])]),
+	([([0, Fraction(1,2)], [0, 2])],	[([3], [1, Fraction(3,2)])]),
+	([([Fraction(1,3)], [0, 3]), ([Fraction(1,2)], [3, Fraction(7,2)])],	[([1, -1], [-1, 0]), ([0, 2, Fraction(-5,7)], [0, Fraction(4,3)])]),
+	([([0, 2], [0, 1]), ([2, -2], [1, 2])],	[([Fraction(2,9), Fraction(-1,5), 1, Fraction(1,11)], [Fraction(-1,2), Fraction(1,3)])]),
+]
+
+
+def _value(pieces, x):
+	for coeffs,(a,b) in pieces:
+		if a <= x <= b:
+			return upo.evaluate(coeffs, x-a)
+	return 0
+
+
+class FFTConvTests(unittest.TestCase):
+
+	def test_convPieces(self):
+		print('testing fft_conv.convPieces: ', end='')
+		for pieces1,pieces2 in TEST_CASES_CONV:
+			exact = modular_conv.convPieces(pieces1, pieces2)
+			a,b = exact[0][1][0], exact[-1][1][1]
+			points = [a + (b-a)*Fraction(i, 37) for i in range(38)]
+			for deg in (1, 3):
+				pieces,err = fft_conv.convPieces(pieces1, pieces2, h=1e-3, deg=deg)
+				self.assertLess(err, 1e-2)
+				for x in points:
+					self.assertAlmostEqual(float(_value(exact, x)), _value(pieces, float(x)), delta=1e-3,
+						msg='testing convolution of %s and %s at %s' % (pieces1, pieces2, x))
+			xs,values = fft_conv.convPieces(pieces1, pieces2, h=1e-3, grid=True)[0]
+			self.assertEqual(len(xs), len(values))
+			self.assertLessEqual(xs[0], a)
+			self.assertGreaterEqual(xs[-1], b)
+			print('.', end='')
+		print()
+
+	def test_errorEstimate(self):
+		print('testing fft_conv.errorEstimate: ', end='')
+		pieces1,pieces2 = TEST_CASES_CONV[2]
+		exact = modular_conv.convPieces(pieces1, pieces2)
+		for h in (0.05, 0.01):
+			y0,values = fft_conv.convGrid(pieces1, pieces2, h)
+			realErr = max(abs(float(_value(exact, Fraction(y0 + k*h))) - v) for k,v in enumerate(values))
+			# the difference to the result for step 2h bounds the error of the result for step h
+			self.assertLessEqual(realErr, fft_conv.errorEstimate(pieces1, pieces2, h) + 1e-12)
+			print('.', end='')
+		# the estimate for the refitted pieces includes the interpolation error between the grid points
+		points = [Fraction(j, 97) for j in range(-97, 5*97)]
+		for h,deg in [(0.05, 1), (0.1, 1), (0.05, 2)]:
+			pieces,err = fft_conv.convPieces(pieces1, pieces2, h, deg)
+			a,b = pieces[0][1][0], pieces[-1][1][1]
+			realErr = max(abs(float(_value(exact, x)) - _value(pieces, float(x))) for x in points if a <= x <= b)
+			self.assertLessEqual(realErr, err)
+			self.assertLess(fft_conv.errorEstimate(pieces1, pieces2, h), err)
+			print('.', end='')
+		print()
+
+	def test_refitAndMerge(self):
+		print('testing fft_conv.refit, mergePieces: ', end='')
+		pieces1,pieces2 = TEST_CASES_CONV[0]
+		self.assertRaises(ValueError, fft_conv.convPieces, pieces1, pieces2, 0.25, 0)
+		y0,values = fft_conv.convGrid(pieces1, pieces2, 0.25)
+		self.assertRaises(ValueError, fft_conv.refit, y0, 0.25, values, 0)
+		print('.', end='')
+		# the convolution of two uniform densities is piecewise linear: two pieces also on the default grid
+		pieces,err = fft_conv.convPieces(pieces1, pieces2)
+		self.assertEqual([[0.0, 1.0], [1.0, 2.0]], [[round(a, 12), round(b, 12)] for _,(a,b) in pieces])
+		exact = modular_conv.convPieces(pieces1, pieces2)
+		for x in [0, 0.3, 1, 1.7, 2]:
+			self.assertAlmostEqual(float(_value(exact, x)), _value(pieces, x), delta=1e-9)
+		print('.', end='')
+		# refit keeps all pieces, pieces of different polynomials are not merged
+		self.assertEqual(8, len(fft_conv.refit(y0, 0.25, values, 1)))
+		self.assertEqual(3, len(fft_conv.mergePieces([([0.0, 1.0], [0, 1]), ([1.0, 0.0], [1, 2]), ([1.0, 1.0], [2, 3])], 1e-12)))
+		print('.', end='')
+		print()
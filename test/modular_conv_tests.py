@@ -0,0 +1,79 @@
+from fractions import Fraction
+import unittest
+
+from src import conv_kernels
+from src import modular_conv
+from src import univar_polyops as upo
+
+# piecewise polynomial functions as lists of (local coefficients, interval)
+TEST_CASES_CONV = [
+	([([1], [0, 1])],	[([1], [0, 1])]),
+	([([0, Fraction(1,2)], [0, 2])],	[([3], [1, Fraction(3,2)])]),
+	([([Fraction(1,3)], [0, 3]), ([Fraction(1,2)], [3, Fraction(7,2)])],	[([1, -1], [-1, 0]), ([0, 2, Fraction(-5,7)], [0, Fraction(4,3)])]),
+	([([Fraction(2,9), Fraction(-1,5), 1, Fraction(1,11)], [Fraction(-1,2), Fraction(1,3)])],	[([7, Fraction(1,3)], [2, 5]), ([Fraction(1,7)], [5, 6])]),
+]
+
+
+def _convValue(pieces1, pieces2, x):
+	# sum of the convolutions of all piece pairs at x (reference computed with conv_kernels)
+	value = 0
+	for coeffs1,(a1,b1) in pieces1:
+		for coeffs2,(a2,b2) in pieces2:
+			for coeffs,(s,e) in conv_kernels.convPieces(coeffs1, coeffs2, b1-a1, b2-a2):
+				if a1+a2+s <= x < a1+a2+e:
+					value += upo.evaluate(coeffs, x-a1-a2)
+	return value
+
+
+class ModularConvTests(unittest.TestCase):
+
+	def test_convPieces(self):
+		print('testing modular_conv.convPieces: ', end='')
+		for pieces1,pieces2 in TEST_CASES_CONV:
+			pieces = modular_conv.convPieces(pieces1, pieces2)
+			for coeffs,(a,b) in pieces:
+				for x in (a, (a+b)/2, (a+2*b)/3):
+					self.assertEqual(_convValue(pieces1, pieces2, x), upo.evaluate(coeffs, x-a),
+						'testing convolution of %s and %s at %s' % (pieces1, pieces2, x))
+			print('.', end='')
+		print()
+
+	def test_heightBound(self):
+		print('testing modular_conv.heightBound: ', end='')
+		for pieces1,pieces2 in TEST_CASES_CONV:
+			pieces1,d1 = modular_conv._clearDenominators(pieces1)
+			pieces2,d2 = modular_conv._clearDenominators(pieces2)
+			bound = modular_conv.heightBound(pieces1, pieces2)
+			pieces = modular_conv.convPieces(pieces1, pieces2)
+			for coeffs,_ in pieces:
+				for c in coeffs:
+					c = Fraction(c)
+					self.assertLessEqual(abs(c.numerator), bound)
+					self.assertLessEqual(c.denominator, bound)
+			print('.', end='')
+			# without early termination the primes up to the bound are used at once
+			usedPrimes = []
+			def _countingMap(func, primes):
+				usedPrimes.extend(primes)
+				return map(func, primes)
+			modular_conv.EARLY_TERMINATION = False
+			try:
+				self.assertEqual(pieces, modular_conv.convPieces(pieces1, pieces2, _countingMap))
+			finally:
+				modular_conv.EARLY_TERMINATION = True
+			m = 1
+			for p in usedPrimes[:-1]:
+				m *= p
+			self.assertLessEqual(m, 2*bound**2)
+			self.assertGreater(m*usedPrimes[-1], 2*bound**2)
+			print('.', end='')
+		print()
+
+	def test_rationalReconstruction(self):
+		print('testing modular_conv._ratRecon: ', end='')
+		m = 2147483647 * 2147483629
+		for r in (Fraction(0), Fraction(-3, 7), Fraction(123456, 654323), Fraction(-1, 2**30)):
+			u = r.numerator * pow(r.denominator, -1, m) % m
+			self.assertEqual(r, modular_conv._ratRecon(u, m))
+			print('.', end='')
+		print()
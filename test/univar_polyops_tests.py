@@ -1,4 +1,6 @@
 import copy
+import math
+from fractions import Fraction
 from numpy import array as na, array_equal as na_eq
 import unittest
 
@@ -62,7 +64,25 @@ TEST_CASES_BINARY = {
 	]
 }
 
+TEST_CASES_BINARY[upo.taylor_shift] = [
+	([],	([], 1)),
+	([2],	([2], 1)),
+	([1,2,3],	([1,2,3], 0)),
+	([1,2,1],	([0,0,1], 1)),     # (x+1)^2
+	([-1,3,-3,1],	([0,0,0,1], -1)), # (x-1)^3
+	([6,8,3],	([1,2,3], 1))     # 3(x+1)^2 + 2(x+1) + 1
+]
+
+TEST_CASES_BINARY[upo.compose] = [
+	([],	([], [0,1])),
+	([3],	([3], [1,2])),
+	([1,2],	([0,1], [1,2])),
+	([-1,3,-3,1],	([0,0,0,1], [-1,1])), # (x-1)^3
+	([0,0,0,0,1],	([0,0,1], [0,0,1]))   # (x^2)^2
+]
+
 TEST_CASES_BINARY[upo.multiply_v2] = TEST_CASES_BINARY[upo.multiply]
+TEST_CASES_BINARY[upo.multiply_karatsuba] = TEST_CASES_BINARY[upo.multiply]
 
 INPLACE_UNARY_FUNCTIONS = {
 	upo.inormalize: upo.normalize,
@@ -117,6 +137,107 @@ class Univar_PolyOps(unittest.TestCase):
 			print()
 
 
+	def test_division(self):
+		print('testing univar_polyops.divide: ', end='')
+		for (quotExp,remExp),(coeffs1,coeffs2) in [
+				(([], []),	([], [1])),
+				(([], [1,1]),	([1,1], [0,0,1])),
+				(([1,1,1], []),	([-1,0,0,1], [-1,1])),   # x^3 - 1 = (x^2 + x + 1)*(x - 1)
+				(([1,-1,1], [-2]),	([-1,0,0,1], [1,1])), # x^3 - 1 = (x^2 - x + 1)*(x + 1) - 2
+				(([Fraction(1,2)], [1]),	([1,1], [0,2]))]:
+			self.assertEqual((quotExp,remExp), upo.divide(coeffs1, coeffs2))
+			print('.', end='')
+		coeffs1 = [(-1)**i * (i % 7) for i in range(200)]
+		coeffs2 = [(i*i) % 11 - 5 for i in range(80)] + [3]
+		quot,rem = upo.divide(coeffs1, coeffs2)
+		self.assertEqual(coeffs1, upo.add(upo.multiply(quot, coeffs2), rem))
+		self.assertLess(upo.degree(rem), upo.degree(coeffs2))
+		print('.', end='')
+		print()
+
+	def test_multipointEvaluationAndInterpolation(self):
+		print('testing univar_polyops.evaluate_multi, interpolate: ', end='')
+		coeffs = [(-1)**i * (i % 7) for i in range(100)]
+		points = list(range(-50, 50, 3))
+		values = [upo.evaluate(coeffs, x0) for x0 in points]
+		self.assertEqual(values, upo.evaluate_multi(coeffs, points))
+		print('.', end='')
+		self.assertEqual([], upo.interpolate([], []))
+		self.assertEqual([Fraction(1,2), Fraction(1,2)], upo.interpolate([1, -1], [1, 0]))
+		xs = [Fraction(i, 3) for i in range(100)]
+		self.assertEqual(coeffs, upo.interpolate(xs, [upo.evaluate(coeffs, x0) for x0 in xs]))
+		print('.', end='')
+		print()
+
+	def test_rationalEvaluation(self):
+		print('testing univar_polyops.evaluate_rational: ', end='')
+		coeffs = [Fraction((-1)**i * (i % 7), i+1) for i in range(40)]
+		numerators,d = upo.integral_coeffs(coeffs)
+		self.assertEqual(coeffs, [Fraction(c, d) for c in numerators])
+		for x0 in [0, 3, Fraction(-2, 3), Fraction(7, 11)]:
+			self.assertEqual(upo.evaluate(coeffs, Fraction(x0)), upo.evaluate_rational(numerators, d, x0))
+			print('.', end='')
+		self.assertEqual(([3, 0, 1], 1), upo.integral_coeffs([3, 0, 1]))
+		self.assertEqual(Fraction(28, 9), upo.evaluate_rational([3, 0, 1], 1, Fraction(1, 3)))
+		self.assertEqual(0, upo.evaluate_rational([], 1, Fraction(1, 3)))
+		print('.', end='')
+		# non-finite floats have no rational value, huge floats are exact
+		inf = float('inf')
+		self.assertEqual(inf, upo.evaluate_rational([1, 2, 3], 6, inf))
+		self.assertEqual(inf, upo.evaluate_rational([1, -2, 3], 6, -inf))
+		self.assertEqual(-inf, upo.evaluate_rational([1, 2], 6, -inf))
+		self.assertTrue(math.isnan(upo.evaluate_rational([1, 2], 6, float('nan'))))
+		self.assertEqual(Fraction(1, 6) + Fraction(1e308)/3, upo.evaluate_rational([1, 2], 6, 1e308))
+		print('.', end='')
+		print()
+
+	def test_divideAndConquerAlgorithms(self):
+		print('testing univar_polyops divide-and-conquer algorithms with large inputs: ', end='')
+		coeffs1 = [(-1)**i * (i % 7) for i in range(150)]
+		coeffs2 = [(i*i) % 11 - 5 for i in range(100)]
+		self.assertEqual(upo.multiply(coeffs1, coeffs2), upo.multiply_karatsuba(coeffs1, coeffs2))
+		self.assertEqual(upo.multiply(coeffs1, coeffs2[:40]), upo.multiply_karatsuba(coeffs1, coeffs2[:40]))
+		print('.', end='')
+		self.assertEqual(upo._taylor_shift_horner(coeffs1, 3), upo.taylor_shift(coeffs1, 3))
+		self.assertEqual(upo._taylor_shift_horner(coeffs1, Fraction(-2,3)), upo.taylor_shift(coeffs1, Fraction(-2,3)))
+		print('.', end='')
+		self.assertEqual(upo._compose_horner(coeffs1[:50], [1,-2,1]), upo.compose(coeffs1[:50], [1,-2,1]))
+		print('.', end='')
+		print()
+
+	def test_backends(self):
+		print('testing univar_polyops backends: ', end='')
+		coeffLists = [[1, 2, 3], [Fraction(1,2), -1], [0.5, 0.25, -2.0, 1], [3]]
+		ref = upo.get_backend('python')
+		for name,backend in upo.BACKENDS.items():
+			for coeffs1 in coeffLists:
+				for coeffs2 in coeffLists:
+					prod,prodRef = backend.multiply(coeffs1, coeffs2), ref.multiply(coeffs1, coeffs2)
+					self.assertEqual(len(prodRef), len(prod), 'testing %s backend' % name)
+					for c,cRef in zip(prod, prodRef):
+						self.assertAlmostEqual(cRef, c, msg='testing %s backend' % name)
+						if all(isinstance(c, int) for c in coeffs1 + coeffs2):
+							self.assertIsInstance(c, int, 'testing %s backend keeps integers' % name)
+					for op in ['add', 'sub']:
+						res,resRef = getattr(backend, op)(coeffs1, coeffs2), getattr(ref, op)(coeffs1, coeffs2)
+						self.assertEqual(len(resRef), len(res), 'testing %s backend' % name)
+						for c,cRef in zip(res, resRef):
+							self.assertAlmostEqual(cRef, c, msg='testing %s backend' % name)
+				for s in [2, Fraction(1,3), 0.5, 0]:
+					res,resRef = backend.scale(coeffs1, s), ref.scale(coeffs1, s)
+					self.assertEqual(len(resRef), len(res), 'testing %s backend' % name)
+					for c,cRef in zip(res, resRef):
+						self.assertAlmostEqual(cRef, c, msg='testing %s backend' % name)
+				self.assertAlmostEqual(ref.evaluate(coeffs1, Fraction(1,3)), backend.evaluate(coeffs1, Fraction(1,3)))
+			print('.', end='')
+		with upo.using_backend(upo.PythonBackend()) as backend:
+			self.assertIs(backend, upo.get_backend())
+		self.assertEqual('python', upo.get_backend().name)
+		self.assertRaises(ValueError, upo.get_backend, 'unknown')
+		print('.', end='')
+		print()
+
+
 # feed numpy array into functions and compare results with numpy arrays
 # (currently not very useful since the poly operations are not aware of numpy)
 class Univar_PolyOps_numpy(unittest.TestCase):